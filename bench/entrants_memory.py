@@ -0,0 +1,110 @@
+import argparse
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+# Compare l'ancien stockage des participants (set d'ints) à EntrantSet (tableau trié + tampon) :
+# mémoire occupée, coût d'une réaction, coût d'un tirage et taille sur disque.
+#
+#   python bench/entrants_memory.py [--sizes 10000 100000 1000000] [--winners 25]
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core import serialization  # noqa: E402
+from core.entrants import EntrantSet  # noqa: E402
+
+
+def snowflakes(count: int) -> list[int]:
+    rng = random.Random(7)
+    return [rng.randrange(10 ** 17, 10 ** 19) for _ in range(count)]
+
+
+def timed(build, draw) -> tuple[float, float]:
+    """Durées (s) d'une construction à froid puis du premier tirage, hors tracemalloc"""
+    start = time.perf_counter()
+    container = build()
+    built = time.perf_counter()
+    draw(container)
+    return built - start, time.perf_counter() - built
+
+
+def traced(build, draw) -> tuple[object, int, int]:
+    """Objet construit, mémoire retenue (octets) et pic (octets) sur construction à froid + premier tirage"""
+    tracemalloc.start()
+    container = build()
+    retained, _ = tracemalloc.get_traced_memory()
+    # Le premier tirage fusionne le tampon en attente : son pic compte
+    draw(container)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return container, retained, peak
+
+
+def draw_set(entrants: set, preferred: set, winners: int) -> list[int]:
+    # Tirage tel qu'il était fait avec un set : deux listes complètes puis random.sample
+    preferred_ids = [uid for uid in entrants if uid in preferred]
+    others = [uid for uid in entrants if uid not in preferred]
+    picked = random.sample(preferred_ids, min(winners, len(preferred_ids)))
+    return picked + random.sample(others, winners - len(picked))
+
+
+def draw_compact(entrants: EntrantSet, preferred: set, winners: int) -> list[int]:
+    picked = [uid for uid in preferred if uid in entrants]
+    for uid in entrants.shuffled():
+        if len(picked) >= winners:
+            break
+        if uid not in preferred:
+            picked.append(uid)
+    return picked
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Participants de giveaway : set vs EntrantSet")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--winners", type=int, default=25)
+    args = parser.parse_args()
+
+    for size in args.sizes:
+        ids = snowflakes(size)
+        preferred = set(ids[:3])
+
+        def build_set():
+            entrants = set()
+            for uid in ids:
+                entrants.add(uid)
+            return entrants
+
+        def build_compact():
+            entrants = EntrantSet()
+            for uid in ids:
+                entrants.add(uid)
+            return entrants
+
+        def draw_plain(entrants):
+            return draw_set(entrants, preferred, args.winners)
+
+        def draw_array(entrants):
+            return draw_compact(entrants, preferred, args.winners)
+
+        plain_time, plain_draw = timed(build_set, draw_plain)
+        compact_time, compact_draw = timed(build_compact, draw_array)
+        plain, plain_bytes, plain_peak = traced(build_set, draw_plain)
+        compact, compact_bytes, compact_peak = traced(build_compact, draw_array)
+        # Ancienne forme sur disque : une ligne (message_id, user_id) par participant, ~2 entiers de 8 octets
+        rows_bytes = size * 16
+        json_bytes = len(serialization.dumps(sorted(plain)))
+
+        print(f"\n── {size} participants")
+        print(f"   mémoire          set {plain_bytes / 1e6:9.2f} Mo   EntrantSet {compact_bytes / 1e6:9.2f} Mo"
+              f"   (x{plain_bytes / max(compact_bytes, 1):.1f})")
+        print(f"   ajout (µs)       set {plain_time / size * 1e6:9.3f}      EntrantSet {compact_time / size * 1e6:9.3f}")
+        print(f"   tirage (ms)      set {plain_draw * 1e3:9.2f}      EntrantSet {compact_draw * 1e3:9.2f}")
+        print(f"   pic à froid      set {plain_peak / 1e6:9.2f} Mo   EntrantSet {compact_peak / 1e6:9.2f} Mo")
+        print(f"   disque           lignes ~{rows_bytes / 1e6:.2f} Mo   JSON {json_bytes / 1e6:.2f} Mo"
+              f"   binaire {len(compact.to_bytes()) / 1e6:.2f} Mo")
+
+
+if __name__ == "__main__":
+    main()
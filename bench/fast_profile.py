@@ -0,0 +1,183 @@
+import argparse
+import asyncio
+import json
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+# Compare le profil par défaut (asyncio + json indenté) au profil rapide (uvloop + orjson)
+# sur trois axes : démarrage (import + chargement des cogs sur une base volumineuse), latence
+# d'une réécriture JSON complète, débit d'événements de la boucle.
+#
+#   python bench/fast_profile.py [--guilds 200] [--saves 50] [--events 200000]
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from core import serialization  # noqa: E402
+
+
+def synthetic_stores(guilds: int) -> dict[str, object]:
+    """Fichiers de données réalistes pour un bot présent sur `guilds` serveurs"""
+    rng = random.Random(42)
+
+    def snowflake():
+        return str(rng.randrange(10 ** 17, 10 ** 18))
+
+    tickets, warnings, invites = {}, {}, {}
+    for _ in range(guilds):
+        guild_id = snowflake()
+        tickets[guild_id] = {
+            "config": {"category_id": snowflake(), "staff_role_id": snowflake(), "log_channel_id": snowflake(), "preset": "support"},
+            "tickets": {
+                snowflake(): {"user_id": snowflake(), "number": n, "status": rng.choice(["open", "closed"]),
+                              "created_at": "2024-05-01T12:00:00", "reason": "Besoin d'aide avec mon compte é"}
+                for n in range(50)
+            },
+        }
+        warnings[guild_id] = {
+            snowflake(): [{"moderator": snowflake(), "reason": "Spam répété", "timestamp": "2024-05-01T12:00:00"}
+                          for _ in range(rng.randint(1, 4))]
+            for _ in range(30)
+        }
+        invites[guild_id] = {
+            "members": {snowflake(): {"inviter": snowflake(), "code": "abcDEF"} for _ in range(200)},
+            "counts": {snowflake(): rng.randint(0, 100) for _ in range(40)},
+        }
+    return {
+        "tickets.json": tickets,
+        "warnings.json": warnings,
+        "invite_stats.json": invites,
+        "reaction_roles.json": {"message_id_genre": 1, "message_id_age": 2},
+    }
+
+
+def bench_saves(stores: dict[str, object], saves: int, directory: str) -> dict[str, float]:
+    """Durée moyenne (ms) d'une réécriture atomique complète (anciennes sauvegardes JSON, instantané chaud)"""
+    results = {}
+    for name, data in stores.items():
+        path = os.path.join(directory, name)
+        start = time.perf_counter()
+        for _ in range(saves):
+            temp_file = f"{path}.tmp"
+            with open(temp_file, "w", encoding="utf-8") as f:
+                serialization.dump(data, f, indent=2)
+            os.replace(temp_file, path)
+        results[name] = (time.perf_counter() - start) / saves * 1000
+    return results
+
+
+async def _event_workload(events: int) -> float:
+    """Répartition d'événements façon gateway : une tâche par événement, file et futures"""
+    queue: asyncio.Queue = asyncio.Queue()
+    loop = asyncio.get_running_loop()
+
+    async def handler(i):
+        future = loop.create_future()
+        loop.call_soon(future.set_result, i)
+        await future
+        queue.put_nowait(i)
+
+    start = time.perf_counter()
+    for i in range(events):
+        loop.create_task(handler(i))
+    for _ in range(events):
+        await queue.get()
+    return events / (time.perf_counter() - start)
+
+
+def bench_events(events: int, use_uvloop: bool) -> float | None:
+    if use_uvloop:
+        try:
+            import uvloop
+        except ImportError:
+            return None
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    try:
+        return asyncio.run(_event_workload(events))
+    finally:
+        asyncio.set_event_loop_policy(None)
+
+
+STARTUP_SNIPPET = """
+import asyncio, sys, time
+start = time.perf_counter()
+sys.path.insert(0, {root!r})
+import python_bot as pb
+if pb.FAST_PROFILE:
+    pb.enable_fast_profile()
+
+async def main():
+    async with pb.bot:
+        await pb.bot.storage.open()
+        await pb.load_cogs(pb.bot, pb.COGS, pb.startup_report)
+        await pb.bot.storage.close()
+
+asyncio.run(main())
+print(time.perf_counter() - start)
+"""
+
+
+def bench_startup(stores: dict[str, object], fast: bool, runs: int = 3) -> float:
+    """Meilleur temps (s) d'import + chargement des cogs, base migrée depuis `stores`"""
+    env = {**os.environ, "BOT_FAST": "1" if fast else "0", "LOG_MODE": "sync"}
+    env.pop("DATABASE_PATH", None)
+    directory = tempfile.mkdtemp(prefix="bot-bench-")
+    for name, data in stores.items():
+        with open(os.path.join(directory, name), "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2, ensure_ascii=False)
+    best = float("inf")
+    # Premier lancement non mesuré : import des fichiers JSON dans la base
+    for i in range(runs + 1):
+        output = subprocess.run(
+            [sys.executable, "-c", STARTUP_SNIPPET.format(root=ROOT)],
+            cwd=directory, env=env, capture_output=True, text=True, check=True
+        ).stdout
+        if i:
+            best = min(best, float(output.strip().splitlines()[-1]))
+    shutil.rmtree(directory, ignore_errors=True)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Profil par défaut vs profil rapide (uvloop/orjson)")
+    parser.add_argument("--guilds", type=int, default=200)
+    parser.add_argument("--saves", type=int, default=50)
+    parser.add_argument("--events", type=int, default=200_000)
+    args = parser.parse_args()
+
+    if serialization.orjson is None:
+        print("orjson non installé : le profil rapide retombe sur json, les chiffres seront identiques")
+
+    stores = synthetic_stores(args.guilds)
+    startup_default = bench_startup(stores, fast=False)
+    startup_fast = bench_startup(stores, fast=True)
+
+    with tempfile.TemporaryDirectory() as directory:
+        for name, data in stores.items():
+            with open(os.path.join(directory, name), "w", encoding="utf-8") as f:
+                json.dump(data, f, indent=2, ensure_ascii=False)
+        sizes = {name: os.path.getsize(os.path.join(directory, name)) / 1024 for name in stores}
+
+
+        saves_default = bench_saves(stores, args.saves, directory)
+        serialization.enable_fast()
+        saves_fast = bench_saves(stores, args.saves, directory)
+
+    events_default = bench_events(args.events, use_uvloop=False)
+    events_fast = bench_events(args.events, use_uvloop=True)
+
+    print(f"\nDémarrage (import + cogs)       défaut {startup_default:7.3f}s   rapide {startup_fast:7.3f}s")
+    print("\nSauvegarde (ms, moyenne)")
+    for name in stores:
+        print(f"  {name:<22} {sizes[name]:8.0f} Ko   défaut {saves_default[name]:8.2f}   rapide {saves_fast[name]:8.2f}")
+    print(f"\nDébit d'événements (evt/s)      défaut {events_default:10.0f}   ", end="")
+    print(f"rapide {events_fast:10.0f}" if events_fast else "rapide (uvloop non installé)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,678 @@
+import asyncio
+import collections
+import contextlib
+import itertools
+import logging
+import os
+import re
+import sys
+import tempfile
+from datetime import datetime, timezone
+from urllib.parse import unquote
+
+# Banc d'essai hors ligne : le vrai bot (python_bot.py, setup_hook et tous les cogs) tourne
+# contre une fausse couche HTTP Discord et reçoit des événements gateway synthétiques, injectés
+# par les mêmes parseurs que la vraie connexion (ConnectionState.parsers). Mesure le débit,
+# la latence des handlers (de l'injection à la fin des tâches lancées) et les appels REST.
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+import discord  # noqa: E402
+from discord.http import HTTPClient, Route  # noqa: E402
+from discord.webhook.async_ import AsyncWebhookAdapter, async_context  # noqa: E402
+
+BOT_ID = 900000000000000001
+EPOCH = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+
+def iso_now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def percentile(values: list[float], q: float) -> float:
+    """Percentile exact (interpolation linéaire) d'une liste de durées"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = q * (len(ordered) - 1)
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+# ---------------------------------------------------------------- payloads Discord
+
+def user_payload(user_id: int, name: str, bot: bool = False) -> dict:
+    return {"id": str(user_id), "username": name, "discriminator": "0", "global_name": name, "avatar": None, "bot": bot}
+
+
+def member_payload(user: dict, roles: list[int] = (), permissions: int | None = None) -> dict:
+    data = {
+        "user": user, "roles": [str(r) for r in roles], "joined_at": EPOCH.isoformat(), "nick": None, "avatar": None,
+        "deaf": False, "mute": False, "flags": 0, "pending": False, "communication_disabled_until": None,
+    }
+    if permissions is not None:
+        data["permissions"] = str(permissions)
+    return data
+
+
+def role_payload(role_id: int, name: str, position: int, permissions: int = 0) -> dict:
+    return {"id": str(role_id), "name": name, "color": 0, "hoist": False, "position": position,
+            "permissions": str(permissions), "managed": False, "mentionable": False, "flags": 0}
+
+
+def channel_payload(channel_id: int, guild_id: int, name: str, type: int = 0, parent_id: int | None = None, position: int = 0, **extra) -> dict:
+    data = {"id": str(channel_id), "type": type, "guild_id": str(guild_id), "name": name, "position": position,
+            "permission_overwrites": [], "parent_id": str(parent_id) if parent_id else None, "nsfw": False,
+            "topic": None, "last_message_id": None, "rate_limit_per_user": 0}
+    data.update(extra)
+    return data
+
+
+def message_payload(message_id: int, channel_id: int, guild_id: int | None, author: dict, body: dict | None = None) -> dict:
+    body = body or {}
+    return {
+        "id": str(message_id), "channel_id": str(channel_id), "guild_id": str(guild_id) if guild_id else None,
+        "author": author, "content": body.get("content") or "", "timestamp": iso_now(), "edited_timestamp": None,
+        "tts": False, "mention_everyone": False, "mentions": [], "mention_roles": [], "attachments": [],
+        "embeds": body.get("embeds") or [], "pinned": False, "type": 0, "flags": body.get("flags") or 0,
+        "components": body.get("components") or [], "reactions": [],
+    }
+
+
+# ---------------------------------------------------------------- faux serveur Discord
+
+class FakeDiscord:
+    """État côté « serveur » : identifiants, messages, invitations et compteurs d'appels REST"""
+
+    def __init__(self, rest_latency: float = 0.0):
+        self.rest_latency = rest_latency
+        # Identifiants déterministes : un flux enregistré se rejoue sur une fixture identique
+        self._ids = itertools.count(int((EPOCH.timestamp() - 1420070400) * 1000) << 22)
+        self.calls: collections.Counter[str] = collections.Counter()
+        self.unmodeled: collections.Counter[str] = collections.Counter()
+        self.messages: dict[int, dict] = {}
+        self.reactions: dict[int, dict[str, list[dict]]] = collections.defaultdict(lambda: collections.defaultdict(list))
+        self.invites: dict[int, list[dict]] = {}
+        self.users: dict[int, dict] = {}
+        self.members: dict[tuple[int, int], dict] = {}
+        self.channel_guild: dict[int, int] = {}
+        self.channels: dict[int, dict] = {}
+        self.bot_user = user_payload(BOT_ID, "HeavenBot", bot=True)
+        # Rappel vers le harnais pour simuler les événements gateway qui suivent un appel REST
+        self.gateway = None
+
+    def next_id(self) -> int:
+        return next(self._ids)
+
+    def reset_counters(self):
+        self.calls.clear()
+        self.unmodeled.clear()
+
+    async def handle(self, method: str, path: str, params: dict, body: dict | None):
+        self.calls[f"{method} {path}"] += 1
+        if self.rest_latency:
+            await asyncio.sleep(self.rest_latency)
+        handler = ROUTES.get((method, path))
+        if handler is None:
+            self.unmodeled[f"{method} {path}"] += 1
+            return None if method in ("PUT", "DELETE") else {}
+        return handler(self, params, body or {})
+
+    # -- routes modélisées
+
+    def _me(self, params, body):
+        return self.bot_user
+
+    def _application(self, params, body):
+        return {"id": str(BOT_ID), "name": "HeavenBot", "description": "", "icon": None, "bot_public": True,
+                "bot_require_code_grant": False, "owner": user_payload(1, "owner"), "verify_key": "0" * 64, "flags": 0}
+
+    def _commands(self, params, body):
+        # tree.sync : Discord renvoie les commandes avec leurs identifiants
+        return [{**command, "id": str(self.next_id()), "application_id": str(BOT_ID), "version": "1"} for command in body or []]
+
+    def _send_message(self, params, body):
+        channel_id = int(params["channel_id"])
+        message = message_payload(self.next_id(), channel_id, self._guild_of(channel_id), self.bot_user, body)
+        self.messages[int(message["id"])] = message
+        return message
+
+    def _get_message(self, params, body):
+        message = self.messages.get(int(params["message_id"]))
+        if message is None:
+            message = message_payload(int(params["message_id"]), int(params["channel_id"]), self._guild_of(int(params["channel_id"])), self.bot_user)
+        reactions = self.reactions.get(int(params["message_id"]), {})
+        message["reactions"] = [
+            {"emoji": {"id": None, "name": emoji}, "count": len(users), "me": False,
+             "count_details": {"burst": 0, "normal": len(users)}, "me_burst": False, "burst_colors": []}
+            for emoji, users in reactions.items()
+        ]
+        return message
+
+    def _edit_message(self, params, body):
+        message = self._get_message(params, body)
+        for key in ("content", "embeds", "components", "flags"):
+            if key in body:
+                message[key] = body[key]
+        message["edited_timestamp"] = iso_now()
+        return message
+
+    def _reaction_users(self, params, body):
+        users = self.reactions.get(int(params["message_id"]), {}).get(params["emoji"], [])
+        after = int(params.get("after") or 0)
+        return [user for user in users if int(user["id"]) > after][:100]
+
+    def _no_content(self, params, body):
+        return None
+
+    def _get_member(self, params, body):
+        member = self.members.get((int(params["guild_id"]), int(params.get("member_id") or params["user_id"])))
+        if member is None:
+            raise discord.NotFound(_FakeResponse(404), {"code": 10007, "message": "Unknown Member"})
+        return member
+
+    def _get_user(self, params, body):
+        user = self.users.get(int(params["user_id"]))
+        if user is None:
+            raise discord.NotFound(_FakeResponse(404), {"code": 10013, "message": "Unknown User"})
+        return user
+
+    def _invites(self, params, body):
+        return self.invites.get(int(params["guild_id"]), [])
+
+    def _vanity(self, params, body):
+        return {"code": None, "uses": 0}
+
+    def _create_channel(self, params, body):
+        guild_id = int(params["guild_id"])
+        channel = channel_payload(self.next_id(), guild_id, body.get("name", "salon"), body.get("type", 0),
+                                  body.get("parent_id"), permission_overwrites=body.get("permission_overwrites", []),
+                                  topic=body.get("topic"))
+        self.channel_guild[int(channel["id"])] = guild_id
+        self.channels[int(channel["id"])] = channel
+        if self.gateway:
+            self.gateway("CHANNEL_CREATE", channel)
+        return channel
+
+    def _edit_channel(self, params, body):
+        channel_id = int(params["channel_id"])
+        channel = self.channels.get(channel_id) or channel_payload(channel_id, self._guild_of(channel_id), "salon")
+        channel = self.channels[channel_id] = {**channel, **body}
+        if self.gateway:
+            self.gateway("CHANNEL_UPDATE", channel)
+        return channel
+
+    def _delete_channel(self, params, body):
+        channel_id = int(params["channel_id"])
+        guild_id = self._guild_of(channel_id)
+        self.channels.pop(channel_id, None)
+        channel = channel_payload(channel_id, guild_id, "supprimé")
+        if self.gateway:
+            self.gateway("CHANNEL_DELETE", channel)
+        return channel
+
+    def _edit_member(self, params, body):
+        return self._get_member(params, body)
+
+    def _guild_of(self, channel_id: int) -> int | None:
+        return self.channel_guild.get(channel_id)
+
+
+ROUTES = {
+    ("GET", "/users/@me"): FakeDiscord._me,
+    ("GET", "/oauth2/applications/@me"): FakeDiscord._application,
+    ("PUT", "/applications/{application_id}/commands"): FakeDiscord._commands,
+    ("PUT", "/applications/{application_id}/guilds/{guild_id}/commands"): FakeDiscord._commands,
+    ("POST", "/channels/{channel_id}/messages"): FakeDiscord._send_message,
+    ("GET", "/channels/{channel_id}/messages/{message_id}"): FakeDiscord._get_message,
+    ("PATCH", "/channels/{channel_id}/messages/{message_id}"): FakeDiscord._edit_message,
+    ("GET", "/channels/{channel_id}/messages/{message_id}/reactions/{emoji}"): FakeDiscord._reaction_users,
+    ("GET", "/guilds/{guild_id}/members/{member_id}"): FakeDiscord._get_member,
+    ("PATCH", "/guilds/{guild_id}/members/{user_id}"): FakeDiscord._edit_member,
+    ("GET", "/users/{user_id}"): FakeDiscord._get_user,
+    ("GET", "/guilds/{guild_id}/invites"): FakeDiscord._invites,
+    ("GET", "/guilds/{guild_id}/vanity-url"): FakeDiscord._vanity,
+    ("POST", "/guilds/{guild_id}/channels"): FakeDiscord._create_channel,
+    ("PATCH", "/channels/{channel_id}"): FakeDiscord._edit_channel,
+    ("DELETE", "/channels/{channel_id}"): FakeDiscord._delete_channel,
+    # Routes 204 sans corps de réponse
+    ("PUT", "/guilds/{guild_id}/members/{user_id}/roles/{role_id}"): FakeDiscord._no_content,
+    ("DELETE", "/guilds/{guild_id}/members/{user_id}/roles/{role_id}"): FakeDiscord._no_content,
+    ("PUT", "/channels/{channel_id}/permissions/{target}"): FakeDiscord._no_content,
+    ("DELETE", "/channels/{channel_id}/permissions/{target}"): FakeDiscord._no_content,
+    ("PUT", "/channels/{channel_id}/messages/{message_id}/reactions/{emoji}/@me"): FakeDiscord._no_content,
+    ("DELETE", "/guilds/{guild_id}/members/{user_id}"): FakeDiscord._no_content,
+    ("PUT", "/guilds/{guild_id}/bans/{user_id}"): FakeDiscord._no_content,
+    ("DELETE", "/guilds/{guild_id}/bans/{user_id}"): FakeDiscord._no_content,
+    ("POST", "/channels/{channel_id}/messages/bulk-delete"): FakeDiscord._no_content,
+}
+
+
+class _FakeResponse:
+    """Réponse minimale pour construire les exceptions HTTP de discord.py"""
+
+    def __init__(self, status: int):
+        self.status = status
+        self.reason = "fake"
+        self.headers = {}
+
+
+_TEMPLATE_PARAM = re.compile(r"\{(\w+)\}")
+_template_cache: dict[str, re.Pattern] = {}
+
+
+def route_params(route: Route) -> dict:
+    """Extrait les paramètres d'une route à partir de son URL formatée"""
+    pattern = _template_cache.get(route.path)
+    if pattern is None:
+        regex = _TEMPLATE_PARAM.sub(lambda m: f"(?P<{m.group(1)}>[^/]+)", re.escape(route.path).replace(r"\{", "{").replace(r"\}", "}"))
+        pattern = _template_cache[route.path] = re.compile(regex + "$")
+    path = route.url[len(route.BASE):] if route.url.startswith(route.BASE) else route.url
+    match = pattern.match(path.split("?")[0])
+    return {key: unquote(value) for key, value in match.groupdict().items()} if match else {}
+
+
+def _body(kwargs: dict) -> dict | None:
+    if "json" in kwargs:
+        return kwargs["json"]
+    form = kwargs.get("form")
+    if form:
+        for part in form:
+            if part.get("name") == "payload_json":
+                return discord.utils._from_json(part["value"])
+    return None
+
+
+class FakeHTTP(HTTPClient):
+    """HTTPClient dont chaque requête est servie par FakeDiscord (aucun accès réseau)"""
+
+    def __init__(self, fake: FakeDiscord, loop=None):
+        super().__init__(loop or asyncio.get_event_loop())
+        self.fake = fake
+
+    async def request(self, route: Route, *, files=None, form=None, **kwargs):
+        params = route_params(route)
+        params.update({k: str(v) for k, v in (kwargs.get("params") or {}).items()})
+        return await self.fake.handle(route.method, route.path, params, _body({**kwargs, "form": form}))
+
+
+class FakeWebhookAdapter(AsyncWebhookAdapter):
+    """Réponses aux interactions (callback, réponse originale, followups) servies localement"""
+
+    def __init__(self, fake: FakeDiscord):
+        super().__init__()
+        self.fake = fake
+        self.originals: dict[str, dict] = {}
+
+    async def request(self, route, session, *, payload=None, multipart=None, files=None, params=None, **kwargs):
+        body = payload
+        if multipart:
+            for part in multipart:
+                if part.get("name") == "payload_json":
+                    body = discord.utils._from_json(part["value"])
+        path = route.path
+        self.fake.calls[f"{route.method} {path}"] += 1
+        if self.fake.rest_latency:
+            await asyncio.sleep(self.fake.rest_latency)
+        if path.endswith("/callback"):
+            message_id = self.fake.next_id()
+            data = (body or {}).get("data") or {}
+            self.fake.messages[message_id] = message_payload(message_id, 0, None, self.fake.bot_user, data)
+            self.originals[route.webhook_token] = self.fake.messages[message_id]
+            return {"interaction": {"id": str(route.webhook_id), "type": 2, "response_message_id": str(message_id),
+                                    "response_message_loading": body.get("type") == 5,
+                                    "response_message_ephemeral": bool(data.get("flags", 0) & 64)},
+                    "resource": {"type": body.get("type", 4), "message": self.fake.messages[message_id]}}
+        if route.method == "DELETE":
+            return None
+        if path.endswith("/messages/@original") and route.webhook_token in self.originals:
+            message = self.originals[route.webhook_token]
+            if route.method == "PATCH" and body:
+                message.update({k: v for k, v in body.items() if k in ("content", "embeds", "components")})
+            return message
+        # Followup ou édition de la réponse originale : renvoie un message
+        message_id = self.fake.next_id()
+        return message_payload(message_id, 0, None, self.fake.bot_user, body)
+
+
+# ---------------------------------------------------------------- fixture de guilde
+
+class GuildFixture:
+    """Guilde synthétique reprenant les identifiants codés en dur dans les cogs"""
+
+    def __init__(self, fake: FakeDiscord, members: int = 200, guild_id: int | None = None):
+        from cogs import roles, welcome
+
+        self.fake = fake
+        self.id = guild_id or fake.next_id()
+        self.owner = user_payload(fake.next_id(), "owner")
+        self.moderator = user_payload(fake.next_id(), "modo")
+        self.users = [user_payload(fake.next_id(), f"user{i}") for i in range(members)]
+        self.everyone_role = role_payload(self.id, "@everyone", 0, permissions=int(discord.Permissions.general().value))
+        self.admin_role = role_payload(fake.next_id(), "Admin", 10, permissions=discord.Permissions.all().value)
+        self.mod_role = role_payload(fake.next_id(), "Modérateur", 5, permissions=discord.Permissions(manage_messages=True, manage_guild=True, manage_channels=True, moderate_members=True).value)
+        self.extra_roles = [
+            role_payload(rid, name, 1) for rid, name in (
+                (welcome.MEMBER_ROLE_ID, "Membre"), (roles.ROLE_HOMME_ID, "Homme"), (roles.ROLE_FEMME_ID, "Femme"),
+                (roles.ROLE_MINEUR_ID, "Mineur"), (roles.ROLE_MAJEUR_ID, "Majeur"))
+        ]
+        self.category = channel_payload(fake.next_id(), self.id, "Tickets", type=4)
+        self.general = channel_payload(fake.next_id(), self.id, "général")
+        self.panel = channel_payload(fake.next_id(), self.id, "tickets")
+        self.welcome_channel = channel_payload(welcome.WELCOME_CHANNEL_ID, self.id, "bienvenue")
+        self.roles_channel = channel_payload(roles.CHANNEL_ID, self.id, "rôles")
+        self.channels = [self.category, self.general, self.panel, self.welcome_channel, self.roles_channel]
+        for channel in self.channels:
+            fake.channel_guild[int(channel["id"])] = self.id
+        self.members = {
+            int(self.owner["id"]): member_payload(self.owner, [int(self.admin_role["id"])]),
+            int(self.moderator["id"]): member_payload(self.moderator, [int(self.mod_role["id"])]),
+            BOT_ID: member_payload(fake.bot_user, [int(self.admin_role["id"])]),
+        }
+        for user in self.users:
+            self.members[int(user["id"])] = member_payload(user)
+        for member in self.members.values():
+            fake.users[int(member["user"]["id"])] = member["user"]
+            fake.members[(self.id, int(member["user"]["id"]))] = member
+        self.invites = [
+            {"code": f"inv{i}", "uses": 0, "max_uses": 0, "max_age": 0, "temporary": False, "type": 0,
+             "created_at": EPOCH.isoformat(), "inviter": self.users[i % len(self.users)] if self.users else self.owner,
+             "guild": {"id": str(self.id), "name": "Bench", "icon": None, "features": []},
+             "channel": {"id": self.general["id"], "name": "général", "type": 0}}
+            for i in range(5)
+        ]
+        fake.invites[self.id] = self.invites
+
+    def payload(self) -> dict:
+        return {
+            "id": str(self.id), "name": "Bench", "icon": None, "owner_id": self.owner["id"], "unavailable": False,
+            "roles": [self.everyone_role, self.admin_role, self.mod_role, *self.extra_roles],
+            "channels": self.channels, "members": list(self.members.values()), "member_count": len(self.members),
+            "large": False, "emojis": [], "stickers": [], "features": [], "threads": [], "voice_states": [],
+            "presences": [], "verification_level": 0, "default_message_notifications": 0, "explicit_content_filter": 0,
+            "mfa_level": 0, "afk_timeout": 300, "system_channel_flags": 0, "premium_tier": 0, "nsfw_level": 0,
+            "preferred_locale": "fr", "joined_at": EPOCH.isoformat(),
+        }
+
+    def new_user(self) -> dict:
+        user = user_payload(self.fake.next_id(), "arrivant")
+        self.fake.users[int(user["id"])] = user
+        self.fake.members[(self.id, int(user["id"]))] = member_payload(user)
+        return user
+
+    # -- événements gateway (t, d)
+
+    def reaction_add(self, message_id: int, channel_id: int, user: dict, emoji: str) -> tuple[str, dict]:
+        member = self.fake.members.get((self.id, int(user["id"])))
+        self.fake.reactions[message_id][emoji].append(user)
+        return "MESSAGE_REACTION_ADD", {
+            "user_id": user["id"], "channel_id": str(channel_id), "message_id": str(message_id), "guild_id": str(self.id),
+            "emoji": {"id": None, "name": emoji}, "member": member, "burst": False, "type": 0, "message_author_id": str(BOT_ID),
+        }
+
+    def reaction_remove(self, message_id: int, channel_id: int, user: dict, emoji: str) -> tuple[str, dict]:
+        users = self.fake.reactions[message_id][emoji]
+        if user in users:
+            users.remove(user)
+        return "MESSAGE_REACTION_REMOVE", {
+            "user_id": user["id"], "channel_id": str(channel_id), "message_id": str(message_id), "guild_id": str(self.id),
+            "emoji": {"id": None, "name": emoji}, "burst": False, "type": 0,
+        }
+
+    def member_join(self, invite_index: int = 0) -> tuple[str, dict]:
+        # Discord incrémente les utilisations de l'invitation avant l'événement
+        if self.invites:
+            self.invites[invite_index % len(self.invites)]["uses"] += 1
+        user = self.new_user()
+        return "GUILD_MEMBER_ADD", {**member_payload(user), "guild_id": str(self.id)}
+
+    def _interaction(self, type: int, user: dict, channel: dict, data: dict, message: dict | None = None) -> tuple[str, dict]:
+        member = self.members.get(int(user["id"])) or member_payload(user)
+        permissions = self._permissions(member)
+        payload = {
+            "id": str(self.fake.next_id()), "application_id": str(BOT_ID), "type": type, "data": data,
+            "guild_id": str(self.id), "channel_id": channel["id"], "channel": channel,
+            "member": {**member, "permissions": str(permissions)}, "token": f"tok{self.fake.next_id()}", "version": 1,
+            "locale": "fr", "guild_locale": "fr", "app_permissions": str(discord.Permissions.all().value),
+            "entitlements": [], "attachment_size_limit": 8 * 1024 * 1024,
+        }
+        if message is not None:
+            payload["message"] = message
+        return "INTERACTION_CREATE", payload
+
+    def _permissions(self, member: dict) -> int:
+        if member["user"]["id"] == self.owner["id"]:
+            return discord.Permissions.all().value
+        value = int(self.everyone_role["permissions"])
+        roles = {r["id"]: r for r in (self.admin_role, self.mod_role, *self.extra_roles)}
+        for role_id in member["roles"]:
+            value |= int(roles[role_id]["permissions"]) if role_id in roles else 0
+        return value
+
+    def slash(self, name: str, user: dict, where: dict | None = None, subcommand: str | None = None, **options) -> tuple[str, dict]:
+        """Commande slash ; les options Member/Role/Channel sont résolues comme le fait Discord"""
+        resolved = {"users": {}, "members": {}, "roles": {}, "channels": {}}
+        built = []
+        for key, value in options.items():
+            if isinstance(value, dict) and "username" in value:
+                resolved["users"][value["id"]] = value
+                member = self.fake.members.get((self.id, int(value["id"])))
+                if member is not None:
+                    resolved["members"][value["id"]] = {k: v for k, v in member.items() if k != "user"} | {"permissions": str(self._permissions(member))}
+                built.append({"name": key, "type": 6, "value": value["id"]})
+            elif isinstance(value, dict) and "position" in value and "permissions" in value:
+                resolved["roles"][value["id"]] = value
+                built.append({"name": key, "type": 8, "value": value["id"]})
+            elif isinstance(value, dict) and "type" in value:
+                resolved["channels"][value["id"]] = {**value, "permissions": str(discord.Permissions.all().value)}
+                built.append({"name": key, "type": 7, "value": value["id"]})
+            elif isinstance(value, bool):
+                built.append({"name": key, "type": 5, "value": value})
+            elif isinstance(value, int):
+                built.append({"name": key, "type": 4, "value": value})
+            else:
+                built.append({"name": key, "type": 3, "value": value})
+        if subcommand:
+            built = [{"name": subcommand, "type": 1, "options": built}]
+        data = {"id": str(self.fake.next_id()), "name": name, "type": 1, "options": built, "resolved": resolved, "guild_id": str(self.id)}
+        return self._interaction(2, user, where or self.general, data)
+
+    def button(self, custom_id: str, user: dict, channel: dict, message_id: int | None = None) -> tuple[str, dict]:
+        message = message_payload(message_id or self.fake.next_id(), int(channel["id"]), self.id, self.fake.bot_user)
+        return self._interaction(3, user, channel, {"custom_id": custom_id, "component_type": 2}, message=message)
+
+
+# ---------------------------------------------------------------- harnais
+
+class ScenarioResult:
+    def __init__(self, name: str):
+        self.name = name
+        self.events = 0
+        self.elapsed = 0.0
+        self.latencies: dict[str, list[float]] = collections.defaultdict(list)
+        self.calls: collections.Counter[str] = collections.Counter()
+        self.unmodeled: collections.Counter[str] = collections.Counter()
+        self.errors: collections.Counter[str] = collections.Counter()
+        self.timeouts = 0
+
+    @property
+    def all_latencies(self) -> list[float]:
+        return [value for values in self.latencies.values() for value in values]
+
+    def render(self, top: int = 8) -> str:
+        latencies = self.all_latencies
+        throughput = self.events / self.elapsed if self.elapsed else 0.0
+        lines = [
+            f"── {self.name}: {self.events} événements en {self.elapsed:.2f}s ({throughput:.0f} evt/s), "
+            f"{sum(self.calls.values())} appels REST, {sum(self.errors.values())} erreurs" + (f", {self.timeouts} non terminés" if self.timeouts else ""),
+            f"   latence handlers p50 {percentile(latencies, 0.5) * 1000:.1f}ms  p99 {percentile(latencies, 0.99) * 1000:.1f}ms  max {max(latencies, default=0) * 1000:.1f}ms",
+        ]
+        for kind, values in sorted(self.latencies.items()):
+            lines.append(f"   {kind:<34} n={len(values):<6} p50 {percentile(values, 0.5) * 1000:7.1f}ms  p99 {percentile(values, 0.99) * 1000:7.1f}ms")
+        for route, count in self.calls.most_common(top):
+            lines.append(f"   REST {count:>6}  {route}" + ("  (non modélisée)" if route in self.unmodeled else ""))
+        for name, count in self.errors.most_common(top):
+            lines.append(f"   ERREUR {count:>4}  {name}")
+        return "\n".join(lines)
+
+    def to_dict(self) -> dict:
+        latencies = self.all_latencies
+        return {
+            "scenario": self.name, "events": self.events, "elapsed": self.elapsed,
+            "throughput": self.events / self.elapsed if self.elapsed else 0.0,
+            "p50": percentile(latencies, 0.5), "p99": percentile(latencies, 0.99), "max": max(latencies, default=0.0),
+            "rest_calls": dict(self.calls), "errors": dict(self.errors),
+        }
+
+
+class _ErrorCounter(logging.Handler):
+    def __init__(self):
+        super().__init__(logging.ERROR)
+        self.by_logger: collections.Counter[str] = collections.Counter()
+
+    def emit(self, record):
+        self.by_logger[record.name] += 1
+
+
+class Harness:
+    """Démarre le vrai bot hors ligne et lui rejoue des flux d'événements gateway"""
+
+    def __init__(self, rest_latency: float = 0.0, members: int = 200, workdir: str | None = None, quiet: bool = True):
+        self.fake = FakeDiscord(rest_latency)
+        self.members = members
+        self.quiet = quiet
+        self._tmp = None if workdir else tempfile.TemporaryDirectory(prefix="bot-bench-")
+        self.workdir = workdir or self._tmp.name
+        self._capture: list[asyncio.Task] | None = None
+        self._errors = _ErrorCounter()
+        self.bot = None
+        self.guild: GuildFixture | None = None
+
+    async def start(self):
+        # La base et les fichiers du bot sont créés dans le dossier courant : isoler le banc
+        self._cwd = os.getcwd()
+        os.chdir(self.workdir)
+        os.environ.pop("METRICS_PORT", None)
+        os.environ.pop("PORT", None)
+        os.environ.pop("DATABASE_PATH", None)
+        # Un bot neuf à chaque démarrage (le module crée le bot à l'import)
+        for name in [name for name in sys.modules if name == "python_bot" or name.startswith("cogs.")]:
+            del sys.modules[name]
+        import python_bot
+
+        root = logging.getLogger()
+        self._handlers = root.handlers[:]
+        if self.quiet:
+            # Les erreurs sont comptées et résumées dans le rapport plutôt qu'affichées
+            for handler in self._handlers:
+                root.removeHandler(handler)
+        root.addHandler(self._errors)
+
+        self.bot = bot = python_bot.bot
+        http = FakeHTTP(self.fake, asyncio.get_running_loop())
+        bot.http = http
+        bot._connection.http = http
+        async_context.set(FakeWebhookAdapter(self.fake))
+
+        loop = asyncio.get_running_loop()
+        loop.set_task_factory(self._task_factory)
+        self.fake.gateway = lambda t, d: loop.call_soon(self.dispatch, t, d)
+
+        await bot.__aenter__()
+        # Vrai login : GET /users/@me et /oauth2/applications/@me, puis le vrai setup_hook
+        await bot.login("bench-token")
+
+        self.guild = GuildFixture(self.fake, members=self.members)
+        await self.run_events([("GUILD_CREATE", self.guild.payload())], name="guild_create")
+        # Fin du READY (sans on_ready, qui synchroniserait les commandes) : débloque wait_until_ready
+        bot._handle_ready()
+
+    async def close(self):
+        if self.bot is not None:
+            with contextlib.suppress(Exception):
+                await self.bot.close()
+            await self.bot.__aexit__(None, None, None)
+            await self.bot.storage.close()
+        root = logging.getLogger()
+        root.removeHandler(self._errors)
+        for handler in self._handlers:
+            if handler not in root.handlers:
+                root.addHandler(handler)
+        os.chdir(self._cwd)
+        if self._tmp is not None:
+            self._tmp.cleanup()
+
+    def _task_factory(self, loop, coro, **kwargs):
+        task = asyncio.Task(coro, loop=loop, **kwargs)
+        if self._capture is not None:
+            self._capture.append(task)
+        return task
+
+    def dispatch(self, event: str, data: dict) -> list[asyncio.Task]:
+        """Injecte un événement gateway et renvoie les tâches de handlers qu'il a lancées"""
+        self._capture = []
+        try:
+            self.bot._connection.parsers[event](data)
+        finally:
+            tasks, self._capture = self._capture, None
+        return tasks
+
+    async def run_events(self, events, name: str = "scenario", rate: float | None = None, timeout: float = 30.0) -> ScenarioResult:
+        """Rejoue une suite de (t, d) et attend la fin des handlers directement déclenchés"""
+        result = ScenarioResult(name)
+        self.fake.reset_counters()
+        errors_before = collections.Counter(self._errors.by_logger)
+        loop = asyncio.get_running_loop()
+        pending: set[asyncio.Task] = set()
+        start = loop.time()
+
+        def done(kind: str, injected: float, tasks: list[asyncio.Task]):
+            remaining = [len(tasks)]
+
+            def callback(_task):
+                remaining[0] -= 1
+                if remaining[0] == 0:
+                    result.latencies[kind].append(loop.time() - injected)
+            return callback
+
+        for index, (event, data) in enumerate(events):
+            if rate:
+                delay = start + index / rate - loop.time()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            injected = loop.time()
+            tasks = self.dispatch(event, data)
+            result.events += 1
+            if tasks:
+                callback = done(self._kind(event, data), injected, tasks)
+                for task in tasks:
+                    task.add_done_callback(callback)
+                pending.update(tasks)
+            if index % 256 == 255:
+                # Laisser tourner la boucle comme le ferait la lecture du websocket
+                await asyncio.sleep(0)
+
+        if pending:
+            _, still_running = await asyncio.wait(pending, timeout=timeout)
+            result.timeouts = len(still_running)
+        result.elapsed = loop.time() - start
+        result.calls = collections.Counter(self.fake.calls)
+        result.unmodeled = collections.Counter(self.fake.unmodeled)
+        result.errors = self._errors.by_logger - errors_before
+        return result
+
+    @staticmethod
+    def _kind(event: str, data: dict) -> str:
+        if event == "INTERACTION_CREATE":
+            inner = data.get("data") or {}
+            if data.get("type") == 3:
+                return f"bouton {inner.get('custom_id')}"
+            name = inner.get("name", "?")
+            options = inner.get("options") or []
+            if options and options[0].get("type") in (1, 2):
+                name += f" {options[0]['name']}"
+            return f"/{name}"
+        return event
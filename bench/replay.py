@@ -0,0 +1,177 @@
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+
+# Rejoue des scénarios de charge sur le vrai bot hors ligne (voir bench/harness.py).
+#
+#   python bench/replay.py                          # tous les scénarios
+#   python bench/replay.py reactions joins -n 2000  # scénarios choisis
+#   python bench/replay.py tickets --rest-latency 40 --record tickets.jsonl
+#   python bench/replay.py --replay tickets.jsonl
+#
+# Un flux enregistré est un fichier JSON lines de trames gateway {"t", "d", "phase"} ; la phase
+# "setup" est rejouée sans être mesurée. Les identifiants de la fixture sont déterministes,
+# un flux enregistré se rejoue donc sur une fixture de même taille (--members).
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench.harness import Harness  # noqa: E402
+
+GW_REACTION = "🎉"
+
+
+async def _setup(h: Harness, recorder: list, events: list):
+    recorder.extend({"t": t, "d": d, "phase": "setup"} for t, d in events)
+    await h.run_events(events, name="setup")
+
+
+async def scenario_reactions(h: Harness, n: int, recorder: list) -> list:
+    """Tempête de réactions sur les messages de rôles réactifs (/role)"""
+    from cogs import roles
+    g = h.guild
+    await _setup(h, recorder, [g.slash("role", g.owner, where=g.roles_channel)])
+    cog = h.bot.get_cog("Roles")
+    targets = [(cog.message_id_genre, roles.EMOJI_HOMME), (cog.message_id_genre, roles.EMOJI_FEMME),
+               (cog.message_id_age, roles.EMOJI_MINEUR), (cog.message_id_age, roles.EMOJI_MAJEUR)]
+    rng = random.Random(1)
+    events = []
+    for _ in range(n):
+        message_id, emoji = rng.choice(targets)
+        user = rng.choice(g.users)
+        if rng.random() < 0.2:
+            events.append(g.reaction_remove(message_id, int(g.roles_channel["id"]), user, emoji))
+        else:
+            events.append(g.reaction_add(message_id, int(g.roles_channel["id"]), user, emoji))
+    return events
+
+
+async def scenario_giveaway(h: Harness, n: int, recorder: list) -> list:
+    """Participations en masse à un giveaway (/gw create puis réactions 🎉)"""
+    g = h.guild
+    await _setup(h, recorder, [g.slash("gw", g.moderator, subcommand="create", prize="Nitro", duration="2h", winners=1)])
+    message_id = next(iter(h.bot.get_cog("Giveaways").active))
+    rng = random.Random(2)
+    return [g.reaction_add(message_id, int(g.general["id"]), rng.choice(g.users), GW_REACTION) for _ in range(n)]
+
+
+async def scenario_joins(h: Harness, n: int, recorder: list) -> list:
+    """Vague d'arrivées (rôle membre, attribution d'invitation, message de bienvenue)"""
+    g = h.guild
+    return [g.member_join(invite_index=i) for i in range(n)]
+
+
+async def scenario_tickets(h: Harness, n: int, recorder: list) -> list:
+    """Création de tickets via le bouton du panneau (/ticket setup puis clics)"""
+    g = h.guild
+    await _setup(h, recorder, [g.slash("ticket", g.owner, where=g.panel, subcommand="setup",
+                                       channel=g.panel, category=g.category, preset="support")])
+    return [g.button("create_ticket", g.users[i % len(g.users)], g.panel) for i in range(n)]
+
+
+async def scenario_moderation(h: Harness, n: int, recorder: list) -> list:
+    """Avertissements et consultations (/warn, /warnings)"""
+    g = h.guild
+    rng = random.Random(3)
+    events = []
+    for i in range(n):
+        target = rng.choice(g.users)
+        if i % 4 == 3:
+            events.append(g.slash("warnings", g.moderator, member=target))
+        else:
+            events.append(g.slash("warn", g.moderator, member=target, reason="Spam"))
+    return events
+
+
+async def scenario_commands(h: Harness, n: int, recorder: list) -> list:
+    """Commandes courantes sans état (/avatar, /userinfo, /serverinfo, /8ball, /dice)"""
+    g = h.guild
+    rng = random.Random(4)
+    builders = [
+        lambda u: g.slash("avatar", u),
+        lambda u: g.slash("userinfo", u, member=rng.choice(g.users)),
+        lambda u: g.slash("serverinfo", u),
+        lambda u: g.slash("8ball", u, question="Ça marche ?"),
+        lambda u: g.slash("dice", u),
+    ]
+    return [rng.choice(builders)(rng.choice(g.users)) for _ in range(n)]
+
+
+async def scenario_mixed(h: Harness, n: int, recorder: list) -> list:
+    """Mélange des scénarios précédents, entrelacés"""
+    parts = [await scenario(h, n // 5, recorder) for scenario in
+             (scenario_reactions, scenario_giveaway, scenario_joins, scenario_moderation, scenario_commands)]
+    rng = random.Random(5)
+    events = [event for part in parts for event in part]
+    rng.shuffle(events)
+    return events
+
+
+SCENARIOS = {
+    "reactions": scenario_reactions,
+    "giveaway": scenario_giveaway,
+    "joins": scenario_joins,
+    "tickets": scenario_tickets,
+    "moderation": scenario_moderation,
+    "commands": scenario_commands,
+    "mixed": scenario_mixed,
+}
+
+
+async def run(args) -> list[dict]:
+    results = []
+    if args.replay:
+        with open(args.replay, "r", encoding="utf-8") as f:
+            frames = [json.loads(line) for line in f if line.strip()]
+        jobs = [(os.path.basename(args.replay), frames)]
+    else:
+        jobs = [(name, None) for name in args.scenarios or SCENARIOS]
+
+    for name, frames in jobs:
+        # Un bot neuf par scénario : les états (tickets, avertissements...) ne se mélangent pas
+        h = Harness(rest_latency=args.rest_latency / 1000, members=args.members)
+        await h.start()
+        try:
+            if frames is not None:
+                setup = [(f["t"], f["d"]) for f in frames if f.get("phase") == "setup"]
+                events = [(f["t"], f["d"]) for f in frames if f.get("phase") != "setup"]
+                await h.run_events(setup, name="setup")
+            else:
+                recorder: list = []
+                events = await SCENARIOS[name](h, args.events, recorder)
+                if args.record:
+                    path = args.record if len(jobs) == 1 else f"{name}-{args.record}"
+                    with open(os.path.join(h._cwd, path), "w", encoding="utf-8") as f:
+                        for frame in recorder + [{"t": t, "d": d, "phase": "run"} for t, d in events]:
+                            f.write(json.dumps(frame, ensure_ascii=False) + "\n")
+            result = await h.run_events(events, name=name, rate=args.rate)
+        finally:
+            await h.close()
+        print(result.render(), flush=True)
+        results.append(result.to_dict())
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Test de charge hors ligne des cogs (fausse API Discord)")
+    parser.add_argument("scenarios", nargs="*", choices=[[], *SCENARIOS], metavar="scenario",
+                        help=f"scénarios à jouer ({', '.join(SCENARIOS)}) ; tous par défaut")
+    parser.add_argument("-n", "--events", type=int, default=1000, help="événements par scénario")
+    parser.add_argument("--members", type=int, default=500, help="membres de la guilde de test")
+    parser.add_argument("--rest-latency", type=float, default=0.0, help="latence simulée de chaque appel REST (ms)")
+    parser.add_argument("--rate", type=float, default=None, help="événements par seconde (défaut : au plus vite)")
+    parser.add_argument("--record", help="enregistre le flux généré (JSON lines)")
+    parser.add_argument("--replay", help="rejoue un flux enregistré au lieu des scénarios")
+    parser.add_argument("--json", help="écrit les résultats dans ce fichier JSON")
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args))
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
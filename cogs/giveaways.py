@@ -1,11 +1,36 @@
 import asyncio
 from datetime import datetime, timedelta, timezone
+import heapq
+import itertools
+import logging
+import math
 import random
+import time
 import discord
 from discord.ext import commands
 from discord import app_commands
 
+from core import serialization
+from core.entrants import EntrantSet
+
 GW_REACTION = "🎉"
+logger = logging.getLogger("bot.giveaways")
+# Compte à rebours : au-delà de COUNTDOWN_DETAIL secondes, <t:...:R> suffit et le message n'est
+# plus modifié ; en deçà, le reste est affiché à la minute puis par pas de 5 s la dernière minute
+COUNTDOWN_DETAIL = 600
+COUNTDOWN_SECONDS_STEP = 5
+# Participations : les réactions sont regroupées et appliquées au plus tard après
+# ENTRANT_BATCH_DELAY secondes, ou dès que ENTRANT_BATCH_MAX changements sont en attente
+ENTRANT_BATCH_DELAY = 0.05
+ENTRANT_BATCH_MAX = 500
+# Taille des lots de membres résolus au tirage (maximum accepté par la gateway)
+MEMBER_QUERY_BATCH = 100
+# Réconciliation : une nouvelle session gateway (READY, au démarrage ou après une session
+# invalidée) peut avoir perdu des réactions, alors qu'un RESUMED rejoue tout ce qui a été
+# manqué. Seuls les giveaways des shards concernés sont relus, en tâche de fond
+RECONCILE_CONCURRENCY = 2
+# Journal des participations : réécrit en instantané binaire au-delà de ce nombre de lignes
+ENTRANT_SNAPSHOT_ROWS = 5000
 
 
 def parse_duration(text: str) -> timedelta | None:
@@ -48,6 +73,17 @@ def format_timedelta(td: timedelta) -> str:
     return " ".join(parts)
 
 
+def countdown_suffix(remaining: float) -> tuple[str, float | None]:
+    """Texte « reste ... » à afficher et délai (s) avant qu'il change ; None s'il ne change plus"""
+    if remaining > COUNTDOWN_DETAIL:
+        return "", remaining - COUNTDOWN_DETAIL
+    step = 60 if remaining >= 60 else COUNTDOWN_SECONDS_STEP
+    shown = math.floor(remaining / step) * step
+    if shown <= 0:
+        return "", None
+    return f" (reste {format_timedelta(timedelta(seconds=shown))})", remaining - shown + 0.05
+
+
 def build_gw_embed(title: str, description: str, color: discord.Color, image_url: str | None = None) -> discord.Embed:
     embed = discord.Embed(title=title, description=description, color=color)
     embed.set_author(name="Giveaway", icon_url="https://cdn-icons-png.flaticon.com/512/942/942748.png")
@@ -61,59 +97,395 @@ class Giveaways(commands.Cog):
     def __init__(self, bot: commands.Bot):
         self.bot = bot
         self.active: dict[int, dict] = {}
+        # Un seul pilote pour les fins de giveaway et les comptes à rebours :
+        # tas (échéance, "end" | "render", message_id), l'entrée la plus récente fait foi
+        self._timers: list[tuple[float, str, int]] = []
+        self._timer_at: dict[tuple[str, int], float] = {}
+        self._rendered: dict[int, str] = {}
+        self._ending: set[int] = set()
+        # Tâches lancées par le pilote : tirages, et dernier rendu de chaque compte à rebours
+        self._end_tasks: set[asyncio.Task] = set()
+        self._renders: dict[int, asyncio.Task] = {}
+        self._timer_wakeup = asyncio.Event()
+        self._timer_task: asyncio.Task | None = None
+        # (message_id, user_id) -> participe ; le dernier événement fait foi
+        self._pending_entrants: dict[tuple[int, int], bool] = {}
+        self._entrants_flush: asyncio.TimerHandle | None = None
+        # Lignes de journal écrites depuis le dernier instantané, par giveaway
+        self._journal_size: dict[int, int] = {}
+        self._snapshots: set[int] = set()
+        # Coupures gateway en cours (shard -> début) et giveaways à relire après une session perdue
+        self._gaps: dict[int | None, float] = {}
+        self._stale: set[int] = set()
+        self._reconciling: dict[int, asyncio.Task] = {}
+        # Réactions reçues pendant la relecture d'un giveaway, rejouées sur son résultat
+        self._journal: dict[int, dict[int, bool]] = {}
+        self._reconcile_slots = asyncio.Semaphore(RECONCILE_CONCURRENCY)
 
-    async def schedule_end(self, message_id: int):
-        data = self.active.get(message_id)
-        if not data:
+    async def cog_load(self):
+        await self._load_active()
+        self._timer_task = asyncio.create_task(self._run_timers())
+
+    async def cog_unload(self):
+        if self._timer_task is not None:
+            self._timer_task.cancel()
+        for task in list(self._renders.values()):
+            task.cancel()
+        for task in list(self._reconciling.values()):
+            task.cancel()
+        self._apply_entrants()
+
+    def _owns_guild(self, guild_id: int) -> bool:
+        # En mode cluster, chaque processus ne reprend que les giveaways de ses shards
+        if self.bot.cluster is None:
+            return True
+        config = self.bot.cluster.config
+        return (guild_id >> 22) % config.shard_count in config.shard_ids
+
+    async def _load_active(self):
+        """Recharge les giveaways en cours ; ceux terminés hors ligne sont tirés dès que le bot est prêt"""
+        try:
+            # Participations enregistrées après la suppression de leur giveaway
+            await self.bot.storage.execute(
+                "DELETE FROM giveaway_entrants WHERE message_id NOT IN (SELECT message_id FROM giveaways)")
+            rows = await self.bot.storage.fetchall("SELECT * FROM giveaways")
+            journal = await self.bot.storage.fetchall("SELECT message_id, user_id, entered FROM giveaway_entrants")
+        except Exception as e:
+            logger.error(f"Erreur lecture des giveaways: {e}")
             return
-        now = datetime.now(timezone.utc)
-        remaining = (data['end_at'] - now).total_seconds()
-        if remaining > 0:
-            try:
-                await asyncio.sleep(remaining)
-            except Exception:
-                pass
-        # fetch message
+        for row in rows:
+            if not self._owns_guild(row['guild_id']):
+                continue
+            self.active[row['message_id']] = {
+                'message_id': row['message_id'],
+                'guild_id': row['guild_id'],
+                'channel_id': row['channel_id'],
+                'host_id': row['host_id'],
+                'prize': row['prize'],
+                'end_at': datetime.fromisoformat(row['end_at']),
+                'entrants': EntrantSet.from_bytes(row['entrants']),
+                'winners_count': row['winners_count'],
+                'image_url': row['image_url'],
+                'is_fast': bool(row['is_fast']),
+                'preferred_winners': set(serialization.loads(row['preferred_winners'])),
+                'manual': bool(row['manual']),
+            }
+        replayed = set()
+        for row in journal:
+            data = self.active.get(row['message_id'])
+            if data is None:
+                continue
+            if row['entered']:
+                data['entrants'].add(row['user_id'])
+            else:
+                data['entrants'].discard(row['user_id'])
+            replayed.add(row['message_id'])
+        # Journal rejoué : il est replié dans l'instantané
+        for message_id in replayed:
+            await self._save_giveaway(self.active[message_id])
+        for message_id in self.active:
+            self.schedule_end(message_id)
+            self.schedule_countdown(message_id)
+        if self.active:
+            logger.info(f"{len(self.active)} giveaway(s) repris")
+
+    async def _save_giveaway(self, data: dict):
+        """Écrit un giveaway avec l'instantané de ses participants, et vide son journal"""
+        message_id = data['message_id']
+        # Le journal déjà en attente doit être écrit avant d'être effacé (l'instantané le contient)
+        await self.bot.storage.flush()
+        # Tirage commencé entre-temps : la ligne est supprimée, ne pas la recréer
+        if self.active.get(message_id) is not data or message_id in self._ending:
+            return
+        self._journal_size.pop(message_id, None)
+        try:
+            await self.bot.storage.write(
+                ("INSERT OR REPLACE INTO giveaways (message_id, guild_id, channel_id, host_id, prize, end_at, "
+                 "winners_count, image_url, is_fast, preferred_winners, entrants, manual) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                 (message_id, data['guild_id'], data['channel_id'], data['host_id'], data['prize'],
+                  data['end_at'].isoformat(), data['winners_count'], data.get('image_url'), int(bool(data.get('is_fast'))),
+                  serialization.dumps(sorted(data['preferred_winners'])), data['entrants'].to_bytes(),
+                  int(bool(data.get('manual'))))),
+                ("DELETE FROM giveaway_entrants WHERE message_id = ?", (message_id,)),
+            )
+        except Exception as e:
+            logger.error(f"Erreur sauvegarde du giveaway {message_id}: {e}")
+
+    async def _snapshot(self, message_id: int):
+        try:
+            data = self.active.get(message_id)
+            if data is not None:
+                await self._save_giveaway(data)
+        finally:
+            self._snapshots.discard(message_id)
+
+    def _save_entrant(self, message_id: int, user_id: int, entered: bool):
+        # Écriture différée : une réaction ajoutée puis retirée ne coûte qu'une écriture
+        self.bot.storage.defer("giveaway_entrants", (message_id, user_id), (
+            "INSERT OR REPLACE INTO giveaway_entrants (message_id, user_id, entered) VALUES (?, ?, ?)",
+            (message_id, user_id, int(entered))
+        ))
+        size = self._journal_size[message_id] = self._journal_size.get(message_id, 0) + 1
+        if size > ENTRANT_SNAPSHOT_ROWS and message_id not in self._snapshots:
+            self._snapshots.add(message_id)
+            asyncio.create_task(self._snapshot(message_id))
+
+    def _queue_entrant(self, message_id: int, user_id: int, entered: bool):
+        self._pending_entrants[(message_id, user_id)] = entered
+        if len(self._pending_entrants) >= ENTRANT_BATCH_MAX:
+            self._apply_entrants()
+        elif self._entrants_flush is None:
+            self._entrants_flush = asyncio.get_running_loop().call_later(ENTRANT_BATCH_DELAY, self._apply_entrants)
+
+    def _apply_entrants(self):
+        """Applique les réactions en attente aux listes de participants"""
+        if self._entrants_flush is not None:
+            self._entrants_flush.cancel()
+            self._entrants_flush = None
+        pending, self._pending_entrants = self._pending_entrants, {}
+        for (message_id, user_id), entered in pending.items():
+            data = self.active.get(message_id)
+            if data is None or data.get('manual'):
+                continue
+            if entered:
+                data['entrants'].add(user_id)
+            else:
+                data['entrants'].discard(user_id)
+            self._save_entrant(message_id, user_id, entered)
+            journal = self._journal.get(message_id)
+            if journal is not None:
+                journal[user_id] = entered
+
+    def _sharded(self) -> bool:
+        return isinstance(self.bot, discord.AutoShardedClient)
+
+    def _on_shard(self, guild_id: int, shard_id: int | None) -> bool:
+        return shard_id is None or (guild_id >> 22) % (self.bot.shard_count or 1) == shard_id
+
+    def _session_started(self, shard_id: int | None):
+        """Nouvelle session : les giveaways du shard ont pu manquer des réactions"""
+        since = self._gaps.pop(shard_id, None)
+        stale = [mid for mid, data in self.active.items()
+                 if self._on_shard(data['guild_id'], shard_id) and not data.get('manual')]
+        self._stale.update(stale)
+        if stale:
+            gap = f" après {format_timedelta(timedelta(seconds=time.time() - since))} de coupure" if since else ""
+            logger.info(f"Nouvelle session gateway{gap} : {len(stale)} giveaway(s) à réconcilier")
+
+    def _reconcile_stale(self, shard_id: int | None):
+        for message_id in list(self._stale):
+            data = self.active.get(message_id)
+            if data is not None and self._on_shard(data['guild_id'], shard_id):
+                self._reconciliation(message_id)
+
+    def _reconciliation(self, message_id: int) -> asyncio.Task:
+        task = self._reconciling.get(message_id)
+        if task is None:
+            task = self._reconciling[message_id] = asyncio.create_task(self._reconcile(message_id))
+            task.add_done_callback(lambda _: self._reconciling.pop(message_id, None))
+        return task
+
+    async def _reconcile(self, message_id: int):
+        async with self._reconcile_slots:
+            # Marqué à nouveau pendant la relecture (autre coupure) : on recommence
+            while message_id in self._stale and message_id in self.active:
+                self._stale.discard(message_id)
+                try:
+                    await self._reconcile_once(message_id)
+                except Exception as e:
+                    logger.error(f"Erreur réconciliation du giveaway {message_id}: {e}")
+                    return
+
+    async def _reconcile_once(self, message_id: int):
+        """Relit les réactions 🎉 et corrige la liste de participants tenue en direct"""
+        data = self.active[message_id]
         channel = self.bot.get_channel(data['channel_id'])
         if channel is None:
-            self.active.pop(message_id, None)
             return
+        self._apply_entrants()
+        entrants = data['entrants']
+        journal = self._journal[message_id] = {}
+        found: set[int] = set()
         try:
             msg = await channel.fetch_message(message_id)
-        except Exception:
-            self.active.pop(message_id, None)
-            return
-        # collect entrants by scanning reactions
-        entrants_set = set(data['entrants'])
-        for reaction in msg.reactions:
-            try:
+            for reaction in msg.reactions:
                 if (reaction.emoji == GW_REACTION) or (getattr(reaction.emoji, 'name', None) == GW_REACTION):
                     async for user in reaction.users():
                         if not user.bot:
-                            entrants_set.add(user.id)
-            except Exception:
-                pass
-        entrants = list(entrants_set)
-        if not entrants:
+                            found.add(user.id)
+            self._apply_entrants()
+        finally:
+            del self._journal[message_id]
+        # Gagnants choisis à la main (/gw start) pendant la relecture : rien à corriger
+        if data['entrants'] is not entrants:
+            return
+        for user_id, entered in journal.items():
+            if entered:
+                found.add(user_id)
+            else:
+                found.discard(user_id)
+        added = [user_id for user_id in found if user_id not in entrants]
+        removed = [user_id for user_id in entrants if user_id not in found]
+        for user_id in added:
+            entrants.add(user_id)
+            self._save_entrant(message_id, user_id, True)
+        for user_id in removed:
+            entrants.discard(user_id)
+            self._save_entrant(message_id, user_id, False)
+        if added or removed:
+            logger.info(f"Giveaway {message_id} réconcilié : +{len(added)} / -{len(removed)} participant(s)")
+
+    async def _delete_giveaway(self, message_id: int):
+        try:
+            await self.bot.storage.flush()
+            await self.bot.storage.write(
+                ("DELETE FROM giveaways WHERE message_id = ?", (message_id,)),
+                ("DELETE FROM giveaway_entrants WHERE message_id = ?", (message_id,)),
+            )
+        except Exception as e:
+            logger.error(f"Erreur suppression du giveaway {message_id}: {e}")
+
+    async def _finish(self, message_id: int):
+        self.active.pop(message_id, None)
+        self._journal_size.pop(message_id, None)
+        self._stale.discard(message_id)
+        await self._delete_giveaway(message_id)
+
+    def _schedule(self, kind: str, message_id: int, at: float):
+        self._timer_at[(kind, message_id)] = at
+        heapq.heappush(self._timers, (at, kind, message_id))
+        self._timer_wakeup.set()
+
+    def schedule_end(self, message_id: int):
+        data = self.active.get(message_id)
+        if data:
+            self._schedule("end", message_id, data['end_at'].timestamp())
+
+    def schedule_countdown(self, message_id: int, delay: float = 0):
+        self._schedule("render", message_id, time.time() + delay)
+
+    async def _run_timers(self):
+        # Les salons ne sont résolus qu'après le GUILD_CREATE
+        await self.bot.wait_until_ready()
+        while True:
+            self._timer_wakeup.clear()
+            if not self._timers:
+                await self._timer_wakeup.wait()
+                continue
+            delay = self._timers[0][0] - time.time()
+            if delay > 0:
+                try:
+                    await asyncio.wait_for(self._timer_wakeup.wait(), timeout=delay)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            while self._timers and self._timers[0][0] <= time.time():
+                at, kind, message_id = heapq.heappop(self._timers)
+                # Entrée remplacée par une reprogrammation plus récente
+                if self._timer_at.get((kind, message_id)) != at:
+                    continue
+                del self._timer_at[(kind, message_id)]
+                if kind == "end":
+                    # Le tirage peut attendre un DM (FAST) : il ne bloque pas le pilote
+                    task = asyncio.create_task(self.end_giveaway(message_id))
+                    self._end_tasks.add(task)
+                    task.add_done_callback(self._end_tasks.discard)
+                else:
+                    # Un rendu lent (rate limit) ne retarde ni les fins ni les autres rendus
+                    self._start_render(message_id)
+
+    def _start_render(self, message_id: int):
+        """Lance le rendu du compte à rebours, après le précédent encore en cours pour ce giveaway"""
+        previous = self._renders.get(message_id)
+        task = self._renders[message_id] = asyncio.create_task(self._render_after(previous, message_id))
+
+        def done(finished: asyncio.Task):
+            if self._renders.get(message_id) is finished:
+                del self._renders[message_id]
+        task.add_done_callback(done)
+
+    async def _render_after(self, previous: asyncio.Task | None, message_id: int):
+        if previous is not None:
+            # Attend sans propager l'annulation ni l'erreur du rendu précédent
+            await asyncio.wait({previous})
+        await self.render_countdown(message_id)
+
+    async def end_giveaway(self, message_id: int):
+        data = self.active.get(message_id)
+        if not data or message_id in self._ending:
+            return
+        self._ending.add(message_id)
+        try:
+            await self._end_giveaway(message_id, data)
+        finally:
+            self._ending.discard(message_id)
+
+    async def _resolve_members(self, guild: discord.Guild, user_ids: list[int]):
+        # Membres absents du cache : une requête gateway par lot, aucun appel REST
+        missing = [uid for uid in user_ids if guild.get_member(uid) is None]
+        if not missing or guild.chunked:
+            return
+        try:
+            await guild.query_members(user_ids=missing, limit=len(missing), cache=True)
+        except Exception as e:
+            logger.warning(f"Résolution de {len(missing)} membre(s) impossible ({guild.id}): {e}")
+
+    async def _pick_winners(self, data: dict, count: int) -> list[int]:
+        """Tire au plus `count` gagnants, pré-sélectionnés d'abord, en écartant les bots"""
+        preferred_ids = data.get('preferred_winners', set())
+        preferred = [uid for uid in preferred_ids if uid in data['entrants']]
+        random.shuffle(preferred)
+        # Tirage paresseux : seuls les candidats parcourus sont matérialisés
+        candidates = itertools.chain(preferred, (uid for uid in data['entrants'].shuffled() if uid not in preferred_ids))
+        guild = self.bot.get_guild(data['guild_id'])
+        winners: list[int] = []
+        # Les bots ne sont vérifiés que pour les candidats tirés, par lots
+        while batch := list(itertools.islice(candidates, MEMBER_QUERY_BATCH)):
+            if guild is not None:
+                await self._resolve_members(guild, batch)
+            for uid in batch:
+                member = guild.get_member(uid) if guild is not None else None
+                if member is not None and member.bot:
+                    continue
+                winners.append(uid)
+                if len(winners) >= count:
+                    return winners
+        return winners
+
+    async def _end_giveaway(self, message_id: int, data: dict):
+        # plus de compte à rebours : le message passe à l'état terminé
+        self._timer_at.pop(("render", message_id), None)
+        self._rendered.pop(message_id, None)
+        channel = self.bot.get_channel(data['channel_id'])
+        if channel is None:
+            await self._finish(message_id)
+            return
+        # Participants tenus à jour par les réactions : ni fetch_message ni parcours des réactions
+        msg = channel.get_partial_message(message_id)
+        # Gagnants choisis par /gw start : la liste ne reçoit plus de réactions
+        if not data.get('manual'):
+            self._apply_entrants()
+            # Liste tenue en direct ; relue seulement si une coupure a pu faire perdre des réactions
+            if message_id in self._stale or message_id in self._reconciling:
+                await self._reconciliation(message_id)
+        winners_ids = await self._pick_winners(data, data['winners_count'])
+        if not winners_ids:
             embed = build_gw_embed(
                 title=f"{GW_REACTION} Giveaway terminé — Aucun gagnant",
                 description=f"Récompense: **{data['prize']}**\nAucune participation valide.",
                 color=discord.Color.red(),
                 image_url=data.get('image_url'),
             )
-            await msg.edit(embed=embed)
-            self.active.pop(message_id, None)
+            try:
+                await msg.edit(embed=embed)
+            except Exception:
+                pass
+            await self._finish(message_id)
             return
-        winners_count = min(data['winners_count'], len(entrants))
-        preferred = [uid for uid in entrants if uid in data.get('preferred_winners', set())]
-        others = [uid for uid in entrants if uid not in data.get('preferred_winners', set())]
-        winners_ids: list[int] = []
-        if preferred:
-            take = min(winners_count, len(preferred))
-            winners_ids.extend(random.sample(preferred, take))
-        if len(winners_ids) < winners_count and others:
-            winners_ids.extend(random.sample(others, winners_count - len(winners_ids)))
         winners_mentions = " ".join([f"<@{uid}>" for uid in winners_ids])
+        # Tirage fait : plus de participations (pas de lignes orphelines pendant l'attente du DM),
+        # et un redémarrage pendant cette attente ne doit pas retirer de gagnants
+        await self._finish(message_id)
 
         if data.get('is_fast'):
             announce = await channel.send(f"{GW_REACTION} Félicitations {winners_mentions} ! DM le bot pour valider ton gain.")
@@ -137,42 +509,54 @@ class Giveaways(commands.Cog):
             color=discord.Color.green(),
             image_url=data.get('image_url'),
         )
-        await msg.edit(embed=embed)
-        self.active.pop(message_id, None)
+        try:
+            await msg.edit(embed=embed)
+        except Exception as e:
+            logger.error(f"Erreur mise à jour du giveaway {message_id}: {e}")
 
-    async def schedule_countdown(self, message_id: int):
-        while message_id in self.active:
-            data = self.active[message_id]
-            channel = self.bot.get_channel(data['channel_id'])
-            if channel is None:
-                return
-            try:
-                msg = await channel.fetch_message(message_id)
-            except Exception:
-                return
-            remaining_td = max(timedelta(0), data['end_at'] - datetime.now(timezone.utc))
-            end_ts = int(data['end_at'].timestamp())
-            description = (
-                f"Récompense: **{data['prize']}**\n"
-                f"Fin: **<t:{end_ts}:R>** (reste {format_timedelta(remaining_td)})\n"
-                f"Gagnant(s): **{data['winners_count']}**\n"
-                f"Host: <@{data['host_id']}>"
-            )
-            embed = build_gw_embed(title=f"{GW_REACTION} GIVEAWAY", description=description, color=discord.Color.blurple(), image_url=data.get('image_url'))
-            try:
-                await msg.edit(embed=embed)
-            except Exception:
-                pass
-            await asyncio.sleep(1)
+    def countdown_description(self, data: dict) -> tuple[str, float | None]:
+        remaining = (data['end_at'] - datetime.now(timezone.utc)).total_seconds()
+        suffix, next_change = countdown_suffix(remaining)
+        end_ts = int(data['end_at'].timestamp())
+        description = (
+            f"Récompense: **{data['prize']}**\n"
+            f"Fin: **<t:{end_ts}:R>**{suffix}\n"
+            f"Gagnant(s): **{data['winners_count']}**\n"
+            f"Host: <@{data['host_id']}>"
+        )
+        return description, next_change
+
+    async def render_countdown(self, message_id: int) -> bool:
+        data = self.active.get(message_id)
+        if data is None:
+            self._rendered.pop(message_id, None)
+            return False
+        description, next_change = self.countdown_description(data)
+        if next_change is not None:
+            self.schedule_countdown(message_id, next_change)
+        # Texte affiché inchangé : pas d'appel REST
+        if self._rendered.get(message_id) == description:
+            return True
+        channel = self.bot.get_channel(data['channel_id'])
+        if channel is None:
+            return False
+        title = f"{GW_REACTION} GIVEAWAY" + (" (FAST)" if data.get('is_fast') else "")
+        embed = build_gw_embed(title=title, description=description, color=discord.Color.blurple(), image_url=data.get('image_url'))
+        try:
+            # Message partiel : édition directe, sans fetch_message préalable
+            await channel.get_partial_message(message_id).edit(embed=embed)
+        except discord.NotFound:
+            self._timer_at.pop(("render", message_id), None)
+            return False
+        except Exception:
+            return False
+        self._rendered[message_id] = description
+        return True
 
     async def create_gw_message(self, interaction: discord.Interaction, prize: str, td: timedelta, winners: int, image_url: str | None, is_fast: bool):
         end_at = datetime.now(timezone.utc) + td
-        description = (
-            f"Récompense: **{prize}**\n"
-            f"Fin dans: **{format_timedelta(td)}**\n"
-            f"Gagnant(s): **{winners}**\n"
-            f"Host: {interaction.user.mention}"
-        )
+        # Même texte que le compte à rebours : pas de modification tant qu'il ne change pas
+        description, _ = self.countdown_description({'prize': prize, 'end_at': end_at, 'winners_count': int(winners), 'host_id': interaction.user.id})
         embed = build_gw_embed(title=f"{GW_REACTION} GIVEAWAY" + (" (FAST)" if is_fast else ""), description=description, color=discord.Color.blurple(), image_url=image_url)
         await interaction.response.send_message(embed=embed)
         msg = await interaction.original_response()
@@ -182,19 +566,22 @@ class Giveaways(commands.Cog):
             pass
         data = {
             'message_id': msg.id,
+            'guild_id': interaction.guild.id,
             'channel_id': msg.channel.id,
             'host_id': interaction.user.id,
             'prize': prize,
             'end_at': end_at,
-            'entrants': set(),
+            'entrants': EntrantSet(),
             'winners_count': int(winners),
             'image_url': image_url,
             'is_fast': is_fast,
             'preferred_winners': set(),
         }
         self.active[msg.id] = data
-        asyncio.create_task(self.schedule_end(msg.id))
-        asyncio.create_task(self.schedule_countdown(msg.id))
+        self._rendered[msg.id] = description
+        await self._save_giveaway(data)
+        self.schedule_end(msg.id)
+        self.schedule_countdown(msg.id)
 
     # -------- slash command group
     group = app_commands.Group(name="gw", description="Giveaways professionnels")
@@ -242,7 +629,7 @@ class Giveaways(commands.Cog):
             return
         self.active[target]['end_at'] = datetime.now(timezone.utc)
         await interaction.response.send_message("Giveaway terminé manuellement.", ephemeral=True)
-        asyncio.create_task(self.schedule_end(target))
+        self.schedule_end(target)
 
     @group.command(name="edit", description="Modifier le dernier giveaway du salon")
     async def gw_edit(self, interaction: discord.Interaction, prize: str | None = None, duration: str | None = None, winners: int | None = None, image_url: str | None = None):
@@ -272,21 +659,14 @@ class Giveaways(commands.Cog):
             data['winners_count'] = int(winners)
         if image_url is not None:
             data['image_url'] = image_url
-        channel = self.bot.get_channel(data['channel_id'])
-        try:
-            msg = await channel.fetch_message(target)
-        except Exception:
+        await self._save_giveaway(data)
+        # Nouvelle durée : la fin est reprogrammée (l'ancienne échéance est ignorée)
+        self.schedule_end(target)
+        # L'image n'apparaît pas dans le texte comparé : forcer le rendu
+        self._rendered.pop(target, None)
+        if not await self.render_countdown(target):
             await interaction.response.send_message("Impossible de mettre à jour le message.", ephemeral=True)
             return
-        remaining = max(timedelta(0), data['end_at'] - datetime.now(timezone.utc))
-        description = (
-            f"Récompense: **{data['prize']}**\n"
-            f"Fin dans: **{format_timedelta(remaining)}**\n"
-            f"Gagnant(s): **{data['winners_count']}**\n"
-            f"Host: <@{data['host_id']}>"
-        )
-        embed = build_gw_embed(title=f"{GW_REACTION} GIVEAWAY", description=description, color=discord.Color.blurple(), image_url=data.get('image_url'))
-        await msg.edit(embed=embed)
         await interaction.response.send_message("Giveaway mis à jour.", ephemeral=True)
 
     @group.command(name="start", description="Choisir manuellement le(s) gagnant(s)")
@@ -307,11 +687,17 @@ class Giveaways(commands.Cog):
             return
         ids = [u.id for u in winners]
         data = self.active[target]
-        data['entrants'] = set(ids)
+        # Gagnants fixés : les réactions (en attente ou à venir) ne s'y ajoutent plus
+        for key in [key for key in self._pending_entrants if key[0] == target]:
+            del self._pending_entrants[key]
+        self._stale.discard(target)
+        data['manual'] = True
+        data['entrants'] = EntrantSet(ids)
         data['winners_count'] = len(ids)
         data['end_at'] = datetime.now(timezone.utc)
         await interaction.response.send_message("Gagnants sélectionnés. Fin immédiate.", ephemeral=True)
-        asyncio.create_task(self.schedule_end(target))
+        await self._save_giveaway(data)
+        self.schedule_end(target)
 
     @group.command(name="strat", description="Pré-sélectionner en cachette le(s) gagnant(s)")
     async def gw_strat(self, interaction: discord.Interaction, user1: discord.User, user2: discord.User | None = None, user3: discord.User | None = None, user4: discord.User | None = None, user5: discord.User | None = None):
@@ -329,29 +715,63 @@ class Giveaways(commands.Cog):
         data = self.active[target]
         data['preferred_winners'] = set([u.id for u in picks])
         await interaction.response.send_message("Gagnant(s) prédit(s). Ils seront privilégiés lors du tirage.", ephemeral=True)
+        await self._save_giveaway(data)
+
+    # gateway gap markers
+    @commands.Cog.listener()
+    async def on_disconnect(self):
+        if not self._sharded():
+            self._gaps.setdefault(None, time.time())
+
+    @commands.Cog.listener()
+    async def on_shard_disconnect(self, shard_id: int):
+        self._gaps.setdefault(shard_id, time.time())
+
+    @commands.Cog.listener()
+    async def on_resumed(self):
+        # Session reprise : Discord rejoue les événements manqués
+        if not self._sharded():
+            self._gaps.pop(None, None)
+
+    @commands.Cog.listener()
+    async def on_shard_resumed(self, shard_id: int):
+        self._gaps.pop(shard_id, None)
+
+    @commands.Cog.listener()
+    async def on_connect(self):
+        if not self._sharded():
+            self._session_started(None)
+
+    @commands.Cog.listener()
+    async def on_shard_connect(self, shard_id: int):
+        self._session_started(shard_id)
+
+    @commands.Cog.listener()
+    async def on_ready(self):
+        # Salons disponibles : les giveaways marqués peuvent être relus
+        if not self._sharded():
+            self._reconcile_stale(None)
+
+    @commands.Cog.listener()
+    async def on_shard_ready(self, shard_id: int):
+        self._reconcile_stale(shard_id)
 
     # reaction listeners
     @commands.Cog.listener()
     async def on_raw_reaction_add(self, payload: discord.RawReactionActionEvent):
         if payload.message_id in self.active and (payload.emoji.name == GW_REACTION):
-            guild = self.bot.get_guild(payload.guild_id)
-            member = None
-            try:
-                member = await guild.fetch_member(payload.user_id)
-            except Exception:
-                pass
+            # Membre fourni par la gateway (ou cache) ; inconnu : vérifié au tirage
+            member = payload.member
+            if member is None:
+                guild = self.bot.get_guild(payload.guild_id)
+                member = guild.get_member(payload.user_id) if guild is not None else None
             if not (member and member.bot):
-                data = self.active[payload.message_id]
-                data['entrants'].add(payload.user_id)
+                self._queue_entrant(payload.message_id, payload.user_id, True)
 
     @commands.Cog.listener()
     async def on_raw_reaction_remove(self, payload: discord.RawReactionActionEvent):
         if payload.message_id in self.active and (payload.emoji.name == GW_REACTION):
-            data = self.active[payload.message_id]
-            try:
-                data['entrants'].discard(payload.user_id)
-            except Exception:
-                pass
+            self._queue_entrant(payload.message_id, payload.user_id, False)
 
 
 async def setup(bot: commands.Bot):
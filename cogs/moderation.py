@@ -2,81 +2,103 @@ import discord
 from discord.ext import commands
 from discord import app_commands
 from datetime import datetime, timedelta
-import json
-import os
 import asyncio
 import logging
 
+from core.metrics import persist_timer
+
 # RÈGLE : Les commandes slash sont automatiquement enregistrées par bot.add_cog()
 
-WARNINGS_FILE = "warnings.json"
 logger = logging.getLogger("bot.moderation")
 
+# Avertissements annulés (/unwarn) au-delà desquels le journal est compacté
+WARNING_COMPACTION_THRESHOLD = 500
+
 class Moderation(commands.Cog):
     def __init__(self, bot: commands.Bot):
         self.bot = bot
-        self.warnings = self._load_warnings()
+        # guild_id -> {user_id: [avertissements]}, reconstruit depuis le journal au premier accès
+        self.warnings = bot.storage.guild_cache("warnings", self._load_guild)
+        # Événements unwarn encore présents dans le journal (compaction au-delà du seuil)
+        self._tombstones = 0
+        self._compaction: asyncio.Task | None = None
 
-    def _load_warnings(self):
-        """Charge les avertissements avec gestion d'erreurs robuste"""
-        if os.path.exists(WARNINGS_FILE):
-            try:
-                with open(WARNINGS_FILE, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    if isinstance(data, dict):
-                        return data
-                    else:
-                        logger.warning("Format de données invalide dans warnings.json")
-                        return {}
-            except json.JSONDecodeError as e:
-                logger.error(f"Erreur JSON dans warnings.json: {e}")
-                # Sauvegarder l'ancien fichier corrompu
-                try:
-                    os.rename(WARNINGS_FILE, f"{WARNINGS_FILE}.backup.{int(datetime.now().timestamp())}")
-                except:
-                    pass
-                return {}
-            except Exception as e:
-                logger.error(f"Erreur lecture warnings.json: {e}")
-                return {}
-        return {}
+    async def cog_load(self):
+        try:
+            rows = await self.bot.storage.fetchall("SELECT COUNT(*) AS n FROM warning_events WHERE kind = 'unwarn'")
+            self._tombstones = rows[0]["n"]
+        except Exception as e:
+            logger.error(f"Erreur lecture du journal des avertissements: {e}")
+        self._maybe_compact()
 
-    def _save_warnings(self):
-        """Sauvegarde les avertissements avec gestion d'erreurs robuste"""
+    async def _load_guild(self, guild_id: int) -> dict:
+        """Rejoue le journal des avertissements d'une guilde"""
+        warnings = {}
         try:
-            # Sauvegarde temporaire d'abord
-            temp_file = f"{WARNINGS_FILE}.tmp"
-            with open(temp_file, 'w', encoding='utf-8') as f:
-                json.dump(self.warnings, f, indent=2, ensure_ascii=False)
-            
-            # Remplacer l'ancien fichier
-            if os.path.exists(WARNINGS_FILE):
-                os.replace(temp_file, WARNINGS_FILE)
-            else:
-                os.rename(temp_file, WARNINGS_FILE)
+            rows = await self.bot.storage.fetchall("SELECT * FROM warning_events WHERE guild_id = ? ORDER BY id", (guild_id,))
+            for row in rows:
+                user_warnings = warnings.setdefault(str(row["user_id"]), [])
+                if row["kind"] == "unwarn":
+                    user_warnings[:] = [w for w in user_warnings if w["id"] != row["target_id"]]
+                    continue
+                user_warnings.append({
+                    "id": row["id"],
+                    "reason": row["reason"],
+                    "moderator": row["moderator_id"],
+                    "timestamp": row["timestamp"]
+                })
         except Exception as e:
-            logger.error(f"Erreur sauvegarde warnings: {e}")
-            # Nettoyer le fichier temporaire
-            try:
-                if os.path.exists(temp_file):
-                    os.remove(temp_file)
-            except:
-                pass
+            logger.error(f"Erreur lecture des avertissements de {guild_id}: {e}")
+        return warnings
+
+    async def _append_warning(self, guild_id: int, user_id: int, warning: dict):
+        """Ajoute un événement warn au journal et renseigne l'identifiant de l'avertissement"""
+        with persist_timer("warnings"):
+            warning["id"] = await self.bot.storage.execute(
+                "INSERT INTO warning_events (kind, guild_id, user_id, moderator_id, reason, timestamp) VALUES ('warn', ?, ?, ?, ?, ?)",
+                (guild_id, user_id, warning["moderator"], warning["reason"], warning["timestamp"])
+            )
+
+    async def _append_unwarn(self, guild_id: int, user_id: int, warning: dict, moderator_id: int):
+        """Ajoute un événement unwarn annulant l'avertissement `warning`"""
+        with persist_timer("warnings"):
+            await self.bot.storage.execute(
+                "INSERT INTO warning_events (kind, guild_id, user_id, target_id, moderator_id, timestamp) VALUES ('unwarn', ?, ?, ?, ?, ?)",
+                (guild_id, user_id, warning["id"], moderator_id, datetime.now().isoformat())
+            )
+        self._tombstones += 1
+        self._maybe_compact()
 
-    def _get_user_warnings(self, guild_id: int, user_id: int) -> list:
+    def _maybe_compact(self):
+        if self._tombstones >= WARNING_COMPACTION_THRESHOLD and (self._compaction is None or self._compaction.done()):
+            self._compaction = asyncio.create_task(self._compact_warnings())
+
+    async def _compact_warnings(self):
+        """Retire du journal les avertissements annulés et leurs événements unwarn (en arrière-plan)"""
+        removed, self._tombstones = self._tombstones, 0
+        try:
+            with persist_timer("warnings_compaction"):
+                await self.bot.storage.write(
+                    ("DELETE FROM warning_events WHERE id IN (SELECT target_id FROM warning_events WHERE kind = 'unwarn')", ()),
+                    ("DELETE FROM warning_events WHERE kind = 'unwarn'", ())
+                )
+            logger.info(f"Journal des avertissements compacté ({removed} avertissements annulés retirés)")
+        except Exception as e:
+            self._tombstones += removed
+            logger.error(f"Erreur compaction des avertissements: {e}")
+
+    async def _get_user_warnings(self, guild_id: int, user_id: int) -> list:
         """Récupère les avertissements d'un utilisateur avec validation"""
-        guild_id = str(guild_id)
+        guild_warnings = await self.warnings.get(guild_id)
         user_id = str(user_id)
-        if guild_id not in self.warnings:
-            self.warnings[guild_id] = {}
-        if user_id not in self.warnings[guild_id]:
-            self.warnings[guild_id][user_id] = []
+        if user_id not in guild_warnings:
+            guild_warnings[user_id] = []
         
         # Validation des avertissements
-        warnings = self.warnings[guild_id][user_id]
+        warnings = guild_warnings[user_id]
         if not isinstance(warnings, list):
             warnings = []
-            self.warnings[guild_id][user_id] = warnings
+            guild_warnings[user_id] = warnings
         
         return warnings
 
@@ -238,14 +260,14 @@ class Moderation(commands.Cog):
             return
         
         try:
-            warnings = self._get_user_warnings(interaction.guild.id, member.id)
+            warnings = await self._get_user_warnings(interaction.guild.id, member.id)
             warning_data = {
                 "reason": reason,
                 "moderator": interaction.user.id,
                 "timestamp": datetime.now().isoformat()
             }
+            await self._append_warning(interaction.guild.id, member.id, warning_data)
             warnings.append(warning_data)
-            self._save_warnings()
             
             embed = discord.Embed(
                 title="⚠️ **Membre averti**",
@@ -270,7 +292,7 @@ class Moderation(commands.Cog):
             return
         
         try:
-            warnings = self._get_user_warnings(interaction.guild.id, member.id)
+            warnings = await self._get_user_warnings(interaction.guild.id, member.id)
             if not warnings:
                 await interaction.response.send_message(f"✅ **{member.display_name}** n'a aucun avertissement.", ephemeral=True)
                 return
@@ -309,13 +331,18 @@ class Moderation(commands.Cog):
             return
         
         try:
-            warnings = self._get_user_warnings(interaction.guild.id, member.id)
+            warnings = await self._get_user_warnings(interaction.guild.id, member.id)
             if not warnings:
                 await interaction.response.send_message(f"✅ **{member.display_name}** n'a aucun avertissement à retirer.", ephemeral=True)
                 return
             
+            # Retiré de l'index avant l'écriture : deux /unwarn simultanés visent deux avertissements distincts
             removed_warning = warnings.pop()
-            self._save_warnings()
+            try:
+                await self._append_unwarn(interaction.guild.id, member.id, removed_warning, interaction.user.id)
+            except Exception:
+                warnings.append(removed_warning)
+                raise
             
             embed = discord.Embed(
                 title="✅ **Avertissement retiré**",
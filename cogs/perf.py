@@ -0,0 +1,60 @@
+import discord
+from discord.ext import commands
+from discord import app_commands
+from datetime import datetime
+import logging
+
+# RÈGLE : Les commandes slash sont automatiquement enregistrées par bot.add_cog()
+
+logger = logging.getLogger("bot.perf")
+
+
+class Perf(commands.Cog):
+    def __init__(self, bot: commands.Bot):
+        self.bot = bot
+
+    @app_commands.command(name="perf", description="Afficher la latence de la boucle et les callbacks les plus lents (Admin)")
+    async def perf_slash(self, interaction: discord.Interaction):
+        if not interaction.user.guild_permissions.administrator:
+            await interaction.response.send_message("❌ **Vous devez être administrateur pour utiliser cette commande.**", ephemeral=True)
+            return
+
+        monitor = getattr(self.bot, "loop_monitor", None)
+        if monitor is None:
+            await interaction.response.send_message("❌ **La surveillance de la boucle n'est pas active.**", ephemeral=True)
+            return
+
+        lag = monitor.lag
+        embed = discord.Embed(
+            title="⏱️ **Performances de la boucle**",
+            color=discord.Color.orange(),
+            timestamp=datetime.now()
+        )
+        embed.add_field(
+            name="Retard de la boucle",
+            value=(
+                f"p50: **{lag.quantile(0.5) * 1000:.0f}ms**\n"
+                f"p99: **{lag.quantile(0.99) * 1000:.0f}ms**\n"
+                f"max: **{lag.max * 1000:.0f}ms**\n"
+                f"échantillons: {lag.count}"
+            ),
+            inline=False
+        )
+
+        offenders = monitor.top_offenders()
+        if offenders:
+            for entry in offenders:
+                where = entry.stack[-1].strip().splitlines()[0] if entry.stack else "pile indisponible"
+                embed.add_field(
+                    name=entry.name[:256],
+                    value=f"{entry.count}× — total **{entry.total * 1000:.0f}ms**, max **{entry.max * 1000:.0f}ms**\n`{where[:200]}`",
+                    inline=False
+                )
+        else:
+            embed.add_field(name="Callbacks lents", value=f"Aucun blocage au-delà de {monitor.threshold * 1000:.0f}ms", inline=False)
+
+        await interaction.response.send_message(embed=embed, ephemeral=True)
+
+
+async def setup(bot: commands.Bot):
+    await bot.add_cog(Perf(bot))
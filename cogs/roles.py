@@ -1,8 +1,9 @@
-import json
 import discord
 from discord.ext import commands
 from discord import app_commands
 
+from core.metrics import persist_timer
+
 # RÈGLE : Les commandes slash sont automatiquement enregistrées par bot.add_cog()
 
 ROLE_HOMME_ID = 1409863642207359057
@@ -20,34 +21,32 @@ CHANNEL_ID = 1373016949201698970
 GIF_GENRE_URL = "https://i.pinimg.com/originals/f5/f2/74/f5f27448c036af645c27467c789ad759.gif"
 GIF_AGE_URL = "https://mugen.karaokes.moe/images/articles/ngioaezb.gif"
 
-STATE_FILE = "reaction_roles.json"
-
 
 class Roles(commands.Cog):
     def __init__(self, bot: commands.Bot):
         self.bot = bot
         self.message_id_genre: int | None = None
         self.message_id_age: int | None = None
-        self._load_state()
 
     # -------- persistence
-    def _save_state(self):
-        data = {
-            "message_id_genre": self.message_id_genre,
-            "message_id_age": self.message_id_age,
-        }
+    async def cog_load(self):
+        await self._load_state()
+
+    async def _save_state(self):
         try:
-            with open(STATE_FILE, "w", encoding="utf-8") as f:
-                json.dump(data, f)
+            with persist_timer("reaction_roles"):
+                await self.bot.storage.write(*(
+                    ("INSERT OR REPLACE INTO reaction_roles (name, message_id) VALUES (?, ?)", (name, getattr(self, name)))
+                    for name in ("message_id_genre", "message_id_age")
+                ))
         except Exception:
             pass
 
-    def _load_state(self):
+    async def _load_state(self):
         try:
-            with open(STATE_FILE, "r", encoding="utf-8") as f:
-                data = json.load(f)
-                self.message_id_genre = data.get("message_id_genre")
-                self.message_id_age = data.get("message_id_age")
+            for row in await self.bot.storage.fetchall("SELECT name, message_id FROM reaction_roles"):
+                if row["name"] in ("message_id_genre", "message_id_age"):
+                    setattr(self, row["name"], row["message_id"])
         except Exception:
             pass
 
@@ -76,7 +75,7 @@ class Roles(commands.Cog):
         await msg_age.add_reaction(EMOJI_MINEUR)
         await msg_age.add_reaction(EMOJI_MAJEUR)
         self.message_id_age = msg_age.id
-        self._save_state()
+        await self._save_state()
 
     # -------- events
     @commands.Cog.listener()
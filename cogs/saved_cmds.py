@@ -10,6 +10,15 @@ class SavedCmds(commands.Cog):
         self.bot = bot
         self.saved_commands: dict[int, dict[int, list[str]]] = {}
 
+    def snapshot_state(self) -> dict:
+        """Slots sauvegardés pour le redémarrage à chaud (non persistés ailleurs)"""
+        return {str(member_id): {str(slot): messages for slot, messages in slots.items()}
+                for member_id, slots in self.saved_commands.items()}
+
+    def restore_state(self, state: dict):
+        for member_id, slots in state.items():
+            self.saved_commands[int(member_id)] = {int(slot): messages for slot, messages in slots.items()}
+
     @app_commands.command(name="save", description="Sauvegarder les 25 derniers messages d'un membre dans un slot")
     @app_commands.describe(slot="Numéro de slot", member="Membre")
     async def save_slash(self, interaction: discord.Interaction, slot: int, member: discord.Member):
@@ -2,16 +2,39 @@ import discord
 from discord.ext import commands
 from discord import app_commands
 from datetime import datetime
-import json
-import os
 import asyncio
+import heapq
 import logging
+import time
+from collections import OrderedDict
+
+from core import serialization
+from core.metrics import REGISTRY, Counter, Gauge, LabeledHistogram
 
 # RÈGLE : Les commandes slash sont automatiquement enregistrées par bot.add_cog()
 
-TICKETS_FILE = "tickets.json"
+# Colonnes de la table tickets (hors clé guild_id, name)
+TICKET_FIELDS = ("channel_id", "creator_id", "status", "created_at", "closed_by", "closed_at")
+# Délai (s) entre la fermeture d'un ticket et la suppression de son salon
+CLOSE_DELAY = 5
+# Attente max (s) entre deux essais de suppression (rate limit, erreur serveur)
+CLOSE_RETRY_MAX = 600
+# Interactions create_ticket mémorisées pour ignorer une livraison en double
+SEEN_INTERACTIONS_MAX = 1000
+# Nom des salons pré-créés (cachés) en attente d'un ticket
+POOL_CHANNEL_NAME = "reserve-ticket"
+# Réglages portés par les salons de réserve (catégorie, permissions) ou leur nombre
+POOL_CONFIG_KEYS = ("category_id", "support_role_id", "admin_role_id", "designer_role_id", "pool_size")
+MAX_POOL_SIZE = 10
 logger = logging.getLogger("bot.tickets")
 
+TICKET_POOL_CLAIMS = REGISTRY.register(Counter(
+    "bot_ticket_pool_claims_total", "Créations de tickets servies par la réserve de salons (hit) ou non (miss)", ("result",)))
+TICKET_CHANNEL_DURATION = REGISTRY.register(LabeledHistogram(
+    "bot_ticket_channel_duration_seconds", "Temps d'obtention du salon d'un nouveau ticket", ("source",)))
+TICKET_CREATE_STAGES = REGISTRY.register(LabeledHistogram(
+    "bot_ticket_create_stage_seconds", "Durée de chaque étape de la création d'un ticket (channel, welcome, response, total)", ("stage",)))
+
 class TicketView(discord.ui.View):
     def __init__(self, cog):
         super().__init__(timeout=None)
@@ -19,8 +42,20 @@ class TicketView(discord.ui.View):
 
     @discord.ui.button(label="Créer un ticket", style=discord.ButtonStyle.primary, emoji="🎫", custom_id="create_ticket")
     async def create_ticket(self, interaction: discord.Interaction, button: discord.ui.Button):
+        # Même interaction livrée deux fois (reprise de session gateway) : déjà traitée
+        if not self.cog._first_delivery(interaction.id):
+            return
+        key = (interaction.guild.id, interaction.user.id)
         try:
-            await self._create_ticket(interaction)
+            # Un seul ticket en création par membre : les clics suivants n'attendent pas le premier
+            if key in self.cog._creating:
+                await interaction.response.send_message("⏳ **Votre ticket est déjà en cours de création.**", ephemeral=True)
+                return
+            self.cog._creating.add(key)
+            try:
+                await self._create_ticket(interaction)
+            finally:
+                self.cog._creating.discard(key)
         except Exception as e:
             logger.exception(f"Erreur dans create_ticket button: {e}")
             if not interaction.response.is_done():
@@ -32,26 +67,26 @@ class TicketView(discord.ui.View):
             if interaction.response.is_done():
                 return
                 
+            received = time.perf_counter()
             guild_id = str(interaction.guild.id)
-            if guild_id not in self.cog.tickets or "config" not in self.cog.tickets[guild_id]:
+            guild_data = await self.cog.tickets.get(interaction.guild.id)
+            if not guild_data["config"]:
                 await interaction.response.send_message("❌ **Le système de tickets n'est pas configuré.**", ephemeral=True)
                 return
             
-            config = self.cog.tickets[guild_id]["config"]
+            config = guild_data["config"]
             category = interaction.guild.get_channel(config["category_id"])
             
             if not category:
                 await interaction.response.send_message("❌ **Catégorie de tickets introuvable.**", ephemeral=True)
                 return
             
-            # Vérifier le nombre maximum de tickets
+            # Vérifier le nombre maximum de tickets (index créateur -> tickets ouverts)
             user_tickets = 0
-            if "tickets" in self.cog.tickets[guild_id]:
-                for ticket_data in self.cog.tickets[guild_id]["tickets"].values():
-                    if isinstance(ticket_data, dict) and ticket_data.get("creator_id") == interaction.user.id:
-                        channel = interaction.guild.get_channel(ticket_data.get("channel_id"))
-                        if channel:  # Ticket encore actif
-                            user_tickets += 1
+            for ticket_id in guild_data["by_creator"].get(interaction.user.id, ()):
+                channel = interaction.guild.get_channel(guild_data["tickets"][ticket_id].get("channel_id"))
+                if channel:  # Ticket encore actif
+                    user_tickets += 1
             
             max_tickets = config.get("max_tickets", 1)
             if user_tickets >= max_tickets:
@@ -59,57 +94,46 @@ class TicketView(discord.ui.View):
                 return
             
             # Créer le canal du ticket
-            ticket_number = self.cog.ticket_counter
-            self.cog.ticket_counter += 1
+            # Numéro propre à la guilde, attribué sans await entre lecture et incrément
+            guild_data["counter"] += 1
+            ticket_number = guild_data["counter"]
+            self.cog._save_counter(guild_id, ticket_number)
             
             channel_name = f"ticket-{ticket_number}"
+            topic = f"Ticket #{ticket_number} créé par {interaction.user.display_name}"
+            start = time.perf_counter()
             
-            try:
-                channel = await interaction.guild.create_text_channel(
-                    name=channel_name,
-                    category=category,
-                    topic=f"Ticket #{ticket_number} créé par {interaction.user.display_name}"
-                )
-            except Exception as e:
-                logger.error(f"Erreur création canal ticket: {e}")
-                await interaction.response.send_message("❌ **Erreur lors de la création du canal.**", ephemeral=True)
-                return
-            
-            # Configurer les permissions
-            try:
-                await channel.set_permissions(interaction.guild.default_role, view_channel=False)
-                await channel.set_permissions(interaction.user, view_channel=True, send_messages=True, read_message_history=True)
-                
-                # Ajouter les permissions pour les rôles de support
-                if config.get("support_role_id"):
-                    support_role = interaction.guild.get_role(config["support_role_id"])
-                    if support_role:
-                        await channel.set_permissions(support_role, view_channel=True, send_messages=True, read_message_history=True, manage_messages=True)
-                
-                if config.get("admin_role_id"):
-                    admin_role = interaction.guild.get_role(config["admin_role_id"])
-                    if admin_role:
-                        await channel.set_permissions(admin_role, view_channel=True, send_messages=True, read_message_history=True, manage_messages=True, manage_channels=True)
-                
-                if config.get("designer_role_id"):
-                    designer_role = interaction.guild.get_role(config["designer_role_id"])
-                    if designer_role:
-                        await channel.set_permissions(designer_role, view_channel=True, send_messages=True, read_message_history=True, manage_messages=True)
-            except Exception as e:
-                logger.error(f"Erreur configuration permissions ticket: {e}")
-                # Continuer même si les permissions échouent
+            # Salon pré-créé de la réserve si disponible : une seule modification au lieu de six appels
+            channel = await self.cog._claim_pooled_channel(interaction.guild, config, interaction.user, channel_name, topic)
+            if channel is not None:
+                TICKET_CHANNEL_DURATION.observe(time.perf_counter() - start, source="pool")
+            else:
+                # Toutes les permissions dans la requête de création : pas de salon visible entre deux appels
+                overwrites = self.cog._staff_overwrites(interaction.guild, guild_data, category)
+                overwrites[interaction.user] = discord.PermissionOverwrite(view_channel=True, send_messages=True, read_message_history=True)
+                try:
+                    channel = await interaction.guild.create_text_channel(
+                        name=channel_name,
+                        category=category,
+                        topic=topic,
+                        overwrites=overwrites
+                    )
+                except Exception as e:
+                    logger.error(f"Erreur création canal ticket: {e}")
+                    await interaction.response.send_message("❌ **Erreur lors de la création du canal.**", ephemeral=True)
+                    return
+                TICKET_CHANNEL_DURATION.observe(time.perf_counter() - start, source="create")
+            TICKET_CREATE_STAGES.observe(time.perf_counter() - start, stage="channel")
             
             # Sauvegarder les informations du ticket
-            if "tickets" not in self.cog.tickets[guild_id]:
-                self.cog.tickets[guild_id]["tickets"] = {}
-            
-            self.cog.tickets[guild_id]["tickets"][channel_name] = {
+            ticket = guild_data["tickets"][channel_name] = {
                 "channel_id": channel.id,
                 "creator_id": interaction.user.id,
                 "created_at": datetime.now().isoformat(),
                 "status": "open"
             }
-            self.cog._save_tickets()
+            self.cog._index_ticket(guild_data, channel_name, ticket)
+            self.cog._save_ticket(guild_id, channel_name, ticket)
             
             # Message de bienvenue
             welcome_msg = config.get("welcome_message")
@@ -136,12 +160,17 @@ class TicketView(discord.ui.View):
             # Boutons d'action
             view = CloseTicketView(self.cog)
             
+            stage = time.perf_counter()
             try:
                 await channel.send(embed=embed, view=view)
             except Exception as e:
                 logger.error(f"Erreur envoi message bienvenue ticket: {e}")
+            TICKET_CREATE_STAGES.observe(time.perf_counter() - stage, stage="welcome")
             
+            stage = time.perf_counter()
             await interaction.response.send_message(f"✅ **Ticket créé avec succès !** {channel.mention}", ephemeral=True)
+            TICKET_CREATE_STAGES.observe(time.perf_counter() - stage, stage="response")
+            TICKET_CREATE_STAGES.observe(time.perf_counter() - received, stage="total")
             
         except Exception as e:
             logger.exception(f"Erreur dans _create_ticket: {e}")
@@ -174,7 +203,7 @@ class CloseTicketView(discord.ui.View):
                 
             embed = discord.Embed(
                 title="🔒 **Ticket fermé**",
-                description="Ce ticket sera supprimé dans 5 secondes.",
+                description=f"Ce ticket sera supprimé dans {CLOSE_DELAY} secondes.",
                 color=discord.Color.red(),
                 timestamp=datetime.now()
             )
@@ -182,24 +211,19 @@ class CloseTicketView(discord.ui.View):
             
             await interaction.response.send_message(embed=embed)
             
-            # Supprimer le canal après 5 secondes
-            await asyncio.sleep(5)
+            # Suppression du salon confiée au planificateur (persistant) : le handler rend la main
+            await self.cog._schedule_close(interaction.guild.id, interaction.channel.id, CLOSE_DELAY)
             
-            # Marquer le ticket comme fermé dans la base de données
+            # Marquer le ticket comme fermé et le déplacer vers l'archive
             guild_id = str(interaction.guild.id)
-            if guild_id in self.cog.tickets and "tickets" in self.cog.tickets[guild_id]:
-                for ticket_id, ticket_data in self.cog.tickets[guild_id]["tickets"].items():
-                    if isinstance(ticket_data, dict) and ticket_data.get("channel_id") == interaction.channel.id:
-                        ticket_data["status"] = "closed"
-                        ticket_data["closed_by"] = interaction.user.id
-                        ticket_data["closed_at"] = datetime.now().isoformat()
-                        self.cog._save_tickets()
-                        break
-            
-            try:
-                await interaction.channel.delete()
-            except Exception as e:
-                logger.error(f"Erreur suppression canal ticket: {e}")
+            guild_data = await self.cog.tickets.get(interaction.guild.id)
+            ticket_id = guild_data["by_channel"].get(interaction.channel.id)
+            if ticket_id is not None:
+                ticket_data = guild_data["tickets"][ticket_id]
+                ticket_data["status"] = "closed"
+                ticket_data["closed_by"] = interaction.user.id
+                ticket_data["closed_at"] = datetime.now().isoformat()
+                await self.cog._archive_ticket(guild_id, ticket_id)
             
         except Exception as e:
             logger.exception(f"Erreur dans _close_ticket: {e}")
@@ -213,76 +237,343 @@ class CloseTicketView(discord.ui.View):
 class Tickets(commands.Cog):
     def __init__(self, bot: commands.Bot):
         self.bot = bot
-        self.tickets = self._load_tickets()
-        self.ticket_counter = self._get_next_ticket_number()
+        # guild_id -> {"tickets": {...}, "config": {...}}, chargé au premier accès à la guilde
+        self.tickets = bot.storage.guild_cache("tickets", self._load_guild)
+        # Tickets fermés : archive froide par mois, lue seulement par /ticket history
+        self.archive = bot.ticket_archive
+        # Créations en cours (guild_id, user_id) et interactions déjà traitées : un double clic ne
+        # crée jamais deux salons
+        self._creating: set[tuple[int, int]] = set()
+        self._seen_interactions: OrderedDict[int, None] = OrderedDict()
+        # Réserve de salons cachés pré-créés : guild_id -> ids des salons libres
+        self.pools: dict[int, list[int]] = {}
+        self._refill_queue: asyncio.Queue[int] = asyncio.Queue()
+        self._refill_pending: set[int] = set()
+        self._refill_task: asyncio.Task | None = None
+        # Reconstructions de réserve en cours (référence gardée jusqu'à leur fin)
+        self._pool_rebuilds: set[asyncio.Task] = set()
+        # Suppressions de salons planifiées : tas (échéance, channel_id, guild_id, essais)
+        self._close_jobs: list[tuple[float, int, int, int]] = []
+        self._close_wakeup = asyncio.Event()
+        self._close_task: asyncio.Task | None = None
+        REGISTRY.register(Gauge("bot_ticket_pool_channels", "Salons de tickets pré-créés disponibles",
+                                lambda: sum(len(pool) for pool in self.pools.values())))
         
         # Enregistrer les vues persistantes
+        self.close_view = CloseTicketView(self)
         self.bot.add_view(TicketView(self))
-        self.bot.add_view(CloseTicketView(self))
+        self.bot.add_view(self.close_view)
 
-    def _load_tickets(self):
-        """Charge les tickets depuis le fichier JSON avec gestion d'erreurs robuste"""
-        if os.path.exists(TICKETS_FILE):
-            try:
-                with open(TICKETS_FILE, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    # Validation des données
-                    if isinstance(data, dict):
-                        return data
-                    else:
-                        logger.warning("Format de données invalide dans tickets.json, redémarrage avec structure vide")
-                        return {}
-            except json.JSONDecodeError as e:
-                logger.error(f"Erreur JSON dans tickets.json: {e}")
-                # Sauvegarder l'ancien fichier corrompu
+    async def cog_load(self):
+        # Un seul processus déplace les anciens tickets fermés (restés en base avant l'archive)
+        if self.bot.cluster is None or self.bot.cluster.config.cluster_id == 0:
+            await self._archive_closed_backlog()
+        self._refill_task = asyncio.create_task(self._refill_pools())
+        try:
+            for row in await self.bot.storage.fetchall("SELECT * FROM ticket_close_jobs"):
+                heapq.heappush(self._close_jobs, (row["due_at"], row["channel_id"], row["guild_id"], row["attempts"]))
+        except Exception as e:
+            logger.error(f"Erreur lecture des suppressions de tickets planifiées: {e}")
+        self._close_task = asyncio.create_task(self._run_close_jobs())
+
+    async def cog_unload(self):
+        for task in (self._refill_task, self._close_task):
+            if task is not None:
+                task.cancel()
+
+    async def _load_guild(self, guild_id: int) -> dict:
+        """Charge les tickets et la configuration d'une guilde depuis la base"""
+        # by_creator : creator_id -> noms des tickets ouverts ; by_channel : channel_id -> nom du ticket
+        # overwrites : modèle de permissions des salons, recalculé quand la configuration change
+        # counter : dernier numéro de ticket attribué dans la guilde
+        guild_data = {"tickets": {}, "config": {}, "by_creator": {}, "by_channel": {}, "overwrites": {}, "counter": 0}
+        try:
+            rows = await self.bot.storage.fetchall("SELECT config FROM ticket_configs WHERE guild_id = ?", (guild_id,))
+            if rows:
+                guild_data["config"] = serialization.loads(rows[0]["config"])
+                guild_data["overwrites"] = self._overwrite_template(guild_id, guild_data["config"])
+            rows = await self.bot.storage.fetchall("SELECT value FROM ticket_counters WHERE guild_id = ?", (guild_id,))
+            if rows:
+                guild_data["counter"] = rows[0]["value"]
+            rows = await self.bot.storage.fetchall("SELECT * FROM tickets WHERE guild_id = ? AND status != 'closed'", (guild_id,))
+            for row in rows:
+                ticket = guild_data["tickets"][row["name"]] = {
+                    key: row[key] for key in TICKET_FIELDS if key == "status" or row[key] is not None
+                }
+                self._index_ticket(guild_data, row["name"], ticket)
+        except Exception as e:
+            logger.error(f"Erreur lecture des tickets de {guild_id}: {e}")
+        if guild_data["config"].get("pool_size"):
+            self._schedule_refill(guild_id)
+        return guild_data
+
+    async def _schedule_close(self, guild_id: int, channel_id: int, delay: float, attempts: int = 0):
+        """Planifie la suppression d'un salon de ticket (enregistrée en base avant de rendre la main)"""
+        due_at = time.time() + delay
+        await self.bot.storage.execute(
+            "INSERT OR REPLACE INTO ticket_close_jobs (channel_id, guild_id, due_at, attempts) VALUES (?, ?, ?, ?)",
+            (channel_id, guild_id, due_at, attempts)
+        )
+        heapq.heappush(self._close_jobs, (due_at, channel_id, guild_id, attempts))
+        self._close_wakeup.set()
+
+    async def _run_close_jobs(self):
+        """Supprime les salons arrivés à échéance, y compris ceux planifiés avant un redémarrage"""
+        await self.bot.wait_until_ready()
+        while True:
+            self._close_wakeup.clear()
+            if not self._close_jobs:
+                await self._close_wakeup.wait()
+                continue
+            due_at, channel_id, guild_id, attempts = self._close_jobs[0]
+            delay = due_at - time.time()
+            if delay > 0:
                 try:
-                    os.rename(TICKETS_FILE, f"{TICKETS_FILE}.backup.{int(datetime.now().timestamp())}")
-            except:
+                    await asyncio.wait_for(self._close_wakeup.wait(), timeout=delay)
+                except asyncio.TimeoutError:
                     pass
-                return {}
+                continue
+            heapq.heappop(self._close_jobs)
+            try:
+                await self._run_close_job(channel_id, guild_id, attempts)
             except Exception as e:
-                logger.error(f"Erreur lecture tickets.json: {e}")
-                return {}
-        return {}
+                logger.error(f"Erreur suppression planifiée du salon {channel_id}: {e}")
+
+    async def _run_close_job(self, channel_id: int, guild_id: int, attempts: int):
+        guild = self.bot.get_guild(guild_id)
+        if guild is None and self.bot.cluster is not None:
+            # Guilde gérée par un autre cluster : c'est lui qui supprimera le salon
+            return
+        channel = guild.get_channel(channel_id) if guild else None
+        if channel is not None:
+            try:
+                await channel.delete(reason="Ticket fermé")
+            except discord.NotFound:
+                pass
+            except discord.HTTPException as e:
+                if e.status == 429 or e.status >= 500:
+                    retry = min(CLOSE_RETRY_MAX, CLOSE_DELAY * 2 ** (attempts + 1))
+                    logger.warning(f"Suppression du salon {channel_id} reportée de {retry}s ({e.status})")
+                    await self._schedule_close(guild_id, channel_id, retry, attempts + 1)
+                    return
+                logger.error(f"Erreur suppression canal ticket: {e}")
+        await self.bot.storage.execute("DELETE FROM ticket_close_jobs WHERE channel_id = ?", (channel_id,))
+
+    def _first_delivery(self, interaction_id: int) -> bool:
+        """Vrai à la première réception d'une interaction, faux pour un doublon"""
+        if interaction_id in self._seen_interactions:
+            return False
+        self._seen_interactions[interaction_id] = None
+        if len(self._seen_interactions) > SEEN_INTERACTIONS_MAX:
+            self._seen_interactions.popitem(last=False)
+        return True
+
+    def _index_ticket(self, guild_data: dict, name: str, ticket: dict):
+        """Ajoute un ticket ouvert aux index créateur et salon de sa guilde"""
+        guild_data["by_creator"].setdefault(ticket.get("creator_id"), set()).add(name)
+        guild_data["by_channel"][ticket.get("channel_id")] = name
 
-    def _save_tickets(self):
-        """Sauvegarde les tickets avec gestion d'erreurs robuste"""
+    def _unindex_ticket(self, guild_data: dict, name: str, ticket: dict):
+        """Retire un ticket des index créateur et salon de sa guilde"""
+        names = guild_data["by_creator"].get(ticket.get("creator_id"))
+        if names is not None:
+            names.discard(name)
+            if not names:
+                del guild_data["by_creator"][ticket.get("creator_id")]
+        if guild_data["by_channel"].get(ticket.get("channel_id")) == name:
+            del guild_data["by_channel"][ticket.get("channel_id")]
+
+    def _save_ticket(self, guild_id: str, name: str, ticket: dict):
+        """Programme l'écriture de la ligne d'un ticket (écriture différée)"""
+        self.bot.storage.defer("tickets", (guild_id, name), (
+            f"INSERT OR REPLACE INTO tickets (guild_id, name, {', '.join(TICKET_FIELDS)}) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (int(guild_id), name, *(ticket.get(key) for key in TICKET_FIELDS))
+        ))
+
+    def _save_counter(self, guild_id: str, value: int):
+        """Programme l'écriture du dernier numéro de ticket attribué dans la guilde (écriture différée)"""
+        self.bot.storage.defer("ticket_counters", (guild_id,), (
+            "INSERT OR REPLACE INTO ticket_counters (guild_id, value) VALUES (?, ?)", (int(guild_id), value)
+        ))
+
+    async def _archive_ticket(self, guild_id: str, name: str):
+        """Retire un ticket fermé des données vivantes et l'ajoute à l'archive du mois"""
+        guild_data = await self.tickets.get(int(guild_id))
+        ticket = guild_data["tickets"].pop(name, None)
+        if ticket is None:
+            return
+        self._unindex_ticket(guild_data, name, ticket)
+        # Fermeture écrite avant l'ajout à l'archive : après un arrêt brutal entre les deux, la
+        # ligne fermée est reprise par _archive_closed_backlog au lieu de revenir ouverte
+        self._save_ticket(guild_id, name, ticket)
+        await self.bot.storage.flush()
         try:
-            # Sauvegarde temporaire d'abord
-            temp_file = f"{TICKETS_FILE}.tmp"
-            with open(temp_file, 'w', encoding='utf-8') as f:
-                json.dump(self.tickets, f, indent=2, ensure_ascii=False)
-            
-            # Remplacer l'ancien fichier
-            if os.path.exists(TICKETS_FILE):
-                os.replace(temp_file, TICKETS_FILE)
-            else:
-                os.rename(temp_file, TICKETS_FILE)
+            await self.archive.append({"guild_id": int(guild_id), "name": name, **ticket})
+        except Exception as e:
+            # Archive indisponible : le ticket reste en base, fermé, et sera archivé au prochain démarrage
+            logger.error(f"Erreur archivage du ticket {name}: {e}")
+            return
+        # Même clé que l'écriture du ticket : remplace une éventuelle insertion encore en attente
+        self.bot.storage.defer("tickets", (guild_id, name), (
+            "DELETE FROM tickets WHERE guild_id = ? AND name = ?", (int(guild_id), name)
+        ))
+        await self.bot.storage.flush()
+
+    async def _archive_closed_backlog(self):
+        """Déplace vers l'archive les tickets fermés encore présents dans la base"""
+        try:
+            rows = await self.bot.storage.fetchall("SELECT * FROM tickets WHERE status = 'closed'")
+            if not rows:
+                return
+            records = []
+            for row in rows:
+                record = {"guild_id": row["guild_id"], "name": row["name"]}
+                record.update((key, row[key]) for key in TICKET_FIELDS if row[key] is not None)
+                month = (record.get("closed_at") or record.get("created_at") or datetime.now().isoformat())[:7]
+                records.append((month, record))
+            await self.archive.append_by_month(records)
+            await self.bot.storage.write(*(
+                ("DELETE FROM tickets WHERE guild_id = ? AND name = ?", (row["guild_id"], row["name"])) for row in rows
+            ))
+            logger.info(f"{len(rows)} tickets fermés déplacés vers l'archive")
         except Exception as e:
-            logger.error(f"Erreur sauvegarde tickets: {e}")
-            # Nettoyer le fichier temporaire
+            logger.error(f"Erreur archivage des tickets fermés: {e}")
+
+    def _save_config(self, guild_id: str, config: dict):
+        """Programme l'écriture de la configuration des tickets d'une guilde (écriture différée)"""
+        self.bot.storage.defer("ticket_configs", (guild_id,), (
+            "INSERT OR REPLACE INTO ticket_configs (guild_id, config) VALUES (?, ?)",
+            (int(guild_id), serialization.dumps(config))
+        ))
+
+    def _overwrite_template(self, guild_id: int, config: dict) -> dict[int, discord.PermissionOverwrite]:
+        """Permissions d'un salon de ticket sans son créateur, par id de rôle (@everyone a l'id de la guilde)"""
+        staff = discord.PermissionOverwrite(view_channel=True, send_messages=True, read_message_history=True, manage_messages=True)
+        template = {guild_id: discord.PermissionOverwrite(view_channel=False)}
+        for key in ("support_role_id", "designer_role_id"):
+            if config.get(key):
+                template[config[key]] = staff
+        if config.get("admin_role_id"):
+            template[config["admin_role_id"]] = discord.PermissionOverwrite(
+                view_channel=True, send_messages=True, read_message_history=True, manage_messages=True, manage_channels=True)
+        return template
+
+    def _staff_overwrites(self, guild: discord.Guild, guild_data: dict, category: discord.abc.GuildChannel | None) -> dict:
+        """Permissions d'un salon de ticket sans son créateur : caché à tous sauf aux rôles configurés"""
+        # Une liste explicite remplace l'héritage : celles de la catégorie (rôle du bot, autres
+        # rôles staff...) sont reprises, le modèle du ticket l'emportant en cas de conflit
+        overwrites = dict(category.overwrites) if isinstance(category, discord.CategoryChannel) else {}
+        for role_id, overwrite in guild_data["overwrites"].items():
+            role = guild.get_role(role_id)
+            if role:
+                overwrites[role] = overwrite
+        return overwrites
+
+    def _pool(self, guild: discord.Guild, config: dict) -> list[int]:
+        """Salons libres de la réserve d'une guilde (retrouvés dans la catégorie après un redémarrage)"""
+        pool = self.pools.get(guild.id)
+        if pool is None:
+            category = guild.get_channel(config.get("category_id"))
+            channels = category.text_channels if isinstance(category, discord.CategoryChannel) else []
+            pool = self.pools[guild.id] = [channel.id for channel in channels if channel.name == POOL_CHANNEL_NAME]
+        return pool
+
+    async def _claim_pooled_channel(self, guild: discord.Guild, config: dict, user: discord.Member, name: str, topic: str):
+        """Prend un salon de la réserve pour un nouveau ticket ; None si la réserve est vide ou désactivée"""
+        if not config.get("pool_size"):
+            return None
+        pool = self._pool(guild, config)
+        self._schedule_refill(guild.id)
+        while pool:
+            channel = guild.get_channel(pool.pop())
+            if channel is None:
+                continue
+            # Permissions de la catégorie ajoutées depuis la pré-création comprises
+            overwrites = {**(channel.category.overwrites if channel.category else {}), **channel.overwrites}
+            overwrites[user] = discord.PermissionOverwrite(view_channel=True, send_messages=True, read_message_history=True)
             try:
-                if os.path.exists(temp_file):
-                    os.remove(temp_file)
-            except:
-                pass
+                # Nom, sujet et permissions du créateur en une seule requête
+                await channel.edit(name=name, topic=topic, overwrites=overwrites)
+            except Exception as e:
+                logger.error(f"Erreur attribution du salon de réserve {channel.id}: {e}")
+                break
+            TICKET_POOL_CLAIMS.inc(result="hit")
+            return channel
+        TICKET_POOL_CLAIMS.inc(result="miss")
+        return None
+
+    def _schedule_refill(self, guild_id: int):
+        if guild_id not in self._refill_pending:
+            self._refill_pending.add(guild_id)
+            self._refill_queue.put_nowait(guild_id)
+
+    async def _refill_pools(self):
+        """Remplit les réserves en arrière-plan, dans la limite du budget de créations"""
+        await self.bot.wait_until_ready()
+        while True:
+            guild_id = await self._refill_queue.get()
+            self._refill_pending.discard(guild_id)
+            try:
+                await self._refill_pool(guild_id)
+            except Exception as e:
+                logger.error(f"Erreur remplissage de la réserve de salons de {guild_id}: {e}")
+
+    async def _refill_pool(self, guild_id: int):
+        guild = self.bot.get_guild(guild_id)
+        if guild is None:
+            return
+        guild_data = await self.tickets.get(guild_id)
+        config = guild_data["config"]
+        category = guild.get_channel(config.get("category_id"))
+        if not config.get("pool_size") or not isinstance(category, discord.CategoryChannel):
+            return
+        pool = self._pool(guild, config)
+        created = 0
+        while len(pool) < config["pool_size"]:
+            await self.bot.ticket_pool_budget.acquire()
+            channel = await guild.create_text_channel(
+                name=POOL_CHANNEL_NAME, category=category, overwrites=self._staff_overwrites(guild, guild_data, category))
+            pool.append(channel.id)
+            created += 1
+        if created:
+            logger.info(f"Réserve de tickets de {guild.name}: {created} salon(s) pré-créé(s), {len(pool)} disponible(s)")
 
-    def _get_next_ticket_number(self):
-        """Calcule le prochain numéro de ticket de manière robuste"""
-        if not self.tickets:
-            return 1
-        
-        max_num = 0
-        for guild_data in self.tickets.values():
-            if isinstance(guild_data, dict) and "tickets" in guild_data:
-                for ticket_id in guild_data["tickets"]:
-                    try:
-                        if isinstance(ticket_id, str) and ticket_id.startswith("ticket-"):
-                        num = int(ticket_id.split("-")[-1])
-                        max_num = max(max_num, num)
-                    except (ValueError, IndexError):
-                        continue
-        return max_num + 1
+    async def _rebuild_pool(self, guild: discord.Guild, old_config: dict):
+        """Remplace les salons libres de la réserve après un changement de configuration"""
+        old_category = guild.get_channel(old_config.get("category_id"))
+        pool = self._pool(guild, old_config) if isinstance(old_category, discord.CategoryChannel) else []
+        self.pools.pop(guild.id, None)
+        for channel_id in pool:
+            channel = guild.get_channel(channel_id)
+            if channel is not None:
+                try:
+                    await channel.delete()
+                except Exception as e:
+                    logger.error(f"Erreur suppression du salon de réserve {channel_id}: {e}")
+        self.pools[guild.id] = []
+        self._schedule_refill(guild.id)
+
+    @commands.Cog.listener()
+    async def on_guild_channel_delete(self, channel: discord.abc.GuildChannel):
+        """Salon d'un ticket ouvert supprimé à la main : le ticket est fermé et archivé"""
+        if channel.name == POOL_CHANNEL_NAME:
+            pool = self.pools.get(channel.guild.id)
+            if pool is not None and channel.id in pool:
+                pool.remove(channel.id)
+            return
+        if not channel.name.startswith("ticket-"):
+            return
+        try:
+            guild_data = await self.tickets.get(channel.guild.id)
+            ticket_id = guild_data["by_channel"].get(channel.id)
+            if ticket_id is None:
+                return
+            ticket = guild_data["tickets"][ticket_id]
+            ticket["status"] = "closed"
+            ticket["closed_at"] = datetime.now().isoformat()
+            await self._archive_ticket(str(channel.guild.id), ticket_id)
+        except Exception as e:
+            logger.error(f"Erreur fermeture du ticket du salon supprimé {channel.id}: {e}")
 
     def _validate_config(self, config):
         """Valide la configuration des tickets"""
@@ -321,7 +612,8 @@ class Tickets(commands.Cog):
         image_url="URL de l'image pour le message de création",
         embed_title="Titre de l'embed de création (optionnel)",
         embed_description="Description de l'embed de création (optionnel)",
-        preset="Preset de configuration rapide"
+        preset="Preset de configuration rapide",
+        pool_size="Salons pré-créés pour une ouverture instantanée (0 = désactivé, max 10)"
     )
     @app_commands.choices(preset=[
         app_commands.Choice(name="Par Défaut", value="default"),
@@ -341,7 +633,8 @@ class Tickets(commands.Cog):
                           max_tickets: int = 1,
                           image_url: str = None,
                           embed_title: str = None,
-                          embed_description: str = None):
+                          embed_description: str = None,
+                          pool_size: int = 0):
         
         if not interaction.user.guild_permissions.administrator:
             await interaction.response.send_message("❌ **Permission refusée.** Vous devez être administrateur.", ephemeral=True)
@@ -352,6 +645,10 @@ class Tickets(commands.Cog):
             await interaction.response.send_message("❌ **Le nombre maximum de tickets doit être entre 1 et 10.**", ephemeral=True)
             return
         
+        if pool_size < 0 or pool_size > MAX_POOL_SIZE:
+            await interaction.response.send_message(f"❌ **La réserve de salons doit être entre 0 et {MAX_POOL_SIZE}.**", ephemeral=True)
+            return
+        
         try:
             # Répondre immédiatement pour éviter le timeout
             await interaction.response.defer(ephemeral=True)
@@ -382,27 +679,27 @@ class Tickets(commands.Cog):
                 embed_title = embed_title or "🎫 **Système de Tickets**"
                 embed_description = embed_description or "Cliquez sur le bouton ci-dessous pour créer un ticket de support."
                 welcome_message = welcome_message or "Bienvenue ! Décrivez votre problème et un modérateur vous répondra bientôt."
-        
-        # Sauvegarder la configuration
-        guild_id = str(interaction.guild.id)
-        if guild_id not in self.tickets:
-            self.tickets[guild_id] = {"tickets": {}, "config": {}}
-        
+            
+            # Sauvegarder la configuration
+            guild_id = str(interaction.guild.id)
+            guild_data = await self.tickets.get(interaction.guild.id)
+            
             config = {
-            "channel_id": channel.id,
-            "category_id": category.id,
-            "support_role_id": support_role.id if support_role else None,
-            "admin_role_id": admin_role.id if admin_role else None,
-            "designer_role_id": designer_role.id if designer_role else None,
+                "channel_id": channel.id,
+                "category_id": category.id,
+                "support_role_id": support_role.id if support_role else None,
+                "admin_role_id": admin_role.id if admin_role else None,
+                "designer_role_id": designer_role.id if designer_role else None,
                 "welcome_message": welcome_message,
-            "max_tickets": max_tickets,
-            "image_url": image_url,
+                "max_tickets": max_tickets,
+                "image_url": image_url,
                 "embed_title": embed_title,
                 "embed_description": embed_description,
                 "preset": preset,
-            "setup_by": interaction.user.id,
-            "setup_at": datetime.now().isoformat()
-        }
+                "pool_size": pool_size,
+                "setup_by": interaction.user.id,
+                "setup_at": datetime.now().isoformat()
+            }
             
             # Validation de la configuration
             is_valid, message = self._validate_config(config)
@@ -410,48 +707,59 @@ class Tickets(commands.Cog):
                 await interaction.followup.send(f"❌ **Configuration invalide:** {message}", ephemeral=True)
                 return
             
-            self.tickets[guild_id]["config"] = config
-        self._save_tickets()
-        
-        # Créer le message de création de tickets
-        embed = discord.Embed(
+            old_config = guild_data["config"]
+            guild_data["config"] = config
+            guild_data["overwrites"] = self._overwrite_template(interaction.guild.id, config)
+            self._save_config(guild_id, config)
+            # Les salons de réserve portent la catégorie et les rôles de l'ancienne configuration :
+            # reconstruits seulement si l'un d'eux ou la taille de la réserve change
+            if (old_config.get("pool_size") or pool_size) and any(
+                old_config.get(key) != config[key] for key in POOL_CONFIG_KEYS
+            ):
+                task = asyncio.create_task(self._rebuild_pool(interaction.guild, old_config))
+                self._pool_rebuilds.add(task)
+                task.add_done_callback(self._pool_rebuilds.discard)
+            
+            # Créer le message de création de tickets
+            embed = discord.Embed(
                 title=config["embed_title"],
                 description=config["embed_description"],
-            color=discord.Color.blue(),
-            timestamp=datetime.now()
-        )
-        
-        # Ajouter les champs de configuration
-        config_fields = []
-        config_fields.append(f"• **Canal:** {channel.mention}")
-        config_fields.append(f"• **Catégorie:** {category.name}")
-        config_fields.append(f"• **Support:** {support_role.mention if support_role else 'Non défini'}")
-        config_fields.append(f"• **Admin:** {admin_role.mention if admin_role else 'Non défini'}")
-        config_fields.append(f"• **Graphiste:** {designer_role.mention if designer_role else 'Non défini'}")
-        config_fields.append(f"• **Max tickets:** {max_tickets}")
+                color=discord.Color.blue(),
+                timestamp=datetime.now()
+            )
+            
+            # Ajouter les champs de configuration
+            config_fields = []
+            config_fields.append(f"• **Canal:** {channel.mention}")
+            config_fields.append(f"• **Catégorie:** {category.name}")
+            config_fields.append(f"• **Support:** {support_role.mention if support_role else 'Non défini'}")
+            config_fields.append(f"• **Admin:** {admin_role.mention if admin_role else 'Non défini'}")
+            config_fields.append(f"• **Graphiste:** {designer_role.mention if designer_role else 'Non défini'}")
+            config_fields.append(f"• **Max tickets:** {max_tickets}")
+            config_fields.append(f"• **Réserve de salons:** {pool_size or 'Désactivée'}")
             config_fields.append(f"• **Preset:** {preset.title()}")
-        
-        embed.add_field(
-            name="📋 **Instructions**", 
-            value="• Décrivez votre problème clairement\n• Soyez patient, un modérateur vous répondra\n• Restez respectueux et constructif", 
-            inline=False
-        )
-        embed.add_field(
-            name="⚙️ **Configuration**",
-            value="\n".join(config_fields),
-            inline=False
-        )
-        
-        # Ajouter l'image si fournie
-        if image_url:
-            embed.set_image(url=image_url)
             
-        embed.set_footer(text="Support - Système de Tickets")
-        
-        # Créer le bouton avec la vue persistante
-        view = TicketView(self)
-        
-        await channel.send(embed=embed, view=view)
+            embed.add_field(
+                name="📋 **Instructions**", 
+                value="• Décrivez votre problème clairement\n• Soyez patient, un modérateur vous répondra\n• Restez respectueux et constructif", 
+                inline=False
+            )
+            embed.add_field(
+                name="⚙️ **Configuration**",
+                value="\n".join(config_fields),
+                inline=False
+            )
+            
+            # Ajouter l'image si fournie
+            if image_url:
+                embed.set_image(url=image_url)
+                
+            embed.set_footer(text="Support - Système de Tickets")
+            
+            # Créer le bouton avec la vue persistante
+            view = TicketView(self)
+            
+            await channel.send(embed=embed, view=view)
             await interaction.followup.send("✅ **Système de tickets configuré avec succès !**", ephemeral=True)
         except Exception as e:
             logger.error(f"Erreur envoi message setup: {e}")
@@ -463,12 +771,10 @@ class Tickets(commands.Cog):
             await interaction.response.send_message("❌ **Permission refusée.**", ephemeral=True)
             return
         
-        guild_id = str(interaction.guild.id)
-        if guild_id not in self.tickets or "config" not in self.tickets[guild_id]:
+        config = (await self.tickets.get(interaction.guild.id))["config"]
+        if not config:
             await interaction.response.send_message("❌ **Aucune configuration trouvée.** Utilisez `/ticket setup` d'abord.", ephemeral=True)
             return
-        
-        config = self.tickets[guild_id]["config"]
         channel = interaction.guild.get_channel(config.get("channel_id"))
         category = interaction.guild.get_channel(config.get("category_id"))
         support_role = interaction.guild.get_role(config.get("support_role_id")) if config.get("support_role_id") else None
@@ -486,6 +792,9 @@ class Tickets(commands.Cog):
         embed.add_field(name="👑 Admin", value=admin_role.mention if admin_role else "❌ Non défini", inline=True)
         embed.add_field(name="🎨 Graphiste", value=designer_role.mention if designer_role else "❌ Non défini", inline=True)
         embed.add_field(name="📊 Max tickets", value=str(config.get("max_tickets", 1)), inline=True)
+        pool_size = config.get("pool_size", 0)
+        pool = self.pools.get(interaction.guild.id)
+        embed.add_field(name="⚡ Réserve", value=f"{len(pool) if pool is not None else '?'}/{pool_size}" if pool_size else "❌ Désactivée", inline=True)
         embed.add_field(name="💬 Message", value=config.get("welcome_message", "Non défini")[:50] + "...", inline=True)
         embed.add_field(name="🖼️ Image", value="✅ Configurée" if config.get("image_url") else "❌ Non définie", inline=True)
         embed.add_field(name="📝 Titre embed", value=config.get("embed_title", "Non défini")[:30] + "...", inline=True)
@@ -505,7 +814,52 @@ class Tickets(commands.Cog):
             await interaction.response.send_message("❌ **Permission refusée.**", ephemeral=True)
             return
         
-        await self._close_ticket(interaction)
+        await self.close_view._close_ticket(interaction)
+
+    @group.command(name="history", description="Voir les derniers tickets fermés")
+    @app_commands.describe(member="Ne montrer que les tickets de ce membre", limit="Nombre de tickets à afficher (1-25)")
+    async def ticket_history(self, interaction: discord.Interaction, member: discord.Member | None = None, limit: int = 10):
+        has_permission = await self._check_ticket_permissions(interaction)
+        if not has_permission:
+            await interaction.response.send_message("❌ **Permission refusée.**", ephemeral=True)
+            return
+        
+        if limit < 1 or limit > 25:
+            await interaction.response.send_message("❌ **Le nombre de tickets doit être entre 1 et 25.**", ephemeral=True)
+            return
+        
+        try:
+            await interaction.response.defer(ephemeral=True)
+            guild_id = interaction.guild.id
+            member_id = member.id if member else None
+            # Lecture de l'archive du mois le plus récent au plus ancien, arrêtée dès `limit` tickets
+            records = await self.archive.search(
+                lambda record: record.get("guild_id") == guild_id and (member_id is None or record.get("creator_id") == member_id),
+                limit
+            )
+            if not records:
+                await interaction.followup.send("📭 **Aucun ticket fermé dans l'archive.**", ephemeral=True)
+                return
+            
+            lines = []
+            for record in records:
+                closed_at = record.get("closed_at")
+                when = f"<t:{int(datetime.fromisoformat(closed_at).timestamp())}:R>" if closed_at else "date inconnue"
+                closed_by = f"<@{record['closed_by']}>" if record.get("closed_by") else "inconnu"
+                lines.append(f"• **{record['name']}** de <@{record.get('creator_id')}> — fermé {when} par {closed_by}")
+            
+            embed = discord.Embed(
+                title="📚 **Historique des tickets**",
+                description="\n".join(lines),
+                color=discord.Color.blue(),
+                timestamp=datetime.now()
+            )
+            if member:
+                embed.set_footer(text=f"Tickets de {member.display_name}")
+            await interaction.followup.send(embed=embed, ephemeral=True)
+        except Exception as e:
+            logger.error(f"Erreur historique des tickets: {e}")
+            await interaction.followup.send("❌ **Erreur lors de la lecture de l'historique.**", ephemeral=True)
 
     @group.command(name="add", description="Ajouter un membre au ticket")
     @app_commands.describe(member="Membre à ajouter")
@@ -541,19 +895,20 @@ class Tickets(commands.Cog):
             return
         
         guild_id = str(interaction.guild.id)
-        if guild_id not in self.tickets or "config" not in self.tickets[guild_id]:
+        guild_data = await self.tickets.get(interaction.guild.id)
+        config = guild_data["config"]
+        if not config:
             await interaction.response.send_message("❌ **Aucune configuration trouvée.** Utilisez `/ticket setup` d'abord.", ephemeral=True)
             return
         
-        config = self.tickets[guild_id]["config"]
-        
         # Vérifier et corriger les valeurs par défaut
         is_valid, message = self._validate_config(config)
         if not is_valid:
             await interaction.response.send_message(f"❌ **Configuration invalide:** {message}", ephemeral=True)
             return
         
-        self._save_tickets()
+        guild_data["overwrites"] = self._overwrite_template(interaction.guild.id, config)
+        self._save_config(guild_id, config)
         
         embed = discord.Embed(
             title="🔧 **Configuration corrigée**",
@@ -596,25 +951,25 @@ class Tickets(commands.Cog):
 
     @group.command(name="presets", description="Voir les presets de configuration disponibles")
     async def ticket_presets(self, interaction: discord.Interaction):
-            embed = discord.Embed(
+        embed = discord.Embed(
             title="🎨 **Presets de Configuration**",
             description="Voici les presets disponibles pour configurer rapidement votre système de tickets :",
             color=discord.Color.blue(),
-                timestamp=datetime.now()
-            )
+            timestamp=datetime.now()
+        )
         
-            embed.add_field(
+        embed.add_field(
             name="🎯 **Par Défaut**",
             value="• Titre: 👉 Commander une bannière\n• Description: Pour toute commande, tu peux directement utiliser le bouton ci-dessous.\n• Message: Veuillez patienter, votre graphiste arrive bientôt !\n• Image: Bannière HeavenGraphX\n• Max tickets: 3",
-                inline=False
-            )
+            inline=False
+        )
         
-            embed.add_field(
+        embed.add_field(
             name="🎫 **Support Général**",
             value="• Titre: Support Technique\n• Description: Besoin d'aide ? Créez un ticket de support !\n• Message: Accueil standard pour le support\n• Image: Icône de support",
-                inline=False
-            )
-            
+            inline=False
+        )
+        
         embed.add_field(
             name="🎨 **Graphisme**",
             value="• Titre: Demande de Graphisme\n• Description: Demandez vos créations graphiques ici !\n• Message: Spécialisé pour les demandes graphiques\n• Image: Icône de graphisme",
@@ -646,9 +1001,8 @@ class Tickets(commands.Cog):
         if interaction.user.guild_permissions.manage_channels:
             return True
         
-            guild_id = str(interaction.guild.id)
-        if guild_id in self.tickets and "config" in self.tickets[guild_id]:
-            config = self.tickets[guild_id]["config"]
+        config = (await self.tickets.get(interaction.guild.id))["config"]
+        if config:
             support_role = interaction.guild.get_role(config.get("support_role_id"))
             admin_role = interaction.guild.get_role(config.get("admin_role_id"))
             designer_role = interaction.guild.get_role(config.get("designer_role_id"))
@@ -670,7 +1024,7 @@ async def setup(bot: commands.Bot):
         # Vérifier si le groupe existe déjà
         existing_commands = [cmd.name for cmd in bot.tree.get_commands()]
         if "ticket" not in existing_commands:
-        bot.tree.add_command(cog.group)
+            bot.tree.add_command(cog.group)
             logger.info("Groupe ticket ajouté à l'arbre des commandes")
         else:
             logger.info("Groupe ticket déjà présent dans l'arbre des commandes")
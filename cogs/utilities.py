@@ -138,9 +138,17 @@ class Utilities(commands.Cog):
             # Répondre immédiatement pour éviter le timeout
             await interaction.response.defer(ephemeral=True)
             
-            # Statistiques du bot
-            total_servers = len(self.bot.guilds)
-            total_users = sum(len(guild.members) for guild in self.bot.guilds)
+            # Statistiques du bot (agrégées sur tous les clusters en mode cluster)
+            cluster = getattr(self.bot, "cluster", None)
+            cluster_info = None
+            if cluster:
+                stats = await cluster.aggregate()
+                total_servers = stats["guilds"]
+                total_users = stats["users"]
+                cluster_info = f"🧩 **{len(stats['clusters'])}** cluster(s)\n🔀 **{stats['shards']}** shard(s)\n📍 Ici: cluster **{cluster.config.cluster_id}**"
+            else:
+                total_servers = len(self.bot.guilds)
+                total_users = sum(len(guild.members) for guild in self.bot.guilds)
             
             # Statistiques système (si psutil disponible)
             if PSUTIL_AVAILABLE:
@@ -168,6 +176,8 @@ class Utilities(commands.Cog):
             embed.add_field(name="🔧 Technique", value=f"🐍 Python: **{platform.python_version()}**\n📚 Discord.py: **{discord.__version__}**", inline=True)
             embed.add_field(name="⏱️ Uptime", value=f"<t:{int(self.bot.start_time.timestamp())}:R>", inline=True)
             embed.add_field(name="🏓 Latence", value=f"**{round(self.bot.latency * 1000)}ms**", inline=True)
+            if cluster_info:
+                embed.add_field(name="🧩 Cluster", value=cluster_info, inline=True)
             
             embed.set_footer(text="Bot développé avec ❤️")
             
@@ -1,7 +1,5 @@
 import discord
 from discord.ext import commands
-import json
-import os
 import logging
 
 # RÈGLE : Les commandes slash sont automatiquement enregistrées par bot.add_cog()
@@ -10,7 +8,6 @@ import logging
 WELCOME_CHANNEL_ID = 1409924674519040122
 MEMBER_ROLE_ID = 1352191536955396118
 BRAND_THUMB_URL = "https://cdn.discordapp.com/attachments/1404572567645192373/1410640091726221393/download_20.jpg?ex=68b1c076&is=68b06ef6&hm=f0f1a9423d2866aa178f200f4b9e2feb184ac4618aba163d9eb57df99003cbf7&"
-INVITE_STATS_FILE = os.path.join(os.path.dirname(os.path.dirname(__file__)), "invite_stats.json")
 logger = logging.getLogger("bot.welcome")
 
 
@@ -19,72 +16,64 @@ class Welcome(commands.Cog):
         self.bot = bot
         # guild_id -> { code: {"uses": int, "inviter_id": int|None} }
         self.invites_cache: dict[int, dict[str, dict]] = {}
-        # Stats persistées par guilde
-        # {
-        #   "guilds": {
-        #     "<guild_id>": {
-        #        "member_to_inviter": {"<member_id>": "<inviter_id>"},
-        #        "net_invites": {"<inviter_id>": <count>}
-        #     }
-        #   }
+        # Guildes dont le cache vient de l'instantané chaud : pas de refetch REST au premier GUILD_CREATE
+        self._restored_guilds: set[int] = set()
+        # Stats persistées par guilde, chargées au premier accès à la guilde
+        # guild_id -> {
+        #    "member_to_inviter": {"<member_id>": "<inviter_id>"},
+        #    "net_invites": {"<inviter_id>": <count>}
         # }
-        self.invite_stats: dict = {"guilds": {}}
-        self._load_invite_stats()
+        self.invite_stats = bot.storage.guild_cache("invite_stats", self._load_guild)
 
-    def _load_invite_stats(self):
-        """Charge les statistiques d'invitations avec gestion d'erreurs robuste"""
+    async def _load_guild(self, guild_id: int) -> dict:
+        """Charge les statistiques d'invitations d'une guilde depuis la base"""
+        gstats = {"member_to_inviter": {}, "net_invites": {}}
         try:
-            if os.path.exists(INVITE_STATS_FILE):
-                with open(INVITE_STATS_FILE, "r", encoding="utf-8") as f:
-                    data = json.load(f)
-                if isinstance(data, dict):
-                    if "guilds" in data:
-                        self.invite_stats = data
-                    else:
-                        # Migration d'anciens formats: repartir sur base propre
-                        logger.warning("Format de données invalide dans invite_stats.json, redémarrage avec structure propre")
-                        self.invite_stats = {"guilds": {}}
-                else:
-                    logger.warning("Type de données invalide dans invite_stats.json")
-                    self.invite_stats = {"guilds": {}}
-        except json.JSONDecodeError as e:
-            logger.error(f"Erreur JSON dans invite_stats.json: {e}")
-            # Sauvegarder l'ancien fichier corrompu
-            try:
-                os.rename(INVITE_STATS_FILE, f"{INVITE_STATS_FILE}.backup.{int(discord.utils.utcnow().timestamp())}")
-            except:
-                pass
-            self.invite_stats = {"guilds": {}}
+            rows = await self.bot.storage.fetchall("SELECT member_id, inviter_id FROM invite_members WHERE guild_id = ?", (guild_id,))
+            for row in rows:
+                gstats["member_to_inviter"][str(row["member_id"])] = str(row["inviter_id"])
+            rows = await self.bot.storage.fetchall("SELECT inviter_id, net FROM invite_counts WHERE guild_id = ?", (guild_id,))
+            for row in rows:
+                gstats["net_invites"][str(row["inviter_id"])] = row["net"]
         except Exception as e:
-            logger.error(f"Erreur lecture invite_stats.json: {e}")
-            self.invite_stats = {"guilds": {}}
+            logger.error(f"Erreur lecture des statistiques d'invitations de {guild_id}: {e}")
+        return gstats
 
-    def _save_invite_stats(self):
-        """Sauvegarde les statistiques d'invitations avec gestion d'erreurs robuste"""
-        try:
-            # Sauvegarde temporaire d'abord
-            temp_file = f"{INVITE_STATS_FILE}.tmp"
-            with open(temp_file, "w", encoding="utf-8") as f:
-                json.dump(self.invite_stats, f, ensure_ascii=False, indent=2)
-            
-            # Remplacer l'ancien fichier
-            if os.path.exists(INVITE_STATS_FILE):
-                os.replace(temp_file, INVITE_STATS_FILE)
-            else:
-                os.rename(temp_file, INVITE_STATS_FILE)
-        except Exception as e:
-            logger.error(f"Erreur sauvegarde invite_stats: {e}")
-            # Nettoyer le fichier temporaire
-            try:
-                if os.path.exists(temp_file):
-                    os.remove(temp_file)
-            except:
-                pass
+    def _save_invite_stats(self, gstats: dict, guild_id: int, member_id: int, inviter_id: str):
+        """Programme l'écriture de l'association d'un membre et du compteur de son inviteur
+
+        Écriture différée : pendant une vague d'arrivées, le compteur d'un même inviteur n'est
+        écrit qu'une fois par flush.
+        """
+        storage = self.bot.storage
+        storage.defer("invite_counts", (guild_id, int(inviter_id)), (
+            "INSERT OR REPLACE INTO invite_counts (guild_id, inviter_id, net) VALUES (?, ?, ?)",
+            (guild_id, int(inviter_id), int(gstats["net_invites"].get(str(inviter_id), 0)))
+        ))
+        current = gstats["member_to_inviter"].get(str(member_id))
+        if current is None:
+            storage.defer("invite_members", (guild_id, member_id), (
+                "DELETE FROM invite_members WHERE guild_id = ? AND member_id = ?", (guild_id, member_id)
+            ))
+        else:
+            storage.defer("invite_members", (guild_id, member_id), (
+                "INSERT OR REPLACE INTO invite_members (guild_id, member_id, inviter_id) VALUES (?, ?, ?)",
+                (guild_id, member_id, int(current))
+            ))
+
+    def snapshot_state(self) -> dict:
+        """Cache des invitations pour le redémarrage à chaud"""
+        return {"invites_cache": {str(gid): codes for gid, codes in self.invites_cache.items()}}
+
+    def restore_state(self, state: dict):
+        """Recharge le cache des invitations depuis l'instantané chaud"""
+        for gid, codes in state.get("invites_cache", {}).items():
+            self.invites_cache[int(gid)] = codes
+            self._restored_guilds.add(int(gid))
 
-    def _get_guild_stats(self, guild_id: int) -> dict:
+    async def _get_guild_stats(self, guild_id: int) -> dict:
         """Récupère les statistiques d'une guilde avec validation"""
-        guilds = self.invite_stats.setdefault("guilds", {})
-        gstats = guilds.setdefault(str(guild_id), {})
+        gstats = await self.invite_stats.get(guild_id)
         gstats.setdefault("member_to_inviter", {})
         gstats.setdefault("net_invites", {})
         return gstats
@@ -146,16 +135,20 @@ class Welcome(commands.Cog):
             logger.error(f"Erreur détermination inviteur: {e}")
         return None
 
-    def _get_net_invites(self, guild_id: int, inviter_id: int | None) -> int | None:
+    async def _get_net_invites(self, guild_id: int, inviter_id: int | None) -> int | None:
         """Récupère le nombre net d'invitations d'un utilisateur"""
         if inviter_id is None:
             return None
-        gstats = self._get_guild_stats(guild_id)
+        gstats = await self._get_guild_stats(guild_id)
         return int(gstats["net_invites"].get(str(inviter_id), 0))
 
     @commands.Cog.listener()
     async def on_guild_available(self, guild: discord.Guild):
         """Rafraîchit les invitations quand une guilde redevient disponible"""
+        if guild.id in self._restored_guilds:
+            # Cache restauré depuis l'instantané : les arrivées suivantes le rafraîchissent de toute façon
+            self._restored_guilds.discard(guild.id)
+            return
         await self.refresh_invites(guild)
 
     @commands.Cog.listener()
@@ -197,7 +190,7 @@ class Welcome(commands.Cog):
         
         # Mise à jour des stats nettes
         try:
-            gstats = self._get_guild_stats(guild.id)
+            gstats = await self._get_guild_stats(guild.id)
             prev_inviter_id = gstats["member_to_inviter"].get(str(member.id))
             if inviter_id is not None:
                 if prev_inviter_id is None:
@@ -210,7 +203,7 @@ class Welcome(commands.Cog):
                     gstats["net_invites"][str(inviter_id)] = cur + 1
                 # Si identique: rejoin → pas d'incrément
                 gstats["member_to_inviter"][str(member.id)] = str(inviter_id)
-                self._save_invite_stats()
+                self._save_invite_stats(gstats, guild.id, member.id, str(inviter_id))
         except Exception as e:
             logger.error(f"Erreur mise à jour stats invitations: {e}")
 
@@ -233,7 +226,7 @@ class Welcome(commands.Cog):
                 else:
                     inviter_value = "Inconnu"
                 embed.add_field(name="Invité par", value=inviter_value, inline=True)
-                net_val = self._get_net_invites(guild.id, inviter_id)
+                net_val = await self._get_net_invites(guild.id, inviter_id)
                 invites_value = str(net_val) if net_val is not None else "N/A"
                 embed.add_field(name="Nombre d'invite", value=invites_value, inline=True)
                 # Image de bannière en premier plan (pleine largeur)
@@ -247,7 +240,7 @@ class Welcome(commands.Cog):
                 # Fallback texte si l'embed échoue
                 try:
                     inv_display = inviter.mention if isinstance(inviter, discord.Member) else (getattr(inviter, 'name', 'Inconnu') if inviter else 'Inconnu')
-                    net_val = self._get_net_invites(guild.id, inviter_id)
+                    net_val = await self._get_net_invites(guild.id, inviter_id)
                     extra = f" (Invites: {net_val})" if net_val is not None else ""
                     await channel.send(f"Bienvenue {member.mention} ! Invité par {inv_display}{extra}.")
                 except Exception as e2:
@@ -258,7 +251,7 @@ class Welcome(commands.Cog):
         """Gère le départ d'un membre"""
         # Quand un membre quitte, décrémenter le net pour son inviteur d'origine
         try:
-            gstats = self._get_guild_stats(member.guild.id)
+            gstats = await self._get_guild_stats(member.guild.id)
             inviter_id_str = gstats["member_to_inviter"].get(str(member.id))
             if inviter_id_str is not None:
                 cur = int(gstats["net_invites"].get(str(inviter_id_str), 0))
@@ -268,7 +261,7 @@ class Welcome(commands.Cog):
                     del gstats["member_to_inviter"][str(member.id)]
                 except KeyError:
                     pass
-                self._save_invite_stats()
+                self._save_invite_stats(gstats, member.guild.id, member.id, inviter_id_str)
         except Exception as e:
             logger.error(f"Erreur mise à jour stats départ membre: {e}")
 
@@ -0,0 +1 @@
+"""Infrastructure partagée du bot (démarrage, synchronisation, performances)."""
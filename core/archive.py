@@ -0,0 +1,93 @@
+import asyncio
+import gzip
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from core import serialization
+
+# Archive froide en ajout seul : un fichier JSON lines compressé par mois (AAAA-MM.jsonl.gz).
+# Chaque ajout écrit un membre gzip complet à la fin du segment (un crash ne peut tronquer que
+# le dernier enregistrement) ; la lecture parcourt les segments du plus récent au plus ancien et
+# s'arrête dès que l'appelant a ce qu'il lui faut. En mode cluster chaque processus écrit ses
+# propres segments (AAAA-MM.c<id>.jsonl.gz), la lecture les réunit.
+
+logger = logging.getLogger("bot.archive")
+
+
+class MonthlyArchive:
+    """Archive compressée segmentée par mois, lue à la demande"""
+
+    def __init__(self, directory: str, writer: str | None = None, order_by: str | None = None):
+        self.directory = directory
+        self.writer = writer
+        # Champ horodaté servant à fusionner les segments de plusieurs écrivains
+        self.order_by = order_by
+        # Un seul thread : les ajouts à un même segment ne s'entremêlent jamais
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"archive-{os.path.basename(directory)}")
+
+    def _segment(self, month: str) -> str:
+        suffix = f".{self.writer}" if self.writer else ""
+        return os.path.join(self.directory, f"{month}{suffix}.jsonl.gz")
+
+    def _segments(self, month: str) -> list[str]:
+        return sorted(
+            os.path.join(self.directory, name) for name in os.listdir(self.directory)
+            if name.endswith(".jsonl.gz") and name.split(".")[0] == month
+        )
+
+    def _append(self, records: list[tuple[str, dict]]):
+        os.makedirs(self.directory, exist_ok=True)
+        by_month: dict[str, list[str]] = {}
+        for month, record in records:
+            by_month.setdefault(month, []).append(serialization.dumps(record))
+        for month, lines in by_month.items():
+            with gzip.open(self._segment(month), "at", encoding="utf-8") as f:
+                f.write("\n".join(lines) + "\n")
+
+    async def append(self, *records: dict, when: datetime | None = None):
+        """Ajoute des enregistrements au segment du mois de `when` (maintenant par défaut)"""
+        month = (when or datetime.now()).strftime("%Y-%m")
+        await self.append_by_month([(month, record) for record in records])
+
+    async def append_by_month(self, records: list[tuple[str, dict]]):
+        """Ajoute des enregistrements (mois AAAA-MM, enregistrement) en un seul passage"""
+        if records:
+            await asyncio.get_running_loop().run_in_executor(self._executor, self._append, records)
+
+    def months(self) -> list[str]:
+        """Segments présents, du plus récent au plus ancien"""
+        if not os.path.isdir(self.directory):
+            return []
+        return sorted({name.split(".")[0] for name in os.listdir(self.directory) if name.endswith(".jsonl.gz")}, reverse=True)
+
+    def _read_month(self, month: str) -> list[dict]:
+        records = []
+        paths = self._segments(month)
+        for path in paths:
+            try:
+                with gzip.open(path, "rt", encoding="utf-8") as f:
+                    for line in f:
+                        if line.strip():
+                            records.append(serialization.loads(line))
+            except (EOFError, OSError) as e:
+                # Dernier membre tronqué par un arrêt brutal : on garde ce qui a été lu
+                logger.warning(f"Segment {path} incomplet: {e}")
+            except ValueError as e:
+                logger.error(f"Segment {path} illisible: {e}")
+        if self.order_by and len(paths) > 1:
+            # Plusieurs écrivains : remettre le mois dans l'ordre chronologique
+            records.sort(key=lambda record: record.get(self.order_by) or "")
+        return records
+
+    async def search(self, predicate, limit: int) -> list[dict]:
+        """Au plus `limit` enregistrements vérifiant `predicate`, du plus récent au plus ancien"""
+        def scan():
+            found = []
+            for month in self.months():
+                found.extend(record for record in reversed(self._read_month(month)) if predicate(record))
+                if len(found) >= limit:
+                    break
+            return found[:limit]
+        return await asyncio.get_running_loop().run_in_executor(self._executor, scan)
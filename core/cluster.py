@@ -0,0 +1,404 @@
+import argparse
+import asyncio
+import itertools
+import json
+import logging
+import math
+import os
+import signal
+import sys
+import tempfile
+import time
+
+# Mode cluster : N processus python_bot.py, chacun avec une plage de shards
+# (AutoShardedBot), reliés au lanceur par un socket Unix local (JSON, une ligne par message).
+#
+#   python -m core.cluster --clusters 2 --shards 8
+#
+# Le lanceur sert de hub IPC : il agrège les statistiques des clusters pour /botinfo
+# et distribue les créneaux d'IDENTIFY pour respecter max_concurrency entre processus.
+
+logger = logging.getLogger("bot.cluster")
+
+IDENTIFY_INTERVAL = 5.0
+STATS_TIMEOUT = 2.0
+
+
+class ClusterConfig:
+    """Paramètres d'un processus cluster, transmis par le lanceur via l'environnement"""
+
+    def __init__(self, cluster_id: int, cluster_count: int, shard_ids: list[int], shard_count: int, ipc_path: str | None):
+        self.cluster_id = cluster_id
+        self.cluster_count = cluster_count
+        self.shard_ids = shard_ids
+        self.shard_count = shard_count
+        self.ipc_path = ipc_path
+
+    @classmethod
+    def from_env(cls) -> "ClusterConfig | None":
+        """Renvoie None hors mode cluster (CLUSTER_ID absent)"""
+        if os.getenv("CLUSTER_ID") is None:
+            return None
+        return cls(
+            cluster_id=int(os.environ["CLUSTER_ID"]),
+            cluster_count=int(os.getenv("CLUSTER_COUNT", "1")),
+            shard_ids=[int(s) for s in os.environ["SHARD_IDS"].split(",") if s],
+            shard_count=int(os.environ["SHARD_COUNT"]),
+            ipc_path=os.getenv("CLUSTER_IPC"),
+        )
+
+    def to_env(self) -> dict:
+        env = {
+            "CLUSTER_ID": str(self.cluster_id),
+            "CLUSTER_COUNT": str(self.cluster_count),
+            "SHARD_IDS": ",".join(str(s) for s in self.shard_ids),
+            "SHARD_COUNT": str(self.shard_count),
+        }
+        if self.ipc_path:
+            env["CLUSTER_IPC"] = self.ipc_path
+        return env
+
+
+def split_shards(shard_count: int, cluster_count: int) -> list[list[int]]:
+    """Répartit les shards en plages contiguës, aussi égales que possible"""
+    cluster_count = max(1, min(cluster_count, shard_count))
+    base, extra = divmod(shard_count, cluster_count)
+    ranges, start = [], 0
+    for i in range(cluster_count):
+        size = base + (1 if i < extra else 0)
+        ranges.append(list(range(start, start + size)))
+        start += size
+    return ranges
+
+
+class _Connection:
+    """Flux JSON-lines avec écriture sérialisée"""
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.reader = reader
+        self.writer = writer
+        self._lock = asyncio.Lock()
+
+    async def send(self, payload: dict):
+        async with self._lock:
+            self.writer.write(json.dumps(payload, separators=(",", ":")).encode("utf-8") + b"\n")
+            await self.writer.drain()
+
+    async def messages(self):
+        while True:
+            line = await self.reader.readline()
+            if not line:
+                return
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                logger.warning(f"Message IPC invalide ignoré: {line[:100]!r}")
+
+    def close(self):
+        self.writer.close()
+
+
+class ClusterHub:
+    """Serveur IPC du lanceur : statistiques agrégées et file d'IDENTIFY"""
+
+    def __init__(self, path: str, max_concurrency: int = 1):
+        self.path = path
+        self.max_concurrency = max(1, max_concurrency)
+        self.clusters: dict[int, _Connection] = {}
+        self.last_stats: dict[int, dict] = {}
+        self._server: asyncio.AbstractServer | None = None
+        self._nonces = itertools.count(1)
+        self._collects: dict[int, dict[int, dict]] = {}
+        # Un créneau d'IDENTIFY par bucket (shard_id % max_concurrency) toutes les 5 secondes
+        self._identify_next: dict[int, float] = {}
+        self._identify_locks: dict[int, asyncio.Lock] = {}
+
+    async def start(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
+        self._server = await asyncio.start_unix_server(self._handle, path=self.path)
+        logger.info(f"Hub IPC en écoute sur {self.path}")
+
+    async def close(self):
+        for conn in list(self.clusters.values()):
+            conn.close()
+        if self._server:
+            self._server.close()
+            await self._server.wait_closed()
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        conn = _Connection(reader, writer)
+        cluster_id = None
+        try:
+            async for message in conn.messages():
+                op = message.get("op")
+                if op == "hello":
+                    cluster_id = int(message["cluster"])
+                    self.clusters[cluster_id] = conn
+                elif op == "stats":
+                    self._store_stats(message)
+                elif op == "aggregate":
+                    asyncio.create_task(self._reply_aggregate(conn, message.get("nonce")))
+                elif op == "identify":
+                    asyncio.create_task(self._reply_identify(conn, message.get("nonce"), int(message["shard_id"])))
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            if cluster_id is not None and self.clusters.get(cluster_id) is conn:
+                del self.clusters[cluster_id]
+            conn.close()
+
+    def _store_stats(self, message: dict):
+        stats = message.get("stats") or {}
+        cluster_id = int(stats.get("cluster", -1))
+        self.last_stats[cluster_id] = stats
+        collect = self._collects.get(message.get("nonce"))
+        if collect is not None:
+            collect[cluster_id] = stats
+
+    async def collect(self, timeout: float = STATS_TIMEOUT) -> dict:
+        """Demande des statistiques fraîches à chaque cluster (dernières connues en secours)"""
+        nonce = next(self._nonces)
+        fresh: dict[int, dict] = {}
+        self._collects[nonce] = fresh
+        try:
+            expected = list(self.clusters.items())
+            for _, conn in expected:
+                try:
+                    await conn.send({"op": "collect", "nonce": nonce})
+                except Exception:
+                    pass
+            deadline = time.monotonic() + timeout
+            while len(fresh) < len(expected) and time.monotonic() < deadline:
+                await asyncio.sleep(0.05)
+        finally:
+            del self._collects[nonce]
+        clusters = {**self.last_stats, **fresh}
+        return {
+            "guilds": sum(s.get("guilds", 0) for s in clusters.values()),
+            "users": sum(s.get("users", 0) for s in clusters.values()),
+            "shards": sum(len(s.get("shards", [])) for s in clusters.values()),
+            "clusters": {str(cid): s for cid, s in sorted(clusters.items())},
+            "stale": sorted(set(clusters) - set(fresh)),
+        }
+
+    async def _reply_aggregate(self, conn: _Connection, nonce):
+        result = await self.collect()
+        try:
+            await conn.send({"op": "aggregate", "nonce": nonce, "result": result})
+        except Exception:
+            pass
+
+    async def _reply_identify(self, conn: _Connection, nonce, shard_id: int):
+        bucket = shard_id % self.max_concurrency
+        lock = self._identify_locks.setdefault(bucket, asyncio.Lock())
+        async with lock:
+            wait = self._identify_next.get(bucket, 0.0) - time.monotonic()
+            if wait > 0:
+                await asyncio.sleep(wait)
+            self._identify_next[bucket] = time.monotonic() + IDENTIFY_INTERVAL
+        try:
+            await conn.send({"op": "identify", "nonce": nonce})
+        except Exception:
+            pass
+
+
+class ClusterClient:
+    """Côté bot : connexion au hub, réponses aux collectes et requêtes vers le hub"""
+
+    def __init__(self, config: ClusterConfig, bot):
+        self.config = config
+        self.bot = bot
+        self._conn: _Connection | None = None
+        self._connected = asyncio.Event()
+        self._pending: dict[int, asyncio.Future] = {}
+        self._nonces = itertools.count(1)
+        self._task: asyncio.Task | None = None
+
+    def start(self):
+        if self.config.ipc_path and self._task is None:
+            self._task = asyncio.create_task(self._run(), name=f"cluster-ipc-{self.config.cluster_id}")
+
+    async def close(self):
+        """Coupe la connexion au hub (arrêt du processus)"""
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        if self._conn is not None:
+            self._conn.close()
+
+    def local_stats(self) -> dict:
+        return {
+            "cluster": self.config.cluster_id,
+            "shards": self.config.shard_ids,
+            "guilds": len(self.bot.guilds),
+            "users": sum(guild.member_count or 0 for guild in self.bot.guilds),
+            "latency": None if math.isnan(self.bot.latency) else round(self.bot.latency, 4),
+        }
+
+    async def _run(self):
+        while not self.bot.is_closed():
+            try:
+                reader, writer = await asyncio.open_unix_connection(self.config.ipc_path)
+                self._conn = _Connection(reader, writer)
+                await self._conn.send({"op": "hello", "cluster": self.config.cluster_id})
+                self._connected.set()
+                async for message in self._conn.messages():
+                    op = message.get("op")
+                    if op == "collect":
+                        await self._conn.send({"op": "stats", "nonce": message.get("nonce"), "stats": self.local_stats()})
+                    else:
+                        future = self._pending.pop(message.get("nonce"), None)
+                        if future and not future.done():
+                            future.set_result(message.get("result"))
+            except (OSError, ConnectionError) as e:
+                logger.warning(f"Hub IPC injoignable ({e}), nouvelle tentative dans 2s")
+            finally:
+                self._connected.clear()
+                self._conn = None
+                for future in self._pending.values():
+                    if not future.done():
+                        future.set_exception(ConnectionError("connexion IPC perdue"))
+                self._pending.clear()
+            await asyncio.sleep(2)
+
+    async def _request(self, payload: dict, timeout: float | None):
+        await asyncio.wait_for(self._connected.wait(), timeout=timeout or 10)
+        nonce = next(self._nonces)
+        future = asyncio.get_running_loop().create_future()
+        self._pending[nonce] = future
+        await self._conn.send({**payload, "nonce": nonce})
+        return await asyncio.wait_for(future, timeout=timeout)
+
+    async def aggregate(self, timeout: float = STATS_TIMEOUT + 1) -> dict:
+        """Statistiques agrégées de tous les clusters (locales seulement si le hub ne répond pas)"""
+        try:
+            return await self._request({"op": "aggregate"}, timeout)
+        except Exception as e:
+            logger.warning(f"Agrégation inter-clusters impossible: {e}")
+            local = self.local_stats()
+            return {
+                "guilds": local["guilds"],
+                "users": local["users"],
+                "shards": len(local["shards"]),
+                "clusters": {str(self.config.cluster_id): local},
+                "stale": [],
+            }
+
+    async def acquire_identify(self, shard_id: int):
+        """Attend un créneau d'IDENTIFY partagé entre tous les clusters"""
+        try:
+            await self._request({"op": "identify", "shard_id": shard_id}, None)
+        except Exception as e:
+            logger.warning(f"Créneau IDENTIFY indisponible via le hub ({e}), attente locale")
+            await asyncio.sleep(IDENTIFY_INTERVAL)
+
+
+class ClusterLauncher:
+    """Lance et supervise les processus cluster"""
+
+    def __init__(self, cluster_count: int, shard_count: int, max_concurrency: int = 1, script: str = "python_bot.py"):
+        self.shard_ranges = split_shards(shard_count, cluster_count)
+        self.shard_count = shard_count
+        self.script = script
+        self.hub = ClusterHub(os.path.join(tempfile.gettempdir(), f"heaven-cluster-{os.getpid()}.sock"), max_concurrency)
+        self.processes: dict[int, asyncio.subprocess.Process] = {}
+        self._stopping = False
+
+    def _config(self, cluster_id: int) -> ClusterConfig:
+        return ClusterConfig(cluster_id, len(self.shard_ranges), self.shard_ranges[cluster_id], self.shard_count, self.hub.path)
+
+    async def _supervise(self, cluster_id: int):
+        restarts = 0
+        while not self._stopping:
+            config = self._config(cluster_id)
+            env = {**os.environ, **config.to_env()}
+            started = time.monotonic()
+            process = await asyncio.create_subprocess_exec(sys.executable, self.script, env=env)
+            self.processes[cluster_id] = process
+            logger.info(f"Cluster {cluster_id} démarré (pid {process.pid}, shards {config.shard_ids[0]}-{config.shard_ids[-1]})")
+            code = await process.wait()
+            if self._stopping:
+                return
+            # Redémarrage avec backoff, remis à zéro si le processus a tenu plus de 5 minutes
+            restarts = 0 if time.monotonic() - started > 300 else restarts + 1
+            delay = min(60, 2 ** restarts)
+            logger.error(f"Cluster {cluster_id} arrêté (code {code}), redémarrage dans {delay}s")
+            await asyncio.sleep(delay)
+
+    async def _stop(self):
+        self._stopping = True
+        for process in self.processes.values():
+            if process.returncode is None:
+                process.send_signal(signal.SIGTERM)
+
+    async def run(self):
+        await self.hub.start()
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGTERM, signal.SIGINT):
+            loop.add_signal_handler(sig, lambda: asyncio.create_task(self._stop()))
+        logger.info(f"Lancement de {len(self.shard_ranges)} cluster(s) pour {self.shard_count} shard(s)")
+        try:
+            await asyncio.gather(*(self._supervise(i) for i in range(len(self.shard_ranges))))
+        finally:
+            await self.hub.close()
+
+
+async def fetch_gateway_info(token: str) -> tuple[int, int]:
+    """Nombre de shards recommandé et max_concurrency renvoyés par /gateway/bot"""
+    from discord.http import HTTPClient
+
+    http = HTTPClient(asyncio.get_running_loop())
+    try:
+        await http.static_login(token)
+        shards, _, session_start_limit = await http.get_bot_gateway()
+        return shards, session_start_limit.get("max_concurrency", 1)
+    finally:
+        await http.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Lance le bot en mode cluster (plusieurs processus shardés)")
+    parser.add_argument("--clusters", type=int, default=int(os.getenv("CLUSTER_COUNT", os.cpu_count() or 1)))
+    parser.add_argument("--shards", default=os.getenv("SHARD_COUNT", "auto"), help="nombre total de shards ou 'auto'")
+    parser.add_argument("--max-concurrency", type=int, default=None, help="IDENTIFY simultanés autorisés (défaut: valeur Discord)")
+    parser.add_argument("--fast", action="store_true", help="profil rapide (uvloop/orjson) dans chaque cluster")
+    args = parser.parse_args()
+    if args.fast:
+        # Transmis aux processus enfants via l'environnement
+        os.environ["BOT_FAST"] = "1"
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s %(levelname)-8s %(name)-12s [launcher] %(message)s',
+        datefmt='%Y-%m-%d %H:%M:%S'
+    )
+
+    shard_count = None if args.shards == "auto" else int(args.shards)
+    max_concurrency = args.max_concurrency
+    if shard_count is None or max_concurrency is None:
+        token = os.getenv("DISCORD_TOKEN")
+        if not token:
+            try:
+                from dotenv import load_dotenv
+                load_dotenv()
+                token = os.getenv("DISCORD_TOKEN")
+            except ImportError:
+                pass
+        if not token:
+            logger.error("❌ DISCORD_TOKEN requis pour --shards auto (ou précisez --shards et --max-concurrency)")
+            sys.exit(1)
+        recommended, concurrency = asyncio.run(fetch_gateway_info(token))
+        shard_count = shard_count or recommended
+        max_concurrency = max_concurrency or concurrency
+
+    launcher = ClusterLauncher(args.clusters, shard_count, max_concurrency)
+    asyncio.run(launcher.run())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+import random
+import sys
+from array import array
+from bisect import bisect_left
+
+# Participants d'un giveaway : identifiants 64 bits dans un tableau trié (8 octets chacun,
+# contre ~60 pour un int dans un set), plus un petit tampon d'ajouts et de retraits. Le
+# tampon est fusionné dans le tableau quand il dépasse une fraction de sa taille : chaque
+# opération reste en O(1) amorti. Forme binaire : le tableau brut, entiers little-endian.
+
+MIN_BUFFER = 256
+# Le tampon peut atteindre 1/BUFFER_RATIO du tableau avant fusion
+BUFFER_RATIO = 32
+# Fusion par tranches : les copies intermédiaires ne dépassent jamais COMPACT_CHUNK entiers
+COMPACT_CHUNK = 65536
+
+
+class EntrantSet:
+    """Ensemble compact d'identifiants Discord (tableau trié + tampon)"""
+
+    __slots__ = ("_sorted", "_added", "_removed")
+
+    def __init__(self, values=()):
+        self._sorted = array("Q")
+        self._added: set[int] = set()
+        self._removed: set[int] = set()
+        for value in values:
+            self.add(value)
+
+    @classmethod
+    def from_bytes(cls, data: bytes | None) -> "EntrantSet":
+        """Relit la forme binaire produite par to_bytes"""
+        entrants = cls()
+        if data:
+            entrants._sorted.frombytes(data)
+            if sys.byteorder == "big":
+                entrants._sorted.byteswap()
+        return entrants
+
+    def to_bytes(self) -> bytes:
+        self._compact()
+        if sys.byteorder == "big":
+            values = array("Q", self._sorted)
+            values.byteswap()
+            return values.tobytes()
+        return self._sorted.tobytes()
+
+    def _in_sorted(self, value: int) -> bool:
+        index = bisect_left(self._sorted, value)
+        return index < len(self._sorted) and self._sorted[index] == value
+
+    def __contains__(self, value: int) -> bool:
+        if value in self._added:
+            return True
+        return value not in self._removed and self._in_sorted(value)
+
+    def __len__(self) -> int:
+        return len(self._sorted) - len(self._removed) + len(self._added)
+
+    def __bool__(self) -> bool:
+        return len(self) > 0
+
+    def __iter__(self):
+        self._compact()
+        return iter(self._sorted)
+
+    def add(self, value: int):
+        if value in self._removed:
+            self._removed.discard(value)
+        elif not self._in_sorted(value):
+            self._added.add(value)
+            self._maybe_compact()
+
+    def discard(self, value: int):
+        if value in self._added:
+            self._added.discard(value)
+        elif value not in self._removed and self._in_sorted(value):
+            self._removed.add(value)
+            self._maybe_compact()
+
+    def _maybe_compact(self):
+        if len(self._added) + len(self._removed) > max(MIN_BUFFER, len(self._sorted) // BUFFER_RATIO):
+            self._compact()
+
+    def _compact(self):
+        if not self._added and not self._removed:
+            return
+        # Fusion dans un nouveau tableau : les segments inchangés de l'ancien sont copiés par
+        # tranches (en C), seul le tampon est parcouru en Python. Le pic reste l'ancien tableau
+        # plus le nouveau, sans liste de la taille de l'ensemble
+        old = self._sorted
+        compacted = array("Q")
+        start = 0
+        # Ajouts absents du tableau, retraits présents : les deux ensembles sont disjoints
+        for value in sorted(self._added | self._removed):
+            index = bisect_left(old, value, start)
+            self._copy(old, start, index, compacted)
+            if value in self._added:
+                compacted.append(value)
+                start = index
+            else:
+                start = index + 1
+        self._copy(old, start, len(old), compacted)
+        self._sorted = compacted
+        self._added.clear()
+        self._removed.clear()
+
+    @staticmethod
+    def _copy(source: array, start: int, stop: int, target: array):
+        for offset in range(start, stop, COMPACT_CHUNK):
+            target.extend(source[offset:min(stop, offset + COMPACT_CHUNK)])
+
+    def shuffled(self, rng: random.Random | None = None):
+        """Parcourt les participants dans un ordre aléatoire, sans copier le tableau"""
+        self._compact()
+        rng = rng or random
+        values = self._sorted
+        count = len(values)
+        # Fisher-Yates paresseux : seules les positions déjà échangées sont mémorisées
+        swaps: dict[int, int] = {}
+        for i in range(count):
+            j = rng.randrange(i, count)
+            picked = swaps.get(j, j)
+            swaps[j] = swaps.pop(i, i)
+            yield values[picked]
@@ -0,0 +1,178 @@
+import asyncio
+import logging
+import os
+import signal
+import time
+
+from discord.ext import commands
+
+from core import serialization
+
+# Arrêt propre et redémarrage à chaud :
+# - sur SIGTERM/SIGINT, les événements gateway cessent d'être traités, les handlers en cours
+#   (listeners, commandes slash, boutons) sont drainés, chaque cog écrit ses caches chauds
+#   (snapshot_state) dans un instantané compact, puis le bot se déconnecte et la base est
+#   fermée en dernier ;
+# - au démarrage suivant, l'instantané est relu dans setup_hook, avant la connexion à la
+#   gateway, et rendu aux cogs (restore_state) au lieu de tout re-télécharger via REST.
+
+WARM_SNAPSHOT_FILE = "warm_snapshot.json"
+SNAPSHOT_VERSION = 1
+logger = logging.getLogger("bot.lifecycle")
+
+# Noms des tâches créées par discord.py pour traiter un événement ou une interaction
+HANDLER_TASK_PREFIXES = ("discord.py: ", "CommandTree-invoker", "discord-ui-view-dispatch-", "discord-ui-dynamic-item-")
+# Événements de session encore traités pendant l'arrêt (ils ne déclenchent aucun handler métier)
+SESSION_EVENTS = {"READY", "RESUMED"}
+
+
+def in_flight_handlers() -> set[asyncio.Task]:
+    current = asyncio.current_task()
+    return {
+        task for task in asyncio.all_tasks()
+        if task is not current and not task.done() and task.get_name().startswith(HANDLER_TASK_PREFIXES)
+    }
+
+
+class WarmSnapshot:
+    """Instantané des caches chauds des cogs, relu une seule fois au démarrage suivant"""
+
+    def __init__(self, path: str = WARM_SNAPSHOT_FILE, max_age: float = 900):
+        self.path = path
+        self.max_age = max_age
+
+    def write(self, bot: commands.Bot) -> int:
+        """Écrit l'état de chaque cog exposant snapshot_state ; renvoie la taille en octets"""
+        sections = {}
+        for name, cog in bot.cogs.items():
+            snapshot = getattr(cog, "snapshot_state", None)
+            if snapshot is None:
+                continue
+            try:
+                sections[name] = snapshot()
+            except Exception as e:
+                logger.error(f"Erreur instantané du cog {name}: {e}")
+        data = {"version": SNAPSHOT_VERSION, "written_at": time.time(), "cogs": sections}
+        temp_file = f"{self.path}.tmp"
+        with open(temp_file, "w", encoding="utf-8") as f:
+            serialization.dump(data, f)
+        os.replace(temp_file, self.path)
+        return os.path.getsize(self.path)
+
+    def restore(self, bot: commands.Bot) -> list[str]:
+        """Rend l'instantané aux cogs (restore_state) puis le supprime ; renvoie les cogs restaurés"""
+        if not os.path.exists(self.path):
+            return []
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = serialization.load(f)
+        except Exception as e:
+            logger.error(f"Instantané {self.path} illisible: {e}")
+            data = None
+        # Consommé dans tous les cas : un instantané ne doit pas être réappliqué après un crash
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
+        if not isinstance(data, dict) or data.get("version") != SNAPSHOT_VERSION:
+            return []
+        age = time.time() - data.get("written_at", 0)
+        if age > self.max_age:
+            logger.info(f"Instantané ignoré : trop ancien ({age:.0f}s)")
+            return []
+
+        restored = []
+        for name, state in data.get("cogs", {}).items():
+            cog = bot.get_cog(name)
+            restore = getattr(cog, "restore_state", None)
+            if restore is None:
+                continue
+            try:
+                restore(state)
+                restored.append(name)
+            except Exception as e:
+                logger.error(f"Erreur restauration du cog {name}: {e}")
+        logger.info(f"Instantané de {age:.0f}s restauré pour {', '.join(restored) or 'aucun cog'}")
+        return restored
+
+
+class GracefulShutdown:
+    """Arrêt sur signal : arrêt des entrées, drainage des handlers, instantané, fermeture"""
+
+    def __init__(self, bot: commands.Bot, snapshot: WarmSnapshot, drain_timeout: float = 10.0):
+        self.bot = bot
+        self.snapshot = snapshot
+        self.drain_timeout = drain_timeout
+        self.draining = False
+        self.dropped = 0
+        self._task: asyncio.Task | None = None
+
+    def _guard(self, parse):
+        def guarded(data):
+            if self.draining:
+                self.dropped += 1
+                return
+            return parse(data)
+        return guarded
+
+    def install(self):
+        """Installe les gestionnaires SIGTERM/SIGINT sur la boucle courante"""
+        # Tous les événements gateway (listeners, interactions, vues) passent par ces parseurs :
+        # pendant l'arrêt ils sont ignorés et plus aucun handler ne démarre
+        parsers = self.bot._connection.parsers
+        for event, parse in list(parsers.items()):
+            if event not in SESSION_EVENTS:
+                parsers[event] = self._guard(parse)
+        # Services annexes puis base fermés dans bot.close() : bot.run() l'attend avant d'arrêter
+        # la boucle, et les handlers encore actifs ont pu différer des écritures jusque-là
+        close = self.bot.close
+
+        async def close_all():
+            await close()
+            for name in ("metrics_server", "cluster"):
+                service = getattr(self.bot, name, None)
+                if service is not None:
+                    try:
+                        await service.close()
+                    except Exception as e:
+                        logger.error(f"Erreur fermeture de {name}: {e}")
+            storage = getattr(self.bot, "storage", None)
+            if storage is not None:
+                await storage.close()
+
+        self.bot.close = close_all
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGTERM, signal.SIGINT):
+            try:
+                loop.add_signal_handler(sig, self.trigger, sig.name)
+            except (NotImplementedError, RuntimeError):
+                # Windows : pas de add_signal_handler, repli sur signal.signal
+                signal.signal(sig, lambda signum, frame: loop.call_soon_threadsafe(self.trigger, signal.Signals(signum).name))
+
+    def trigger(self, reason: str = "signal"):
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self.run(reason), name="graceful-shutdown")
+
+    async def run(self, reason: str):
+        start = time.perf_counter()
+        self.draining = True
+        logger.info(f"Arrêt demandé ({reason}), événements gateway ignorés, drainage des handlers en cours...")
+
+        deadline = time.monotonic() + self.drain_timeout
+        pending = in_flight_handlers()
+        while pending and time.monotonic() < deadline:
+            await asyncio.wait(pending, timeout=deadline - time.monotonic())
+            pending = in_flight_handlers()
+        if pending:
+            logger.warning(f"{len(pending)} handler(s) encore actifs après {self.drain_timeout:.0f}s, arrêt quand même")
+
+        try:
+            size = self.snapshot.write(self.bot)
+            logger.info(f"Instantané chaud écrit ({size / 1024:.1f} Ko)")
+        except Exception as e:
+            logger.error(f"Erreur écriture instantané: {e}")
+
+        await self.bot.close()
+        if self.dropped:
+            logger.info(f"{self.dropped} événement(s) gateway ignoré(s) pendant l'arrêt")
+        logger.info(f"Arrêt propre en {time.perf_counter() - start:.2f}s")
@@ -0,0 +1,115 @@
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+from datetime import datetime, timezone
+
+from core.metrics import REGISTRY, Counter, Gauge
+
+# Pipeline de logs non bloquant : en mode "queue", les handlers des cogs ne font que
+# déposer l'enregistrement dans une file bornée ; un thread d'écoute formate et écrit
+# sur stderr. Si la file est pleine, l'enregistrement est abandonné (et compté) plutôt
+# que de bloquer la boucle asyncio.
+
+TEXT_FORMAT = '%(asctime)s %(levelname)-8s %(name)-12s %(message)s'
+DATE_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+LOG_DROPPED = REGISTRY.register(Counter(
+    "bot_log_records_dropped_total", "Enregistrements de log abandonnés (file pleine)", ("level",)))
+
+
+class JsonFormatter(logging.Formatter):
+    """Une ligne JSON par enregistrement (ts, level, logger, msg, exc)"""
+
+    def __init__(self, static_fields: dict | None = None):
+        super().__init__()
+        self.static_fields = static_fields or {}
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+            **self.static_fields,
+        }
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler qui n'attend jamais : file pleine => enregistrement compté puis abandonné"""
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self._unreported = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Seul le strict nécessaire est fait ici : fusion des arguments (ils peuvent
+        # changer après l'appel) et rendu de la trace ; le formatage complet est fait
+        # par le thread d'écoute.
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self._unreported += 1
+            LOG_DROPPED.inc(level=record.levelname)
+            return
+        if self._unreported:
+            lost, self._unreported = self._unreported, 0
+            notice = logging.LogRecord("bot.logs", logging.WARNING, __file__, 0,
+                                       f"{lost} enregistrements de log perdus (file pleine)", None, None)
+            try:
+                self.queue.put_nowait(notice)
+            except queue.Full:
+                self._unreported += lost
+
+
+def _stop_listener(listener: logging.handlers.QueueListener):
+    # QueueListener.stop() échoue s'il a déjà été arrêté
+    if listener._thread is not None:
+        listener.stop()
+
+
+def setup_logging(prefix: str = "", mode: str | None = None, fmt: str | None = None, queue_size: int | None = None, static_fields: dict | None = None):
+    """Configure le logger racine (LOG_MODE=sync|queue, LOG_FORMAT=text|json, LOG_QUEUE_SIZE)"""
+    mode = (mode or os.getenv("LOG_MODE", "sync")).lower()
+    fmt = (fmt or os.getenv("LOG_FORMAT", "text")).lower()
+    queue_size = queue_size or int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+
+    stream = logging.StreamHandler(sys.stderr)
+    if fmt == "json":
+        stream.setFormatter(JsonFormatter(static_fields))
+    else:
+        stream.setFormatter(logging.Formatter(TEXT_FORMAT.replace('%(message)s', prefix + '%(message)s'), DATE_FORMAT))
+
+    root = logging.getLogger()
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+    root.setLevel(logging.INFO)
+
+    if mode != "queue":
+        root.addHandler(stream)
+        return None
+
+    log_queue = queue.Queue(maxsize=queue_size)
+    root.addHandler(DroppingQueueHandler(log_queue))
+    listener = logging.handlers.QueueListener(log_queue, stream, respect_handler_level=True)
+    listener.start()
+    # Vider la file à l'arrêt du processus
+    atexit.register(_stop_listener, listener)
+    REGISTRY.register(Gauge("bot_log_queue_size", "Enregistrements en attente d'écriture", log_queue.qsize))
+    return listener
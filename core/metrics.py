@@ -0,0 +1,254 @@
+import logging
+import math
+import time
+from contextlib import contextmanager
+
+from aiohttp import web
+from discord import app_commands
+from discord.ext import commands
+
+from core.perf import Histogram
+
+# Métriques internes exposées au format texte Prometheus par un petit serveur aiohttp
+# optionnel (METRICS_PORT, ou PORT fourni par Render), avec sondes /healthz et /readyz.
+
+logger = logging.getLogger("bot.metrics")
+
+
+def _format_labels(labels: dict) -> str:
+    if not labels:
+        return ""
+    parts = []
+    for key, value in labels.items():
+        value = str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        parts.append(f'{key}="{value}"')
+    return "{" + ",".join(parts) + "}"
+
+
+def _format_value(value: float) -> str:
+    if math.isnan(value):
+        return "NaN"
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value))
+
+
+class Counter:
+    """Compteur monotone, éventuellement étiqueté"""
+
+    type = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.values: dict[tuple, float] = {}
+
+    def inc(self, amount: float = 1, **labels):
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        self.values[key] = self.values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        return self.values.get(tuple(str(labels.get(name, "")) for name in self.labelnames), 0)
+
+    def render(self) -> list[str]:
+        return [
+            f"{self.name}{_format_labels(dict(zip(self.labelnames, key)))} {_format_value(value)}"
+            for key, value in sorted(self.values.items())
+        ]
+
+
+class Gauge:
+    """Valeur instantanée, fixée directement ou lue à chaque export"""
+
+    type = "gauge"
+
+    def __init__(self, name: str, documentation: str, function=None):
+        self.name = name
+        self.documentation = documentation
+        self.function = function
+        self.current = 0.0
+
+    def set(self, value: float):
+        self.current = value
+
+    def render(self) -> list[str]:
+        value = self.current
+        if self.function is not None:
+            try:
+                value = float(self.function())
+            except Exception:
+                value = math.nan
+        return [f"{self.name} {_format_value(value)}"]
+
+
+class LabeledHistogram:
+    """Famille d'histogrammes (un par combinaison d'étiquettes)"""
+
+    type = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.children: dict[tuple, Histogram] = {}
+
+    def labels(self, **labels) -> Histogram:
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        child = self.children.get(key)
+        if child is None:
+            child = self.children[key] = Histogram()
+        return child
+
+    def observe(self, value: float, **labels):
+        self.labels(**labels).observe(value)
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def render(self) -> list[str]:
+        lines = []
+        for key, histogram in sorted(self.children.items()):
+            labels = dict(zip(self.labelnames, key))
+            cumulative = 0
+            for bound, count in zip(histogram.buckets, histogram.counts):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{_format_labels({**labels, 'le': bound})} {cumulative}")
+            lines.append(f"{self.name}_bucket{_format_labels({**labels, 'le': '+Inf'})} {histogram.count}")
+            lines.append(f"{self.name}_sum{_format_labels(labels)} {_format_value(histogram.sum)}")
+            lines.append(f"{self.name}_count{_format_labels(labels)} {histogram.count}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self.metrics: dict[str, object] = {}
+
+    def register(self, metric):
+        self.metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self.metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+APP_COMMAND_LATENCY = REGISTRY.register(LabeledHistogram(
+    "bot_app_command_duration_seconds", "Durée de traitement des commandes slash", ("command", "status")))
+LISTENER_LATENCY = REGISTRY.register(LabeledHistogram(
+    "bot_listener_duration_seconds", "Durée d'exécution des listeners par événement", ("event",)))
+REST_REQUESTS = REGISTRY.register(Counter(
+    "bot_rest_requests_total", "Appels REST Discord par route et statut", ("route", "status")))
+REST_LATENCY = REGISTRY.register(LabeledHistogram(
+    "bot_rest_request_duration_seconds", "Latence des appels REST Discord par route", ("route",)))
+PERSIST_WRITES = REGISTRY.register(LabeledHistogram(
+    "bot_persist_write_duration_seconds", "Durée des écritures de persistance", ("store",)))
+LOOP_LAG = REGISTRY.register(LabeledHistogram(
+    "bot_loop_lag_seconds", "Retard de réveil de la boucle asyncio"))
+
+
+def persist_timer(store: str):
+    """Chronomètre une écriture de persistance : `with persist_timer("tickets"): ...`"""
+    return PERSIST_WRITES.time(store=store)
+
+
+class InstrumentedCommandTree(app_commands.CommandTree):
+    """Arbre de commandes mesurant la durée de chaque commande slash"""
+
+    async def _call(self, interaction):
+        start = time.perf_counter()
+        try:
+            await super()._call(interaction)
+        finally:
+            command = interaction.command
+            name = command.qualified_name if command else "inconnue"
+            status = "error" if interaction.command_failed else "ok"
+            APP_COMMAND_LATENCY.observe(time.perf_counter() - start, command=name, status=status)
+
+
+def instrument(bot: commands.Bot):
+    """Branche les mesures des listeners et des appels REST sur le bot"""
+    run_event = bot._run_event
+
+    async def timed_run_event(coro, event_name, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            await run_event(coro, event_name, *args, **kwargs)
+        finally:
+            LISTENER_LATENCY.observe(time.perf_counter() - start, event=event_name)
+
+    bot._run_event = timed_run_event
+
+    request = bot.http.request
+
+    async def timed_request(route, **kwargs):
+        # Le chemin non formaté (/channels/{channel_id}/messages) limite la cardinalité
+        name = f"{route.method} {route.path}"
+        start = time.perf_counter()
+        status = "ok"
+        try:
+            return await request(route, **kwargs)
+        except Exception as e:
+            status = str(getattr(e, "status", type(e).__name__))
+            raise
+        finally:
+            REST_LATENCY.observe(time.perf_counter() - start, route=name)
+            REST_REQUESTS.inc(route=name, status=status)
+
+    bot.http.request = timed_request
+
+    REGISTRY.register(Gauge("bot_gateway_latency_seconds", "Latence du heartbeat gateway", lambda: bot.latency))
+    REGISTRY.register(Gauge("bot_guilds", "Nombre de serveurs gérés par ce processus", lambda: len(bot.guilds)))
+    monitor = getattr(bot, "loop_monitor", None)
+    if monitor is not None:
+        LOOP_LAG.children[()] = monitor.lag
+
+
+class MetricsServer:
+    """Serveur HTTP local : /metrics, /healthz (vivant) et /readyz (prêt à servir)"""
+
+    def __init__(self, bot: commands.Bot, port: int, host: str = "0.0.0.0"):
+        self.bot = bot
+        self.port = port
+        self.host = host
+        self._runner: web.AppRunner | None = None
+
+    async def start(self):
+        app = web.Application()
+        app.router.add_get("/metrics", self._metrics)
+        app.router.add_get("/healthz", self._healthz)
+        app.router.add_get("/readyz", self._readyz)
+        app.router.add_get("/", self._healthz)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, self.host, self.port).start()
+        logger.info(f"Métriques exposées sur http://{self.host}:{self.port}/metrics")
+
+    async def close(self):
+        if self._runner:
+            await self._runner.cleanup()
+
+    async def _metrics(self, request: web.Request) -> web.Response:
+        return web.Response(text=REGISTRY.render(), headers={"Content-Type": "text/plain; version=0.0.4; charset=utf-8"})
+
+    async def _healthz(self, request: web.Request) -> web.Response:
+        # Si ce handler répond, la boucle n'est pas bloquée
+        if self.bot.is_closed():
+            return web.Response(status=503, text="closed")
+        return web.Response(text="ok")
+
+    async def _readyz(self, request: web.Request) -> web.Response:
+        if self.bot.is_ready() and not self.bot.is_closed():
+            return web.Response(text="ready")
+        return web.Response(status=503, text="starting")
@@ -0,0 +1,166 @@
+import asyncio
+import logging
+import sys
+import threading
+import time
+import traceback
+
+# Surveillance de la boucle asyncio :
+# - un échantillonneur mesure le retard de réveil de la boucle (histogramme) ;
+# - un thread de garde détecte la boucle bloquée au-delà d'un seuil et relève la
+#   coroutine en cours ainsi qu'un extrait de sa pile.
+
+logger = logging.getLogger("bot.perf")
+
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Histogram:
+    """Histogramme cumulatif à seaux fixes (en secondes)"""
+
+    def __init__(self, buckets: tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float):
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+        else:
+            self.counts[-1] += 1
+        self.count += 1
+        self.sum += value
+        if value > self.max:
+            self.max = value
+
+    def quantile(self, q: float) -> float:
+        """Borne supérieure du seau contenant le quantile q (approximation)"""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            seen += n
+            if seen >= rank:
+                return self.buckets[i] if i < len(self.buckets) else self.max
+        return self.max
+
+
+def _describe_task(task: asyncio.Task | None) -> str:
+    """Nom lisible de la coroutine la plus interne d'une tâche"""
+    if task is None:
+        return "<callback hors tâche>"
+    coro = task.get_coro()
+    name = getattr(coro, "__qualname__", repr(coro))
+    # Descendre la chaîne des await pour trouver le listener / la commande réellement actif
+    inner = getattr(coro, "cr_await", None)
+    while inner is not None and hasattr(inner, "__qualname__"):
+        name = inner.__qualname__
+        inner = getattr(inner, "cr_await", None)
+    return f"{name} [{task.get_name()}]"
+
+
+def _describe_frame(frame) -> str:
+    """Nom de la fonction bloquante d'après la pile seule (tâche en cours inconnue)"""
+    if frame is None:
+        return "<pile indisponible>"
+    code = frame.f_code
+    return f"{getattr(code, 'co_qualname', code.co_name)} [{code.co_filename}:{frame.f_lineno}]"
+
+
+def _current_task_lookup():
+    """Accès en lecture à la tâche en cours de chaque boucle (détail interne de CPython, peut manquer)"""
+    tasks = getattr(asyncio.tasks, "_current_tasks", None)
+    return getattr(tasks, "get", None)
+
+
+class SlowCallback:
+    """Statistiques d'un appelant ayant bloqué la boucle"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.stack: list[str] = []
+
+
+class LoopMonitor:
+    """Mesure le retard de la boucle et identifie les callbacks trop longs"""
+
+    def __init__(self, interval: float = 0.25, threshold: float = 0.25):
+        self.interval = interval
+        self.threshold = threshold
+        self.lag = Histogram()
+        self.offenders: dict[str, SlowCallback] = {}
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._loop_thread_id: int | None = None
+        self._heartbeat = time.monotonic()
+        self._stall: tuple[str, list[str]] | None = None
+        self._task: asyncio.Task | None = None
+        self._thread: threading.Thread | None = None
+        self._stopped = threading.Event()
+        # Résolu une fois : sans lui, le blocage est décrit d'après la pile seule
+        self._current_task = _current_task_lookup()
+
+    def start(self):
+        """Démarre l'échantillonneur et le thread de garde (à appeler depuis la boucle)"""
+        if self._task is not None:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        self._heartbeat = time.monotonic()
+        self._task = self._loop.create_task(self._sample(), name="loop-monitor")
+        self._thread = threading.Thread(target=self._watchdog, name="loop-watchdog", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        if self._task:
+            self._task.cancel()
+
+    async def _sample(self):
+        while True:
+            start = time.monotonic()
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            self._heartbeat = now
+            lag = max(0.0, now - start - self.interval)
+            self.lag.observe(lag)
+            stall, self._stall = self._stall, None
+            if stall is not None:
+                self._record(stall[0], stall[1], lag)
+
+    def _record(self, name: str, stack: list[str], duration: float):
+        entry = self.offenders.get(name)
+        if entry is None:
+            entry = self.offenders[name] = SlowCallback(name)
+        entry.count += 1
+        entry.total += duration
+        if duration >= entry.max:
+            entry.max = duration
+            entry.stack = stack
+        logger.warning(f"Boucle bloquée {duration * 1000:.0f}ms par {name}\n" + "".join(stack))
+
+    def _watchdog(self):
+        while not self._stopped.wait(self.threshold / 4):
+            overdue = time.monotonic() - self._heartbeat - self.interval
+            if overdue < self.threshold or self._stall is not None:
+                continue
+            # La boucle est bloquée : relever la tâche en cours et sa pile pendant le blocage
+            frame = sys._current_frames().get(self._loop_thread_id)
+            stack = traceback.format_stack(frame, limit=12) if frame is not None else []
+            name = None
+            if self._current_task is not None:
+                try:
+                    name = _describe_task(self._current_task(self._loop))
+                except Exception:
+                    name = None
+            self._stall = (name or _describe_frame(frame), stack)
+
+    def top_offenders(self, limit: int = 5) -> list[SlowCallback]:
+        return sorted(self.offenders.values(), key=lambda entry: entry.total, reverse=True)[:limit]
@@ -0,0 +1,49 @@
+import json
+import logging
+
+# Sérialisation JSON (instantané chaud, configurations des tickets, anciens fichiers de données).
+# Par défaut : json standard, indenté et lisible. Profil rapide : orjson en sortie
+# compacte s'il est installé, sinon retour silencieux au json standard.
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+logger = logging.getLogger("bot.serialization")
+
+_fast = False
+
+
+def enable_fast() -> bool:
+    """Active orjson pour les fichiers de données ; False s'il n'est pas installé"""
+    global _fast
+    _fast = orjson is not None
+    return _fast
+
+
+def is_fast() -> bool:
+    return _fast
+
+
+def dumps(obj, indent: int | None = None) -> str:
+    if _fast:
+        # OPT_NON_STR_KEYS : clés entières converties en texte, comme json.dumps
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS).decode("utf-8")
+    return json.dumps(obj, indent=indent, ensure_ascii=False)
+
+
+def loads(data: str | bytes):
+    # orjson.JSONDecodeError hérite de json.JSONDecodeError : les except existants restent valables
+    if _fast:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def dump(obj, f, indent: int | None = None):
+    """Équivalent de json.dump (l'indentation est ignorée en profil rapide)"""
+    f.write(dumps(obj, indent=indent))
+
+
+def load(f):
+    return loads(f.read())
@@ -0,0 +1,80 @@
+import asyncio
+import logging
+import time
+from contextlib import contextmanager
+
+from discord.ext import commands
+
+# Pipeline de démarrage : exécuté une seule fois depuis setup_hook, avant la connexion
+# à la gateway. Les reconnexions (nouvel on_ready) ne le relancent jamais.
+
+logger = logging.getLogger("bot.startup")
+
+
+class StartupReport:
+    """Chronomètre les étapes du démarrage jusqu'au premier on_ready"""
+
+    def __init__(self):
+        self.started_at = time.perf_counter()
+        self.phases: list[tuple[str, float]] = []
+        self.cogs: dict[str, tuple[float, str | None]] = {}
+        self.ready_after: float | None = None
+        self._last_checkpoint = self.started_at
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started_at
+
+    @contextmanager
+    def phase(self, name: str):
+        """Mesure la durée d'une étape (utilisable autour d'un await)"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases.append((name, time.perf_counter() - start))
+
+    def checkpoint(self, name: str):
+        """Enregistre le temps écoulé depuis le point de contrôle précédent"""
+        now = time.perf_counter()
+        self.phases.append((name, now - self._last_checkpoint))
+        self._last_checkpoint = now
+
+    def mark_ready(self) -> bool:
+        """Enregistre le premier on_ready ; renvoie False si déjà fait"""
+        if self.ready_after is not None:
+            return False
+        self.checkpoint("gateway jusqu'à READY")
+        self.ready_after = self.elapsed()
+        return True
+
+    def render(self) -> str:
+        lines = []
+        if self.ready_after is not None:
+            lines.append(f"Rapport de démarrage (time-to-ready {self.ready_after:.2f}s)")
+        else:
+            lines.append(f"Rapport de démarrage (en cours, {self.elapsed():.2f}s)")
+        for name, duration in self.phases:
+            lines.append(f"  {name:<24} {duration:7.3f}s")
+        for cog, (duration, error) in sorted(self.cogs.items(), key=lambda item: -item[1][0]):
+            status = f"ERREUR: {error}" if error else "ok"
+            lines.append(f"    {cog:<22} {duration:7.3f}s  {status}")
+        return "\n".join(lines)
+
+
+async def _load_cog(bot: commands.Bot, name: str, report: StartupReport):
+    start = time.perf_counter()
+    error = None
+    try:
+        await bot.load_extension(name)
+    except Exception as e:
+        error = str(e)
+        logger.error(f"Erreur chargement cog {name}: {e}")
+    report.cogs[name] = (time.perf_counter() - start, error)
+
+
+async def load_cogs(bot: commands.Bot, names: list[str], report: StartupReport):
+    """Charge les cogs en parallèle avec un chronométrage par cog"""
+    with report.phase("chargement des cogs"):
+        await asyncio.gather(*(_load_cog(bot, name, report) for name in names))
+    loaded = sum(1 for _, error in report.cogs.values() if error is None)
+    logger.info(f"{loaded}/{len(names)} cogs chargés")
@@ -0,0 +1,480 @@
+import asyncio
+import atexit
+import logging
+import os
+import sqlite3
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from core import serialization
+from core.metrics import PERSIST_WRITES, REGISTRY, Counter, Gauge
+
+# Stockage unique des données persistantes (tickets, avertissements, invitations, rôles).
+# SQLite en mode WAL, une table par entité : un avertissement ou un ticket de plus est une
+# insertion d'une ligne, quelle que soit la taille de l'historique. Toutes les requêtes passent
+# par un thread dédié, la boucle asyncio n'attend jamais le disque.
+#
+# Le schéma est versionné par PRAGMA user_version ; au premier démarrage les anciens fichiers
+# JSON sont importés puis renommés en .migrated (gardés comme sauvegarde).
+#
+# Écritures différées (defer) : les mises à jour fréquentes (arrivées en rafale, tickets) sont
+# regroupées par clé, la plus récente remplaçant celle en attente, et écrites en une seule
+# transaction au plus une fois par intervalle ou dès que le seuil d'écritures en attente est
+# atteint. close() vide toujours la file ; à défaut (arrêt brutal de la boucle), atexit s'en charge.
+#
+# GuildCache : les cogs ne gardent en mémoire que les guildes actives. Les données d'une guilde
+# sont lues au premier accès (une plage de clés guild_id) et évincées après inactivité ou quand
+# la borne LRU est atteinte ; le temps de chargement des cogs ne dépend plus du nombre de guildes.
+
+DB_FILE = "bot.db"
+logger = logging.getLogger("bot.storage")
+
+WRITES_DEFERRED = REGISTRY.register(Counter(
+    "bot_storage_writes_deferred_total", "Écritures différées demandées", ("store",)))
+WRITES_COALESCED = REGISTRY.register(Counter(
+    "bot_storage_writes_coalesced_total", "Écritures différées remplacées par une plus récente avant le flush", ("store",)))
+GUILD_CACHE_REQUESTS = REGISTRY.register(Counter(
+    "bot_guild_cache_requests_total", "Accès aux données par guilde (hit, miss)", ("cache", "result")))
+GUILD_CACHE_EVICTIONS = REGISTRY.register(Counter(
+    "bot_guild_cache_evictions_total", "Guildes évincées de la mémoire", ("cache",)))
+
+# Une entrée par version du schéma, appliquées dans l'ordre
+MIGRATIONS = [
+    """
+    CREATE TABLE ticket_configs (
+        guild_id INTEGER PRIMARY KEY,
+        config TEXT NOT NULL
+    );
+    CREATE TABLE tickets (
+        guild_id INTEGER NOT NULL,
+        name TEXT NOT NULL,
+        channel_id INTEGER,
+        creator_id INTEGER,
+        status TEXT NOT NULL DEFAULT 'open',
+        created_at TEXT,
+        closed_by INTEGER,
+        closed_at TEXT,
+        PRIMARY KEY (guild_id, name)
+    );
+    CREATE TABLE warnings (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        guild_id INTEGER NOT NULL,
+        user_id INTEGER NOT NULL,
+        moderator_id INTEGER,
+        reason TEXT,
+        timestamp TEXT NOT NULL
+    );
+    CREATE INDEX warnings_by_member ON warnings (guild_id, user_id, id);
+    CREATE TABLE invite_members (
+        guild_id INTEGER NOT NULL,
+        member_id INTEGER NOT NULL,
+        inviter_id INTEGER NOT NULL,
+        PRIMARY KEY (guild_id, member_id)
+    );
+    CREATE TABLE invite_counts (
+        guild_id INTEGER NOT NULL,
+        inviter_id INTEGER NOT NULL,
+        net INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (guild_id, inviter_id)
+    );
+    CREATE TABLE reaction_roles (
+        name TEXT PRIMARY KEY,
+        message_id INTEGER
+    );
+    """,
+    # Avertissements : journal d'événements en ajout seul (warn / unwarn), compacté par le cog
+    """
+    CREATE TABLE warning_events (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        kind TEXT NOT NULL,
+        guild_id INTEGER NOT NULL,
+        user_id INTEGER NOT NULL,
+        target_id INTEGER,
+        moderator_id INTEGER,
+        reason TEXT,
+        timestamp TEXT NOT NULL
+    );
+    INSERT INTO warning_events (id, kind, guild_id, user_id, moderator_id, reason, timestamp)
+        SELECT id, 'warn', guild_id, user_id, moderator_id, reason, timestamp FROM warnings;
+    DROP TABLE warnings;
+    """,
+    # Chargement des données par guilde (GuildCache)
+    """
+    CREATE INDEX warning_events_by_guild ON warning_events (guild_id, id);
+    """,
+    # Tickets fermés archivés hors base : le dernier numéro attribué ne se déduit plus des lignes
+    """
+    CREATE TABLE counters (
+        name TEXT PRIMARY KEY,
+        value INTEGER NOT NULL
+    );
+    INSERT INTO counters (name, value)
+        SELECT 'ticket', COALESCE(MAX(CAST(substr(name, 8) AS INTEGER)), 0) FROM tickets WHERE name LIKE 'ticket-%';
+    """,
+    # Numérotation des tickets par guilde ; chaque guilde existante repart du dernier numéro global
+    """
+    CREATE TABLE ticket_counters (
+        guild_id INTEGER PRIMARY KEY,
+        value INTEGER NOT NULL
+    );
+    INSERT INTO ticket_counters (guild_id, value)
+        SELECT guild_id, (SELECT value FROM counters WHERE name = 'ticket') FROM ticket_configs
+        UNION SELECT guild_id, (SELECT value FROM counters WHERE name = 'ticket') FROM tickets;
+    DROP TABLE counters;
+    """,
+    # Suppressions différées des salons de tickets fermés, reprises après un redémarrage
+    """
+    CREATE TABLE ticket_close_jobs (
+        channel_id INTEGER PRIMARY KEY,
+        guild_id INTEGER NOT NULL,
+        due_at REAL NOT NULL,
+        attempts INTEGER NOT NULL DEFAULT 0
+    );
+    """,
+    # Giveaways en cours et leurs participants (repris au démarrage)
+    """
+    CREATE TABLE giveaways (
+        message_id INTEGER PRIMARY KEY,
+        guild_id INTEGER NOT NULL,
+        channel_id INTEGER NOT NULL,
+        host_id INTEGER NOT NULL,
+        prize TEXT NOT NULL,
+        end_at TEXT NOT NULL,
+        winners_count INTEGER NOT NULL,
+        image_url TEXT,
+        is_fast INTEGER NOT NULL DEFAULT 0,
+        preferred_winners TEXT NOT NULL DEFAULT '[]'
+    );
+    CREATE TABLE giveaway_entrants (
+        message_id INTEGER NOT NULL,
+        user_id INTEGER NOT NULL,
+        PRIMARY KEY (message_id, user_id)
+    ) WITHOUT ROWID;
+    """,
+    # Participants : instantané binaire (EntrantSet) + journal des changements depuis l'instantané
+    """
+    ALTER TABLE giveaways ADD COLUMN entrants BLOB;
+    ALTER TABLE giveaway_entrants ADD COLUMN entered INTEGER NOT NULL DEFAULT 1;
+    """,
+    # Gagnants choisis à la main (/gw start) : la liste ne doit plus être complétée par les réactions
+    """
+    ALTER TABLE giveaways ADD COLUMN manual INTEGER NOT NULL DEFAULT 0;
+    """,
+]
+
+
+def _read_legacy(path: str):
+    """Contenu d'un ancien fichier JSON, None s'il est absent ou illisible"""
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = serialization.load(f)
+    except Exception as e:
+        logger.error(f"Import de {path} impossible: {e}")
+        try:
+            os.rename(path, f"{path}.backup.{int(time.time())}")
+        except OSError:
+            pass
+        return None
+    return data if isinstance(data, dict) else None
+
+
+def _import_tickets(conn: sqlite3.Connection, data: dict):
+    for guild_id, guild_data in data.items():
+        if not isinstance(guild_data, dict):
+            continue
+        if guild_data.get("config"):
+            conn.execute("INSERT OR REPLACE INTO ticket_configs VALUES (?, ?)",
+                         (int(guild_id), serialization.dumps(guild_data["config"])))
+        for name, ticket in guild_data.get("tickets", {}).items():
+            if not isinstance(ticket, dict):
+                continue
+            conn.execute(
+                "INSERT OR REPLACE INTO tickets VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (int(guild_id), name, ticket.get("channel_id"), ticket.get("creator_id"), ticket.get("status", "open"),
+                 ticket.get("created_at"), ticket.get("closed_by"), ticket.get("closed_at"))
+            )
+
+
+def _import_warnings(conn: sqlite3.Connection, data: dict):
+    for guild_id, members in data.items():
+        if not isinstance(members, dict):
+            continue
+        for user_id, warnings in members.items():
+            if not isinstance(warnings, list):
+                continue
+            conn.executemany(
+                "INSERT INTO warnings (guild_id, user_id, moderator_id, reason, timestamp) VALUES (?, ?, ?, ?, ?)",
+                [(int(guild_id), int(user_id), w.get("moderator"), w.get("reason"), w.get("timestamp"))
+                 for w in warnings if isinstance(w, dict) and w.get("timestamp")]
+            )
+
+
+def _import_invite_stats(conn: sqlite3.Connection, data: dict):
+    for guild_id, gstats in data.get("guilds", {}).items():
+        conn.executemany(
+            "INSERT OR REPLACE INTO invite_members VALUES (?, ?, ?)",
+            [(int(guild_id), int(member_id), int(inviter_id))
+             for member_id, inviter_id in gstats.get("member_to_inviter", {}).items()]
+        )
+        conn.executemany(
+            "INSERT OR REPLACE INTO invite_counts VALUES (?, ?, ?)",
+            [(int(guild_id), int(inviter_id), int(net)) for inviter_id, net in gstats.get("net_invites", {}).items()]
+        )
+
+
+def _import_reaction_roles(conn: sqlite3.Connection, data: dict):
+    conn.executemany(
+        "INSERT OR REPLACE INTO reaction_roles VALUES (?, ?)",
+        [(name, data.get(name)) for name in ("message_id_genre", "message_id_age") if data.get(name)]
+    )
+
+
+# Anciens fichiers JSON importés avec le schéma initial
+LEGACY_FILES = {
+    "tickets.json": _import_tickets,
+    "warnings.json": _import_warnings,
+    "invite_stats.json": _import_invite_stats,
+    "reaction_roles.json": _import_reaction_roles,
+}
+
+
+class Storage:
+    """Base SQLite partagée par les cogs, accessible via bot.storage"""
+
+    def __init__(self, path: str = DB_FILE, legacy_dir: str = ".", flush_interval: float = 1.0, max_pending: int = 500,
+                 guild_cache_size: int = 1000, guild_cache_ttl: float = 3600):
+        self.path = path
+        self.legacy_dir = legacy_dir
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.guild_cache_size = guild_cache_size
+        self.guild_cache_ttl = guild_cache_ttl
+        self._conn: sqlite3.Connection | None = None
+        # Un seul thread : la connexion n'est jamais partagée et les écritures sont sérialisées
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="storage")
+        # (store, *clé) -> requêtes ; l'ordre d'insertion est l'ordre d'écriture
+        self._pending: dict[tuple, tuple] = {}
+        self._flush_handle: asyncio.TimerHandle | None = None
+        self._flush_lock = asyncio.Lock()
+        self._closed = False
+        self._close_task: asyncio.Task | None = None
+        REGISTRY.register(Gauge("bot_storage_pending_writes", "Écritures différées en attente", lambda: len(self._pending)))
+        atexit.register(self._flush_at_exit)
+
+    async def _call(self, fn, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+
+    async def open(self):
+        """Ouvre la base, applique les migrations du schéma et importe les anciens fichiers JSON"""
+        await self._call(self._open)
+
+    def _open(self):
+        conn = sqlite3.connect(self.path, isolation_level=None, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        # WAL + NORMAL : durable à chaque commit sauf coupure de courant, sans fsync par écriture
+        conn.execute("PRAGMA synchronous=NORMAL")
+        # Les processus du mode cluster partagent la même base
+        conn.execute("PRAGMA busy_timeout=5000")
+        self._conn = conn
+
+        imported: list[str] = []
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            version = conn.execute("PRAGMA user_version").fetchone()[0]
+            for target, script in enumerate(MIGRATIONS[version:], start=version + 1):
+                for statement in script.split(";"):
+                    if statement.strip():
+                        conn.execute(statement)
+                if target == 1:
+                    imported = self._import_legacy(conn)
+                conn.execute(f"PRAGMA user_version={target}")
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        if version < len(MIGRATIONS):
+            logger.info(f"Schéma de {self.path} migré de la version {version} à {len(MIGRATIONS)}")
+            # Renommés seulement une fois la transaction validée
+            for path in imported:
+                os.replace(path, f"{path}.migrated")
+            if imported:
+                logger.info(f"Anciens fichiers importés : {', '.join(os.path.basename(p) for p in imported)}")
+
+    def _import_legacy(self, conn: sqlite3.Connection) -> list[str]:
+        imported = []
+        for name, importer in LEGACY_FILES.items():
+            path = os.path.join(self.legacy_dir, name)
+            data = _read_legacy(path)
+            if data is not None:
+                importer(conn, data)
+                imported.append(path)
+        return imported
+
+    def _execute(self, sql: str, params) -> int:
+        return self._conn.execute(sql, params).lastrowid
+
+    def _fetchall(self, sql: str, params) -> list[sqlite3.Row]:
+        return self._conn.execute(sql, params).fetchall()
+
+    def _write(self, statements) -> None:
+        self._conn.execute("BEGIN")
+        try:
+            for sql, params in statements:
+                self._conn.execute(sql, params)
+            self._conn.execute("COMMIT")
+        except Exception:
+            self._conn.execute("ROLLBACK")
+            raise
+
+    async def execute(self, sql: str, params=()) -> int:
+        """Exécute une requête (validée immédiatement) ; renvoie le lastrowid"""
+        return await self._call(self._execute, sql, params)
+
+    async def write(self, *statements: tuple[str, tuple]):
+        """Exécute plusieurs requêtes (sql, params) dans une seule transaction"""
+        await self._call(self._write, statements)
+
+    async def fetchall(self, sql: str, params=()) -> list[sqlite3.Row]:
+        return await self._call(self._fetchall, sql, params)
+
+    def guild_cache(self, name: str, loader) -> "GuildCache":
+        """Cache par guilde d'un cog ; `loader(guild_id)` lit les données d'une guilde"""
+        cache = GuildCache(name, self, loader, self.guild_cache_size, self.guild_cache_ttl)
+        REGISTRY.register(Gauge(f"bot_guild_cache_{name}_guilds", f"Guildes en mémoire ({name})", cache.__len__))
+        return cache
+
+    def defer(self, store: str, key: tuple, *statements: tuple[str, tuple]):
+        """Écriture différée : remplace l'écriture en attente de même clé, écrite au prochain flush
+
+        Les requêtes doivent décrire l'état complet de la clé (INSERT OR REPLACE, DELETE) pour
+        que seule la dernière version ait besoin d'être écrite.
+        """
+        if self._closed:
+            # Plus aucun flush n'aura lieu : l'écriture serait perdue sans bruit
+            logger.error(f"Écriture différée après fermeture de la base ignorée ({store} {key})")
+            return
+        key = (store, *key)
+        if self._pending.pop(key, None) is not None:
+            WRITES_COALESCED.inc(store=store)
+        self._pending[key] = statements
+        WRITES_DEFERRED.inc(store=store)
+        if len(self._pending) >= self.max_pending:
+            self._schedule_flush(0)
+        elif self._flush_handle is None:
+            self._schedule_flush(self.flush_interval)
+
+    def _schedule_flush(self, delay: float):
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+        loop = asyncio.get_running_loop()
+        self._flush_handle = loop.call_later(delay, lambda: loop.create_task(self.flush(), name="storage-flush"))
+
+    async def flush(self):
+        """Écrit en une transaction toutes les écritures différées en attente"""
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        async with self._flush_lock:
+            if not self._pending or self._conn is None:
+                return
+            batch, self._pending = self._pending, {}
+            try:
+                with PERSIST_WRITES.time(store="write_behind"):
+                    await self._call(self._write, [statement for statements in batch.values() for statement in statements])
+            except Exception as e:
+                logger.error(f"Erreur écriture différée ({len(batch)} clés): {e}")
+                # Remises en attente, sauf celles remplacées entre-temps par une version plus récente
+                for key, statements in batch.items():
+                    self._pending.setdefault(key, statements)
+                if self._flush_handle is None:
+                    self._schedule_flush(self.flush_interval)
+
+    def _flush_at_exit(self):
+        # Dernier recours si la boucle s'est arrêtée sans close() : le thread dédié est déjà arrêté
+        if self._conn is None or not self._pending:
+            return
+        batch, self._pending = self._pending, {}
+        try:
+            self._write([statement for statements in batch.values() for statement in statements])
+        except Exception as e:
+            logger.error(f"Erreur écriture différée à la sortie ({len(batch)} clés): {e}")
+
+    async def close(self):
+        """Vide les écritures différées puis ferme la base"""
+        # Appels concurrents (arrêt propre et sortie de bot.run) : une seule fermeture, attendue par tous
+        if self._close_task is None:
+            self._close_task = asyncio.get_running_loop().create_task(self._close())
+        await asyncio.shield(self._close_task)
+
+    async def _close(self):
+        if self._conn is None:
+            return
+        self._closed = True
+        await self.flush()
+        atexit.unregister(self._flush_at_exit)
+        conn, self._conn = self._conn, None
+        await asyncio.get_running_loop().run_in_executor(self._executor, conn.close)
+        self._executor.shutdown(wait=False)
+
+
+class GuildCache:
+    """Données par guilde chargées au premier accès, évincées après inactivité (TTL) ou par LRU"""
+
+    def __init__(self, name: str, storage: Storage, loader, max_size: int = 1000, idle_ttl: float = 3600):
+        self.name = name
+        self.storage = storage
+        self.loader = loader
+        self.max_size = max_size
+        self.idle_ttl = idle_ttl
+        # guild_id -> (dernier accès, données), du moins au plus récemment utilisé
+        self._entries: OrderedDict[int, tuple[float, object]] = OrderedDict()
+        self._loading: dict[int, asyncio.Task] = {}
+
+    def __len__(self):
+        return len(self._entries)
+
+    def peek(self, guild_id: int):
+        """Données déjà en mémoire, sans chargement ni mise à jour du LRU"""
+        entry = self._entries.get(guild_id)
+        return entry[1] if entry is not None else None
+
+    async def get(self, guild_id: int):
+        now = time.monotonic()
+        self._evict(now)
+        entry = self._entries.get(guild_id)
+        if entry is not None:
+            self._entries[guild_id] = (now, entry[1])
+            self._entries.move_to_end(guild_id)
+            GUILD_CACHE_REQUESTS.inc(cache=self.name, result="hit")
+            return entry[1]
+        GUILD_CACHE_REQUESTS.inc(cache=self.name, result="miss")
+        # Accès simultanés à une guilde froide : un seul chargement
+        task = self._loading.get(guild_id)
+        if task is None:
+            task = self._loading[guild_id] = asyncio.create_task(self._load(guild_id))
+        return await asyncio.shield(task)
+
+    async def _load(self, guild_id: int):
+        try:
+            # Les écritures différées doivent être en base avant de relire une guilde évincée
+            if self.storage._pending:
+                await self.storage.flush()
+            data = await self.loader(guild_id)
+            self._entries[guild_id] = (time.monotonic(), data)
+            self._evict(time.monotonic())
+            return data
+        finally:
+            self._loading.pop(guild_id, None)
+
+    def _evict(self, now: float):
+        # Le plus ancien accès est en tête : on s'arrête à la première guilde encore active
+        while self._entries:
+            guild_id, (last_access, _) = next(iter(self._entries.items()))
+            if len(self._entries) <= self.max_size and now - last_access < self.idle_ttl:
+                break
+            del self._entries[guild_id]
+            GUILD_CACHE_EVICTIONS.inc(cache=self.name)
@@ -0,0 +1,180 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import random
+import time
+from dataclasses import dataclass
+
+import discord
+from discord.ext import commands
+
+# Cache des empreintes de l'arbre de commandes : une portée (globale ou guilde) n'est
+# repoussée à Discord que si le payload sérialisé a changé depuis la dernière sync.
+
+SYNC_CACHE_FILE = "sync_cache.json"
+logger = logging.getLogger("bot.sync")
+
+
+@dataclass
+class SyncResult:
+    scope: str
+    pushed: bool
+    duration: float = 0.0
+
+
+def scope_name(guild: discord.abc.Snowflake | None) -> str:
+    return "global" if guild is None else str(guild.id)
+
+
+def tree_fingerprint(tree: discord.app_commands.CommandTree, guild: discord.abc.Snowflake | None = None) -> str:
+    """Empreinte stable (sha256) du payload envoyé par tree.sync pour une portée"""
+    payload = [command.to_dict(tree) for command in tree.get_commands(guild=guild)]
+    payload.sort(key=lambda command: (command.get("type", 1), command["name"]))
+    raw = json.dumps(payload, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class CommandSyncCache:
+    """Empreintes des dernières syncs réussies, persistées dans un fichier local"""
+
+    def __init__(self, path: str = SYNC_CACHE_FILE):
+        self.path = path
+        self.fingerprints: dict[str, str] = self._load()
+
+    def _load(self) -> dict:
+        try:
+            if os.path.exists(self.path):
+                with open(self.path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+                if isinstance(data, dict):
+                    return data
+                logger.warning(f"Format invalide dans {self.path}, cache de sync réinitialisé")
+        except Exception as e:
+            logger.error(f"Erreur lecture {self.path}: {e}")
+        return {}
+
+    def _save(self):
+        temp_file = f"{self.path}.tmp"
+        try:
+            with open(temp_file, "w", encoding="utf-8") as f:
+                json.dump(self.fingerprints, f, indent=2)
+            os.replace(temp_file, self.path)
+        except Exception as e:
+            logger.error(f"Erreur sauvegarde {self.path}: {e}")
+
+    @staticmethod
+    def _key(bot: commands.Bot, scope: str) -> str:
+        # Préfixé par l'application pour qu'un bot de test ne réutilise pas le cache de prod
+        return f"{bot.application_id}:{scope}"
+
+    def is_current(self, bot: commands.Bot, scope: str, fingerprint: str) -> bool:
+        return self.fingerprints.get(self._key(bot, scope)) == fingerprint
+
+    def store(self, bot: commands.Bot, scope: str, fingerprint: str):
+        self.fingerprints[self._key(bot, scope)] = fingerprint
+        self._save()
+
+
+async def sync_scope(bot: commands.Bot, cache: CommandSyncCache, guild: discord.abc.Snowflake | None = None, force: bool = False) -> SyncResult:
+    """Synchronise une portée seulement si son empreinte a changé (ou si force=True)"""
+    scope = scope_name(guild)
+    fingerprint = tree_fingerprint(bot.tree, guild)
+    if not force and cache.is_current(bot, scope, fingerprint):
+        logger.info(f"Sync ignorée pour {scope} : commandes inchangées")
+        return SyncResult(scope, pushed=False)
+
+    start = time.perf_counter()
+    await bot.tree.sync(guild=guild)
+    duration = time.perf_counter() - start
+    cache.store(bot, scope, fingerprint)
+    logger.info(f"Sync poussée pour {scope} en {duration:.2f}s")
+    return SyncResult(scope, pushed=True, duration=duration)
+
+
+class GuildSyncScheduler:
+    """File de syncs par guilde avec concurrence bornée et reprise sur rate limit/erreur serveur"""
+
+    def __init__(self, bot: commands.Bot, cache: CommandSyncCache, concurrency: int = 2, max_attempts: int = 5):
+        self.bot = bot
+        self.cache = cache
+        self.concurrency = concurrency
+        self.max_attempts = max_attempts
+        self.queue: asyncio.Queue[int] = asyncio.Queue()
+        self.pending: set[int] = set()
+        self.done = 0
+        self.pushed = 0
+        self.failed: dict[int, str] = {}
+        self._workers: list[asyncio.Task] = []
+        # Pause partagée : un 429 sur une portée globale ralentit tous les workers
+        self._resume_at = 0.0
+
+    def start(self):
+        if self._workers:
+            return
+        for i in range(self.concurrency):
+            self._workers.append(asyncio.create_task(self._worker(), name=f"guild-sync-{i}"))
+
+    def enqueue(self, guild: discord.abc.Snowflake):
+        """Ajoute une guilde à la file (ignorée si elle y est déjà)"""
+        if guild.id in self.pending:
+            return
+        self.pending.add(guild.id)
+        self.failed.pop(guild.id, None)
+        self.queue.put_nowait(guild.id)
+
+    def progress(self) -> dict:
+        return {"done": self.done, "pushed": self.pushed, "pending": len(self.pending), "failed": len(self.failed)}
+
+    async def join(self):
+        """Attend que la file soit vidée"""
+        await self.queue.join()
+
+    async def _worker(self):
+        while True:
+            guild_id = await self.queue.get()
+            try:
+                await self._sync_with_retry(guild_id)
+            except Exception as e:
+                self.failed[guild_id] = str(e)
+                logger.error(f"Erreur sync guilde {guild_id}: {e}")
+            finally:
+                self.pending.discard(guild_id)
+                self.queue.task_done()
+
+    async def _sync_with_retry(self, guild_id: int):
+        for attempt in range(1, self.max_attempts + 1):
+            wait = self._resume_at - time.monotonic()
+            if wait > 0:
+                await asyncio.sleep(wait)
+            # La guilde a pu être quittée pendant l'attente
+            guild = self.bot.get_guild(guild_id)
+            if guild is None:
+                return
+            try:
+                result = await sync_scope(self.bot, self.cache, guild=guild)
+            except discord.RateLimited as e:
+                # Les 429 sont réessayés par discord.py ; RateLimited signale une attente plus longue
+                # que max_ratelimit_timeout : toute la file est suspendue pendant ce délai
+                delay = e.retry_after
+                self._resume_at = max(self._resume_at, time.monotonic() + delay)
+                logger.warning(f"Sync guilde {guild_id} reportée de {delay:.1f}s (rate limit, tentative {attempt}/{self.max_attempts})")
+                continue
+            except discord.HTTPException as e:
+                if e.status >= 500:
+                    delay = min(60, 2 ** attempt) + random.random()
+                else:
+                    # 403 (scope applications.commands manquant) ou payload invalide : inutile de réessayer
+                    self.failed[guild_id] = f"{e.status}: {e.text}"
+                    logger.warning(f"Sync guilde {guild_id} abandonnée: {e.status} {e.text}")
+                    return
+                logger.warning(f"Sync guilde {guild_id} reportée de {delay:.1f}s (tentative {attempt}/{self.max_attempts})")
+                await asyncio.sleep(delay)
+                continue
+            self.done += 1
+            if result.pushed:
+                self.pushed += 1
+            return
+        self.failed[guild_id] = "trop de tentatives"
+        logger.error(f"Sync guilde {guild_id} abandonnée après {self.max_attempts} tentatives")
@@ -1,27 +1,125 @@
 import discord
 from discord.ext import commands
-import discord.app_commands
+from discord import app_commands
 import os
+import sys
 import logging
 import asyncio
 from datetime import datetime
 import json
 
-# Configuration du logging pour Railway
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s %(levelname)-8s %(name)-12s %(message)s',
-    datefmt='%Y-%m-%d %H:%M:%S'
+from core import serialization
+from core.archive import MonthlyArchive
+from core.cluster import ClusterClient, ClusterConfig
+from core.lifecycle import GracefulShutdown, WarmSnapshot
+from core.logs import setup_logging
+from core.metrics import InstrumentedCommandTree, MetricsServer, instrument
+from core.perf import LoopMonitor
+from core.ratelimit import TokenBucket
+from core.startup import StartupReport, load_cogs
+from core.storage import Storage
+from core.sync import CommandSyncCache, GuildSyncScheduler, sync_scope
+
+startup_report = StartupReport()
+sync_cache = CommandSyncCache()
+# Renseigné uniquement quand le bot est lancé par core.cluster
+cluster_config = ClusterConfig.from_env()
+
+# Configuration du logging (LOG_MODE=queue pour écrire depuis un thread dédié)
+setup_logging(
+    prefix=f'[c{cluster_config.cluster_id}] ' if cluster_config else '',
+    static_fields={"cluster": cluster_config.cluster_id} if cluster_config else None
 )
 logger = logging.getLogger('bot')
 
+# Profil rapide (--fast ou BOT_FAST=1) : uvloop et orjson s'ils sont installés
+FAST_PROFILE = '--fast' in sys.argv or os.getenv('BOT_FAST', '').lower() in ('1', 'true', 'yes')
+
+
+def enable_fast_profile():
+    """Active uvloop et orjson, en retombant sur asyncio / json s'ils sont absents"""
+    enabled = []
+    try:
+        import uvloop
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+        enabled.append('uvloop')
+    except ImportError:
+        logger.info("uvloop non installé, boucle asyncio standard conservée")
+    if serialization.enable_fast():
+        enabled.append('orjson')
+    else:
+        logger.info("orjson non installé, sérialisation json standard conservée")
+    logger.info(f"Profil rapide activé : {', '.join(enabled) or 'aucune optimisation disponible'}")
+
 # Configuration du bot
 intents = discord.Intents.default()
 intents.message_content = True
 intents.members = True
 intents.guilds = True
 
-bot = commands.Bot(command_prefix='!', intents=intents, help_command=None)
+if cluster_config:
+    bot = commands.AutoShardedBot(
+        command_prefix='!',
+        intents=intents,
+        help_command=None,
+        shard_ids=cluster_config.shard_ids,
+        shard_count=cluster_config.shard_count,
+        tree_cls=InstrumentedCommandTree
+    )
+    bot.cluster = ClusterClient(cluster_config, bot)
+else:
+    bot = commands.Bot(command_prefix='!', intents=intents, help_command=None, tree_cls=InstrumentedCommandTree)
+    bot.cluster = None
+
+# Base SQLite partagée par les cogs (ouverte dans setup_hook, avant le chargement des cogs)
+bot.storage = Storage(
+    os.getenv('DATABASE_PATH', 'bot.db'),
+    # Écritures différées : au plus un flush par intervalle (s), ou dès N écritures en attente
+    flush_interval=float(os.getenv('STORAGE_FLUSH_INTERVAL', '1.0')),
+    max_pending=int(os.getenv('STORAGE_FLUSH_MAX_PENDING', '500')),
+    # Données par guilde gardées en mémoire : borne LRU et évincement après inactivité (s)
+    guild_cache_size=int(os.getenv('GUILD_CACHE_SIZE', '1000')),
+    guild_cache_ttl=float(os.getenv('GUILD_CACHE_TTL', '3600'))
+)
+# Tickets fermés : archive compressée par mois, hors de la base vivante (/ticket history)
+bot.ticket_archive = MonthlyArchive(
+    os.getenv('TICKET_ARCHIVE_DIR', 'ticket_archive'),
+    writer=f'c{cluster_config.cluster_id}' if cluster_config else None,
+    order_by='closed_at'
+)
+# Pré-création des salons de tickets en arrière-plan : budget de créations par seconde
+bot.ticket_pool_budget = TokenBucket(rate=float(os.getenv('TICKET_POOL_REFILL_RATE', '0.5')), capacity=5)
+
+# Surveillance de la boucle (/perf) : seuil de blocage configurable en millisecondes
+bot.loop_monitor = LoopMonitor(threshold=int(os.getenv('PERF_SLOW_CALLBACK_MS', '250')) / 1000)
+instrument(bot)
+
+# Endpoint de métriques optionnel (PORT est fourni par Render pour les services web)
+metrics_port = os.getenv('METRICS_PORT') or os.getenv('PORT')
+if metrics_port:
+    # Un port par cluster pour que les processus ne se disputent pas le même
+    metrics_port = int(metrics_port) + (cluster_config.cluster_id if cluster_config else 0)
+guild_sync = GuildSyncScheduler(bot, sync_cache, concurrency=int(os.getenv('GUILD_SYNC_CONCURRENCY', '2')))
+
+# Arrêt propre sur SIGTERM (déploiement) et instantané des caches chauds relu au démarrage suivant
+warm_snapshot = WarmSnapshot(
+    f'warm_snapshot.c{cluster_config.cluster_id}.json' if cluster_config else 'warm_snapshot.json',
+    max_age=float(os.getenv('WARM_SNAPSHOT_MAX_AGE', '900'))
+)
+shutdown = GracefulShutdown(bot, warm_snapshot, drain_timeout=float(os.getenv('SHUTDOWN_DRAIN_TIMEOUT', '10')))
+
+# Cogs chargés au démarrage (en parallèle, dans setup_hook)
+COGS = [
+    'cogs.roles',
+    'cogs.giveaways',
+    'cogs.saved_cmds',
+    'cogs.moderation',
+    'cogs.welcome',
+    'cogs.utilities',
+    'cogs.fun',
+    'cogs.tickets',
+    'cogs.perf'
+]
 
 def get_token():
     """Récupère le token Discord de manière sécurisée pour Railway"""
@@ -56,63 +154,77 @@ def get_token():
     
     return None
 
+async def sync_global_commands():
+    """Synchronise les commandes globales en parallèle de la connexion à la gateway"""
+    try:
+        with startup_report.phase("sync globale (arrière-plan)"):
+            await sync_scope(bot, sync_cache)
+    except Exception as e:
+        logger.error(f"Erreur sync globale: {e}")
+
+async def sync_guild_commands():
+    """Met en file la sync de chaque guilde (une seule fois, après le premier READY)"""
+    with startup_report.phase("sync par guilde (arrière-plan)"):
+        for guild in bot.guilds:
+            guild_sync.enqueue(guild)
+        await guild_sync.join()
+    progress = guild_sync.progress()
+    logger.info(f"Sync par guilde terminée: {progress['done']} ok ({progress['pushed']} poussées), {progress['failed']} en échec")
+    logger.info(startup_report.render())
+
+@bot.event
+async def setup_hook():
+    """Démarrage unique : exécuté après le login REST, avant la connexion à la gateway"""
+    startup_report.checkpoint("import + login REST")
+    bot.start_time = datetime.now()
+    bot.loop_monitor.start()
+    if metrics_port:
+        try:
+            bot.metrics_server = MetricsServer(bot, metrics_port)
+            await bot.metrics_server.start()
+        except OSError as e:
+            logger.error(f"Impossible d'exposer les métriques sur le port {metrics_port}: {e}")
+    if bot.cluster:
+        bot.cluster.start()
+    await bot.storage.open()
+    startup_report.checkpoint("base de données")
+    await load_cogs(bot, COGS, startup_report)
+    if warm_snapshot.restore(bot):
+        startup_report.checkpoint("instantané chaud")
+    shutdown.install()
+    guild_sync.start()
+    # En mode cluster, seul le cluster 0 pousse les commandes globales
+    if cluster_config is None or cluster_config.cluster_id == 0:
+        bot.loop.create_task(sync_global_commands())
+    startup_report.checkpoint("setup_hook")
+    logger.info(f"Setup terminé avec {len(bot.tree.get_commands())} commandes")
+
+async def before_identify_hook(shard_id, *, initial=False):
+    """En mode cluster, les IDENTIFY sont cadencés par le lanceur pour tous les processus"""
+    await bot.cluster.acquire_identify(shard_id)
+
+if cluster_config:
+    bot.before_identify_hook = before_identify_hook
+
 @bot.event
 async def on_ready():
-    """Événement déclenché quand le bot est prêt"""
+    """Événement déclenché quand le bot est prêt (aussi après chaque reconnexion)"""
+    if not startup_report.mark_ready():
+        logger.info(f"Reconnecté en tant que {bot.user} ({len(bot.guilds)} serveur(s))")
+        return
+    
     logger.info(f"Bot connecté en tant que {bot.user}")
     logger.info(f"ID du bot: {bot.user.id}")
     logger.info(f"Connecté à {len(bot.guilds)} serveur(s)")
-    
-    # Chargement des cogs
-    cogs_to_load = [
-        'cogs.roles',
-        'cogs.giveaways', 
-        'cogs.saved_cmds',
-        'cogs.moderation',
-        'cogs.welcome',
-        'cogs.utilities',
-        'cogs.fun',
-        'cogs.tickets'
-    ]
-    
-    for cog in cogs_to_load:
-        try:
-            logger.info(f"Chargement du cog: {cog}")
-            await bot.load_extension(cog)
-            logger.info(f"Cog chargé: {cog}")
-        except Exception as e:
-            logger.error(f"Erreur chargement cog {cog}: {e}")
-    
-    # Synchronisation des commandes
-    try:
-        logger.info("Début de la sync globale...")
-        await bot.tree.sync()
-        logger.info("Sync globale effectuée")
-        
-        logger.info("Début de la sync par guilde...")
-        for guild in bot.guilds:
-            try:
-                await bot.tree.sync(guild=guild)
-                logger.info(f"Sync effectuée pour la guilde: {guild.name} [ {guild.id} ]")
-            except Exception as e:
-                logger.error(f"Erreur sync guilde {guild.name}: {e}")
-        logger.info("Sync par guilde terminée")
-        
-        logger.info(f"Bot prêt avec {len(bot.tree.get_commands())} commandes")
-        logger.info("Bot opérationnel !")
-        
-    except Exception as e:
-        logger.error(f"Erreur sync commandes: {e}")
+    logger.info(startup_report.render())
+    bot.loop.create_task(sync_guild_commands())
+    logger.info("Bot opérationnel !")
 
 @bot.event
 async def on_guild_join(guild):
     """Événement déclenché quand le bot rejoint un serveur"""
     logger.info(f"Bot rejoint le serveur: {guild.name} [ {guild.id} ]")
-    try:
-        await bot.tree.sync(guild=guild)
-        logger.info(f"Sync effectuée pour le nouveau serveur: {guild.name}")
-    except Exception as e:
-        logger.error(f"Erreur sync nouveau serveur {guild.name}: {e}")
+    guild_sync.enqueue(guild)
 
 @bot.event
 async def on_error(event, *args, **kwargs):
@@ -120,25 +232,50 @@ async def on_error(event, *args, **kwargs):
     logger.error(f"Erreur dans l'événement {event}: {args} {kwargs}")
 
 @bot.tree.command(name="sync", description="Synchronise les commandes slash (Admin uniquement)")
-@app_commands.describe(scope="Portée de la synchronisation (global ou guild)")
-async def sync_slash(interaction: discord.Interaction, scope: str = "guild"):
+@app_commands.describe(scope="Portée de la synchronisation", force="Forcer l'envoi même si les commandes n'ont pas changé")
+@app_commands.choices(scope=[
+    app_commands.Choice(name="Serveur", value="guild"),
+    app_commands.Choice(name="Global", value="global"),
+    app_commands.Choice(name="Global + serveur", value="all"),
+    app_commands.Choice(name="État de la file de sync", value="status")
+])
+async def sync_slash(interaction: discord.Interaction, scope: str = "guild", force: bool = False):
     """Commande pour synchroniser les commandes slash"""
     if not interaction.user.guild_permissions.administrator:
         await interaction.response.send_message("❌ **Vous devez être administrateur pour utiliser cette commande.**", ephemeral=True)
         return
     
-    try:
-        if scope.lower() == "global":
-            await bot.tree.sync()
-            await interaction.response.send_message("✅ **Synchronisation globale effectuée !**", ephemeral=True)
-            logger.info(f"Sync globale demandée par {interaction.user}")
-        else:
-            await bot.tree.sync(guild=interaction.guild)
-            await interaction.response.send_message("✅ **Synchronisation du serveur effectuée !**", ephemeral=True)
-            logger.info(f"Sync guilde demandée par {interaction.user} sur {interaction.guild.name}")
-    except Exception as e:
-        logger.error(f"Erreur sync commande: {e}")
-        await interaction.response.send_message(f"❌ **Erreur lors de la synchronisation:** {str(e)}", ephemeral=True)
+    if scope == "status":
+        progress = guild_sync.progress()
+        await interaction.response.send_message(
+            f"🔄 **Sync par guilde** : {progress['done']} terminée(s) ({progress['pushed']} poussée(s)), "
+            f"{progress['pending']} en attente, {progress['failed']} en échec",
+            ephemeral=True
+        )
+        return
+    
+    await interaction.response.defer(ephemeral=True)
+    targets = []
+    if scope in ("global", "all"):
+        targets.append(None)
+    if scope in ("guild", "all"):
+        targets.append(interaction.guild)
+    
+    lines = []
+    for guild in targets:
+        label = "Global" if guild is None else f"Serveur {guild.name}"
+        try:
+            result = await sync_scope(bot, sync_cache, guild=guild, force=force)
+            if result.pushed:
+                lines.append(f"✅ **{label}** : poussé en {result.duration:.2f}s")
+            else:
+                lines.append(f"⏭️ **{label}** : ignoré (commandes inchangées)")
+        except Exception as e:
+            logger.error(f"Erreur sync commande ({label}): {e}")
+            lines.append(f"❌ **{label}** : erreur ({e})")
+    
+    logger.info(f"Sync {scope} demandée par {interaction.user} sur {interaction.guild.name}")
+    await interaction.followup.send("\n".join(lines), ephemeral=True)
 
 # Configuration pour Railway
 if __name__ == "__main__":
@@ -147,6 +284,9 @@ if __name__ == "__main__":
         logger.error("❌ Token Discord non trouvé ! Vérifiez vos variables d'environnement ou le fichier token.txt")
         exit(1)
     
+    if FAST_PROFILE:
+        enable_fast_profile()
+
     logger.info("Démarrage du bot...")
     logger.info("Token récupéré avec succès, connexion en cours...")
     